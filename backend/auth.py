@@ -1,22 +1,71 @@
+import hashlib
+import os
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
+from cache import LRUCache
 from database import get_session
 from models.user import User
 from core.security import decode_access_token
 
 security = HTTPBearer()
 
+# Principal cache: decoded claims keyed by token digest and User rows keyed by
+# id, so a warm request authenticates without JWT crypto or a user SELECT.
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", 300))
+
+_claims_cache = LRUCache(AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+_user_cache = LRUCache(AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def decode_token_cached(token: str) -> Optional[dict]:
+    """Decode a JWT, reusing the claims of a previously verified token"""
+    key = _token_key(token)
+    payload = _claims_cache.get(key)
+    if payload is not None:
+        return payload
+    
+    payload = decode_access_token(token)
+    if payload is None:
+        return None
+    
+    # Never keep claims around past the token's own expiry
+    ttl = AUTH_CACHE_TTL
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    _claims_cache.set(key, payload, ttl=ttl)
+    return payload
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a cached User row; call after the user is changed or deleted"""
+    _user_cache.pop(int(user_id))
+
+def invalidate_token(token: str) -> None:
+    """Drop the cached claims of a single token"""
+    _claims_cache.pop(_token_key(token))
+
+def clear_principal_cache() -> None:
+    _claims_cache.clear()
+    _user_cache.clear()
+
+def principal_cache_stats() -> dict:
+    return {"claims": _claims_cache.stats(), "users": _user_cache.stats()}
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     session: AsyncSession = Depends(get_session)
 ) -> User:
     """Get current authenticated user"""
     token = credentials.credentials
-    payload = decode_access_token(token)
+    payload = decode_token_cached(token)
     
     if payload is None:
         raise HTTPException(
@@ -33,6 +82,10 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    user = _user_cache.get(int(user_id))
+    if user is not None:
+        return user
+    
     statement = select(User).where(User.id == int(user_id))
     result = await session.execute(statement)
     user = result.scalars().first()
@@ -44,6 +97,9 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Detach before sharing the instance across requests
+    session.expunge(user)
+    _user_cache.set(user.id, user)
     return user
 
 async def get_current_user_optional(
@@ -0,0 +1,60 @@
+"""Shared helpers for the in-process API benchmarks.
+
+Benchmarks run from the ``backend`` directory, e.g.
+``python -m benchmarks.login_contention``. The app is booted in-process
+against a throwaway SQLite database and driven through httpx's ASGI
+transport, so numbers reflect the application and not the network.
+"""
+import os
+import sys
+import tempfile
+from contextlib import asynccontextmanager
+
+# Benchmarks drive far more traffic per user than the limiter allows
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(BACKEND_DIR))
+
+def use_temp_database() -> str:
+    """Point DATABASE_URL at a fresh SQLite file; call before importing the app"""
+    path = os.path.join(tempfile.mkdtemp(prefix="pm-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    return path
+
+@asynccontextmanager
+async def app_client():
+    """Run the app's lifespan and yield an httpx client bound to it"""
+    import httpx
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+async def signup(client, username: str, password: str = "bench-password") -> dict:
+    response = await client.post("/api/auth/signup", json={
+        "username": username,
+        "email": f"{username}@bench.example.com",
+        "password": password,
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(samples) -> str:
+    return "n={:<6d} p50={:7.2f}ms p95={:7.2f}ms p99={:7.2f}ms max={:7.2f}ms".format(
+        len(samples),
+        percentile(samples, 50) * 1000,
+        percentile(samples, 95) * 1000,
+        percentile(samples, 99) * 1000,
+        (max(samples) if samples else 0) * 1000,
+    )
@@ -0,0 +1,86 @@
+"""Delta sync against reloading the board after each drag.
+
+Seeds one board with ``--issues`` issues, then performs ``--moves`` status
+changes. After each, a client catches up either by reloading the whole
+board (``GET /api/issues/project/{id}``) or by asking the change feed for
+what happened since its cursor. Reports latency and bytes per catch-up,
+and checks that the replica kept by applying deltas ends up equal to the
+board.
+
+    python -m benchmarks.changes --issues 20000 --moves 200
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from benchmarks._common import app_client, signup, summarize, use_temp_database
+
+STATUSES = ("To Do", "In Progress", "Done")
+
+async def main(args) -> int:
+    use_temp_database()
+    rng = random.Random(args.seed)
+    async with app_client() as client:
+        headers = await signup(client, "delta")
+        project_id = (await client.post("/api/projects/", json={"name": "delta"}, headers=headers)).json()["id"]
+        issue_ids = []
+        for start in range(0, args.issues, 1000):
+            created = await client.post("/api/issues/bulk", json=[
+                {"title": f"Issue {n}", "status": STATUSES[0], "priority": "Low", "project_id": project_id}
+                for n in range(start, min(args.issues, start + 1000))
+            ], headers=headers)
+            issue_ids += [result["issue"]["id"] for result in created.json()]
+
+        board_path = f"/api/issues/project/{project_id}"
+        changes_path = f"/api/issues/project/{project_id}/changes"
+        replica, cursor = {}, 0
+        while True:
+            changes = (await client.get(changes_path, params={"since": cursor}, headers=headers)).json()
+            replica.update((issue["id"], issue) for issue in changes["issues"])
+            cursor = changes["cursor"]
+            if not changes["has_more"]:
+                break
+
+        reload_latencies, reload_bytes, delta_latencies, delta_bytes = [], 0, [], 0
+        for move in range(args.moves):
+            issue_id = rng.choice(issue_ids)
+            if move % 10 == 9:
+                # Every tenth change is a deletion, to exercise tombstones
+                await client.delete(f"/api/issues/{issue_id}", headers=headers)
+                issue_ids.remove(issue_id)
+            else:
+                await client.patch(f"/api/issues/{issue_id}/status", json={"status": rng.choice(STATUSES)},
+                                   headers=headers)
+
+            before = time.perf_counter()
+            response = await client.get(board_path, headers=headers)
+            reload_latencies.append(time.perf_counter() - before)
+            reload_bytes += len(response.content)
+
+            before = time.perf_counter()
+            response = await client.get(changes_path, params={"since": cursor}, headers=headers)
+            delta_latencies.append(time.perf_counter() - before)
+            delta_bytes += len(response.content)
+            changes = response.json()
+            for deleted in changes["deleted"]:
+                replica.pop(deleted, None)
+            replica.update((issue["id"], issue) for issue in changes["issues"])
+            cursor = changes["cursor"]
+
+        board = {issue["id"]: issue for issue in (await client.get(board_path, headers=headers)).json()}
+
+    print(f"issues={args.issues} moves={args.moves}")
+    print(f"full reload {summarize(reload_latencies)} {reload_bytes / max(1, args.moves) / 1024:9.1f} KiB each")
+    print(f"delta sync  {summarize(delta_latencies)} {delta_bytes / max(1, args.moves) / 1024:9.1f} KiB each")
+    consistent = replica == board
+    print(f"replica {'matches' if consistent else 'DIFFERS FROM'} the board ({len(replica)} issues)")
+    return 0 if consistent else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--issues", type=int, default=20000)
+    parser.add_argument("--moves", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,186 @@
+"""Cold start: import time, startup and time to the first request per worker.
+
+Each worker is a fresh interpreter that imports the app, runs its lifespan
+and serves one authenticated board load through the ASGI transport.
+Scenarios:
+
+* first boot: ``DB_SCHEMA_MODE=migrate`` on an empty database
+* restart: ``migrate`` on a database already at the current schema
+* verify: a worker that only checks the schema version
+* N workers started at once on an empty database, all in ``migrate`` mode;
+  exactly one of them runs the DDL
+* preloaded fork: one process imports the app and forks N ``verify``
+  workers, as ``gunicorn --preload`` does; they skip the import entirely
+
+On an empty database each worker adds the board's owner once its lifespan
+is done, outside the timings, so every first request can succeed. Fails if
+any first request doesn't return 200, or if a preloaded-fork worker takes
+longer than ``--budget`` seconds from fork to its first response.
+
+    python -m benchmarks.cold_start --workers 4 --issues 50000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks._common import BACKEND_DIR
+
+# The owner of the board every worker loads, as the token's user 1
+OWNER_SQL = [
+    "INSERT OR IGNORE INTO user (id, username, email, hashed_password) "
+    "VALUES (1, 'cold', 'cold@bench.example.com', 'x')",
+    "INSERT OR IGNORE INTO project (id, name, description, owner_id) VALUES (1, 'cold', '', 1)",
+]
+
+# The client side (httpx, the token) is set up outside the timed sections
+PROBE = r"""
+import asyncio, json, os, sys, time
+import httpx
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from core.security import create_access_token
+HEADERS = {"Authorization": "Bearer " + create_access_token({"sub": "1"})}
+SEED_SQL = json.loads(os.environ.get("COLD_SEED_SQL", "[]"))
+
+def seed():
+    import sqlite3
+    conn = sqlite3.connect(os.environ["DATABASE_URL"].split("///", 1)[1], timeout=30)
+    with conn:
+        for statement in SEED_SQL:
+            conn.execute(statement)
+    conn.close()
+
+async def serve(forked_at):
+    begun = time.perf_counter()
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        seeding = 0.0
+        if SEED_SQL:
+            seed()
+            seeding = time.perf_counter() - ready
+            ready += seeding
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://cold") as client:
+            response = await client.get("/api/issues/project/1?limit=50", headers=HEADERS)
+        answered = time.perf_counter()
+    # One write per line: forked workers share the pipe
+    os.write(1, (json.dumps({
+        "import": imported - started if forked_at is None else 0.0,
+        "startup": ready - begun,
+        "first_request": answered - ready,
+        "status": response.status_code,
+        "seeding": seeding,
+        "answered_at": time.time(),
+        "forked_at": forked_at,
+    }) + "\n").encode())
+
+workers = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+if not workers:
+    asyncio.run(serve(None))
+else:
+    children = []
+    for _ in range(workers):
+        forked_at = time.time()
+        pid = os.fork()
+        if pid == 0:
+            asyncio.run(serve(forked_at))
+            os._exit(0)
+        children.append(pid)
+    failed = sum(os.waitpid(pid, 0)[1] != 0 for pid in children)
+    sys.exit(1 if failed else 0)
+"""
+
+def _spawn(database: str, mode: str, forks: int = 0, seed: bool = False) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite+aiosqlite:///{database}",
+        DB_SCHEMA_MODE=mode,
+        RATE_LIMIT_ENABLED="false",
+        COLD_SEED_SQL=json.dumps(OWNER_SQL if seed else []),
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-c", PROBE] + ([str(forks)] if forks else []),
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    process.spawned_at = time.time()
+    return process
+
+def _collect(processes) -> list:
+    results = []
+    for process in processes:
+        stdout, stderr = process.communicate()
+        if process.returncode != 0:
+            raise SystemExit(f"worker failed:\n{stderr[-2000:]}")
+        for line in stdout.splitlines():
+            result = json.loads(line)
+            started = result["forked_at"] or process.spawned_at
+            result["ready"] = result["answered_at"] - started - result["seeding"]
+            results.append(result)
+    return results
+
+def _report(label: str, results: list) -> float:
+    worst = max(results, key=lambda result: result["ready"])
+    statuses = sorted({result["status"] for result in results})
+    print(f"{label:<24} workers={len(results)} ready max={worst['ready'] * 1000:7.1f}ms "
+          f"(import {worst['import'] * 1000:6.1f}ms startup {worst['startup'] * 1000:6.1f}ms "
+          f"first request {worst['first_request'] * 1000:5.1f}ms) status={statuses}")
+    return worst["ready"]
+
+def _seed(database: str, issues: int) -> None:
+    conn = sqlite3.connect(database)
+    with conn:
+        for statement in OWNER_SQL:
+            conn.execute(statement)
+        conn.executemany(
+            "INSERT INTO issue (title, description, status, priority, project_id, rank) VALUES (?, '', 'To Do', 'Low', 1, ?)",
+            ((f"Issue {n}", f"{n + 1:08d}") for n in range(issues))
+        )
+    conn.close()
+
+def _schema_rows(database: str) -> int:
+    conn = sqlite3.connect(database)
+    try:
+        return conn.execute("SELECT count(*) FROM schema_version").fetchone()[0]
+    finally:
+        conn.close()
+
+def main(args) -> int:
+    directory = tempfile.mkdtemp(prefix="pm-cold-")
+    database = os.path.join(directory, "cold.db")
+
+    results = []
+
+    def run(label: str, processes) -> float:
+        collected = _collect(processes)
+        results.extend(collected)
+        return _report(label, collected)
+
+    run("first boot (migrate)", [_spawn(database, "migrate", seed=True)])
+    _seed(database, args.issues)
+    run("restart (migrate)", [_spawn(database, "migrate")])
+    run("worker (verify)", [_spawn(database, "verify")])
+
+    fresh = os.path.join(directory, "fresh.db")
+    run("concurrent (migrate)", [_spawn(fresh, "migrate", seed=True) for _ in range(args.workers)])
+    rows = _schema_rows(fresh)
+
+    worst = run("preloaded fork (verify)", [_spawn(database, "verify", forks=args.workers)])
+    within = worst <= args.budget
+    answered = all(result["status"] == 200 for result in results)
+    print(f"schema_version rows after concurrent start={rows}; "
+          f"preloaded worker ready {worst * 1000:.1f}ms, budget {args.budget * 1000:.0f}ms "
+          f"{'OK' if within else 'OVER'}; first requests {'all 200' if answered else 'FAILED'}")
+    return 0 if within and rows == 1 and answered else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--issues", type=int, default=50000)
+    parser.add_argument("--budget", type=float, default=0.5, help="seconds from fork to first response")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,113 @@
+"""User directory autocomplete latency at a large user count.
+
+Seeds ``--users`` accounts straight into SQLite, then types ``--lookups``
+random prefixes of existing usernames and emails (one to six characters,
+as a picker does keystroke by keystroke) against
+``GET /api/auth/directory``. Reports latency with the prefix cache cleared
+before every lookup (uncached) and left warm (cached), and checks that each
+query plan is an index range scan rather than a table scan.
+
+Fails if the uncached p95 exceeds ``--budget`` milliseconds.
+
+    python -m benchmarks.directory --users 1000000
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import string
+import sys
+import time
+
+from benchmarks._common import app_client, percentile, signup, summarize, use_temp_database
+
+def _seed(database: str, users: int, rng: random.Random) -> list:
+    names = []
+    conn = sqlite3.connect(database)
+    with conn:
+        rows = []
+        for n in range(users):
+            name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))) + str(n)
+            names.append(name)
+            rows.append((name, f"{name}@dir.example.com", "x"))
+        conn.executemany("INSERT INTO user (username, email, hashed_password) VALUES (?, ?, ?)", rows)
+    conn.close()
+    return names
+
+def _plans(database: str) -> list:
+    from sqlalchemy.dialects import sqlite
+
+    from directory import directory_statement
+
+    conn = sqlite3.connect(database)
+    try:
+        plans = []
+        for field, after in (("username", None), ("email", None), ("username", "ab")):
+            statement = directory_statement(field, "ab", 21, after).compile(
+                dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}
+            )
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+            plans.append((field, after, " / ".join(row[-1] for row in rows)))
+        return plans
+    finally:
+        conn.close()
+
+async def _lookups(client, headers, prefixes, clear) -> list:
+    from directory import clear_directory_cache
+
+    latencies = []
+    for field, prefix in prefixes:
+        if clear:
+            clear_directory_cache()
+        before = time.perf_counter()
+        response = await client.get("/api/auth/directory", params={"q": prefix, "by": field}, headers=headers)
+        latencies.append(time.perf_counter() - before)
+        response.raise_for_status()
+    return latencies
+
+async def main(args) -> int:
+    database = use_temp_database()
+    rng = random.Random(args.seed)
+    async with app_client() as client:
+        headers = await signup(client, "directory")
+        started = time.perf_counter()
+        names = _seed(database, args.users, rng)
+        print(f"seeded {args.users} users in {time.perf_counter() - started:.1f}s")
+
+        prefixes = []
+        for _ in range(args.lookups):
+            name = rng.choice(names)
+            prefixes.append((rng.choice(("username", "email")), name[:rng.randint(1, 6)]))
+        # Warm the route and the SQLite page cache
+        await _lookups(client, headers, prefixes[:50], clear=True)
+
+        uncached = await _lookups(client, headers, prefixes, clear=True)
+        cached = await _lookups(client, headers, prefixes, clear=False)
+
+        first = await client.get("/api/auth/directory", params={"q": "a", "limit": 5}, headers=headers)
+        second = await client.get("/api/auth/directory", params={
+            "q": "a", "limit": 5, "after": first.headers["x-next-cursor"]
+        }, headers=headers)
+        names_seen = [user["username"] for user in first.json() + second.json()]
+        paged = names_seen == sorted(names_seen) and len(set(names_seen)) == 10
+        paged &= all(name.startswith("a") for name in names_seen)
+
+    print(f"uncached {summarize(uncached)}")
+    print(f"cached   {summarize(cached)}")
+    scans = 0
+    for field, after, plan in _plans(database):
+        scans += "SCAN" in plan
+        print(f"plan by={field:<8} after={after!s:<4} {plan}")
+    p95 = percentile(uncached, 95) * 1000
+    ok = p95 <= args.budget and not scans and paged
+    print(f"pagination {'ok' if paged else 'BROKEN'}; uncached p95 {p95:.2f}ms, budget {args.budget:g}ms "
+          f"{'OK' if ok else 'FAILED'}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--budget", type=float, default=5.0, help="uncached p95 in milliseconds")
+    parser.add_argument("--seed", type=int, default=1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
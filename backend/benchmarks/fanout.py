@@ -0,0 +1,59 @@
+"""Event fan-out latency through the broker with many subscribers.
+
+Publishes ``--events`` board events to one project channel watched by
+``--subscribers`` consumers and reports publish cost and the delay until
+each consumer dequeues each event.
+
+    python -m benchmarks.fanout --subscribers 1000 --events 200
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks._common import summarize
+from events import LocalBroker, project_channel
+
+async def _consume(subscription, expected, latencies):
+    for _ in range(expected):
+        message = await subscription.get()
+        if message is None:
+            return
+        latencies.append(time.perf_counter() - json.loads(message)["sent_at"])
+
+async def main(args):
+    broker = LocalBroker(queue_size=args.queue_size)
+    channel = project_channel(1)
+    latencies = []
+    consumers = [
+        asyncio.create_task(_consume(broker.subscribe(channel), args.events, latencies))
+        for _ in range(args.subscribers)
+    ]
+    await asyncio.sleep(0)
+
+    publish_times = []
+    started = time.perf_counter()
+    for seq in range(args.events):
+        message = json.dumps({"type": "issue.status_changed", "issue_id": seq, "status": "Done",
+                              "sent_at": time.perf_counter()})
+        before = time.perf_counter()
+        await broker.publish(channel, message)
+        publish_times.append(time.perf_counter() - before)
+        # Let consumers run between events, as request handling would
+        await asyncio.sleep(args.interval)
+    await asyncio.gather(*consumers)
+    elapsed = time.perf_counter() - started
+
+    print(f"subscribers={args.subscribers} events={args.events} elapsed={elapsed:.2f}s "
+          f"deliveries/s={len(latencies) / elapsed:,.0f}")
+    print(f"publish   {summarize(publish_times)}")
+    print(f"delivery  {summarize(latencies)}")
+    print(f"broker    {broker.stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.001, help="seconds between events")
+    parser.add_argument("--queue-size", type=int, default=256)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,92 @@
+"""Status-update latency with the write-behind issue history on and off.
+
+Seeds one project, then runs ``--moves`` status changes through
+``PATCH /api/issues/{id}/status`` from ``--concurrency`` concurrent clients,
+alternating phases with the history writer stopped (disabled) and running
+(enabled). Reports latency per mode and checks that every move made while
+enabled produced exactly one history row. On SQLite, concurrent writers
+queue on the database lock, which dominates tail latency in both modes.
+
+    python -m benchmarks.history --moves 4000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from benchmarks._common import app_client, signup, summarize, use_temp_database
+
+STATUSES = ("To Do", "In Progress", "Done")
+
+async def _phase(client, headers, issue_ids, moves, concurrency, rng) -> list:
+    latencies = []
+    remaining = [moves]
+
+    async def worker():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            issue_id = rng.choice(issue_ids)
+            before = time.perf_counter()
+            response = await client.patch(
+                f"/api/issues/{issue_id}/status", json={"status": rng.choice(STATUSES)}, headers=headers
+            )
+            latencies.append(time.perf_counter() - before)
+            response.raise_for_status()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+async def main(args) -> int:
+    use_temp_database()
+    rng = random.Random(args.seed)
+    async with app_client() as client:
+        from sqlalchemy import func, select
+
+        from database import engine
+        from history import history_writer
+        from models.issue_event import IssueEvent
+
+        headers = await signup(client, "historian")
+        project_id = (await client.post("/api/projects/", json={"name": "history"}, headers=headers)).json()["id"]
+        created = await client.post("/api/issues/bulk", json=[
+            {"title": f"Issue {n}", "status": STATUSES[0], "priority": "Low", "project_id": project_id}
+            for n in range(args.issues)
+        ], headers=headers)
+        issue_ids = [result["issue"]["id"] for result in created.json()]
+        await history_writer.sync()
+        async with engine.connect() as conn:
+            seeded = (await conn.execute(select(func.count()).select_from(IssueEvent))).scalar_one()
+
+        results = {"disabled": [], "enabled": []}
+        per_phase = max(1, args.moves // (2 * args.rounds))
+        for _ in range(args.rounds):
+            for mode in ("disabled", "enabled"):
+                if mode == "disabled":
+                    await history_writer.stop()
+                else:
+                    await history_writer.start()
+                results[mode] += await _phase(client, headers, issue_ids, per_phase, args.concurrency, rng)
+        await history_writer.sync()
+        async with engine.connect() as conn:
+            total = (await conn.execute(select(func.count()).select_from(IssueEvent))).scalar_one()
+        stats = history_writer.stats()
+
+    written = total - seeded
+    expected = len(results["enabled"])
+    print(f"issues={args.issues} moves={args.moves} concurrency={args.concurrency} rounds={args.rounds}")
+    for mode, latencies in results.items():
+        print(f"{mode:<9} {summarize(latencies)}")
+    print(f"history rows written={written} expected={expected} "
+          f"dropped={stats['dropped']} failed={stats['failed']} "
+          f"{'OK' if written == expected else 'MISMATCH'}")
+    return 0 if written == expected else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--issues", type=int, default=200)
+    parser.add_argument("--moves", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,223 @@
+"""Load test: realistic Kanban traffic against the in-process app.
+
+Boots ``main.app`` on a temporary SQLite database, seeds users, projects and
+issues, then runs ``--concurrency`` virtual users for ``--duration`` seconds.
+Each virtual user picks weighted actions (board loads, status drags, issue
+edits, project lists, logins). The report gives throughput, p50/p95/p99
+latency and SQL statements per request for every route.
+
+Results are written as JSON (``--output``). With ``--baseline`` the run is
+compared against a previous result file and the exit status is non-zero when
+a route's p95 latency or statements per request regress past the tolerance.
+
+    python -m benchmarks.loadtest --duration 20 --output results.json
+    python -m benchmarks.loadtest --save-baseline benchmarks/baseline.json
+    python -m benchmarks.loadtest --baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import platform
+import random
+import sys
+import time
+
+from benchmarks._common import app_client, percentile, use_temp_database
+
+STATUSES = ("To Do", "In Progress", "Done")
+PRIORITIES = ("Low", "Medium", "High")
+PASSWORD = "load-test-password"
+
+# (route label, weight)
+MIX = (
+    ("GET /api/issues/project/{id}", 45),
+    ("PATCH /api/issues/{id}/status", 25),
+    ("PUT /api/issues/{id}", 12),
+    ("GET /api/projects/", 10),
+    ("GET /api/projects/{id}/stats", 5),
+    ("POST /api/auth/login", 3),
+)
+
+_statements = contextvars.ContextVar("loadtest_statements", default=None)
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+async def seed(args):
+    """Insert fixtures directly; returns [(user_id, username, token, project_ids)]"""
+    import database
+    from core.security import create_access_token, get_password_hash
+    from models.issue import Issue
+    from models.project import Project
+    from models.user import User
+    from sqlalchemy import insert
+
+    rng = random.Random(args.seed)
+    hashed = get_password_hash(PASSWORD)
+    users = []
+    async with database.engine.begin() as conn:
+        await conn.execute(insert(User), [
+            {"id": uid, "username": f"load{uid}", "email": f"load{uid}@bench.example.com",
+             "hashed_password": hashed}
+            for uid in range(1, args.users + 1)
+        ])
+        project_id = 0
+        for uid in range(1, args.users + 1):
+            project_ids = []
+            for _ in range(args.projects):
+                project_id += 1
+                project_ids.append(project_id)
+                await conn.execute(insert(Project).values(id=project_id, name=f"project {project_id}", owner_id=uid))
+                await conn.execute(insert(Issue), [
+                    {"title": f"Issue {n}", "description": "Seeded by the load test",
+                     "status": rng.choice(STATUSES), "priority": rng.choice(PRIORITIES),
+                     "assignee_id": uid, "project_id": project_id}
+                    for n in range(args.issues)
+                ])
+            token = create_access_token(data={"sub": str(uid)})
+            users.append((uid, f"load{uid}", token, project_ids))
+    return users
+
+async def _issue_ids(client, headers, project_id):
+    response = await client.get(f"/api/issues/project/{project_id}", headers=headers)
+    return [issue["id"] for issue in response.json()]
+
+async def virtual_user(client, user, stop_at, rng, samples):
+    _, username, token, project_ids = user
+    headers = {"Authorization": f"Bearer {token}"}
+    issues = {pid: await _issue_ids(client, headers, pid) for pid in project_ids}
+    routes, weights = zip(*MIX)
+    while time.perf_counter() < stop_at:
+        route = rng.choices(routes, weights)[0]
+        project_id = rng.choice(project_ids)
+        issue_id = rng.choice(issues[project_id])
+        if route == "GET /api/issues/project/{id}":
+            request = ("GET", f"/api/issues/project/{project_id}", None)
+        elif route == "PATCH /api/issues/{id}/status":
+            request = ("PATCH", f"/api/issues/{issue_id}/status", {"status": rng.choice(STATUSES)})
+        elif route == "PUT /api/issues/{id}":
+            request = ("PUT", f"/api/issues/{issue_id}", {
+                "title": f"Edited {rng.random():.6f}", "description": "Edited by the load test",
+                "status": rng.choice(STATUSES), "priority": rng.choice(PRIORITIES),
+                "assignee_id": None, "project_id": project_id,
+            })
+        elif route == "GET /api/projects/":
+            request = ("GET", "/api/projects/", None)
+        elif route == "GET /api/projects/{id}/stats":
+            request = ("GET", f"/api/projects/{project_id}/stats", None)
+        else:
+            request = ("POST", "/api/auth/login", {"username": username, "password": PASSWORD})
+
+        method, path, body = request
+        counter = [0]
+        _statements.set(counter)
+        started = time.perf_counter()
+        response = await client.request(method, path, json=body, headers=headers)
+        elapsed = time.perf_counter() - started
+        _statements.set(None)
+        samples.setdefault(route, []).append((elapsed, counter[0], response.status_code < 400))
+
+def report(samples, duration, args) -> dict:
+    routes = {}
+    for route, _ in MIX:
+        entries = samples.get(route, [])
+        latencies = [elapsed for elapsed, _, _ in entries]
+        routes[route] = {
+            "requests": len(entries),
+            "errors": sum(1 for _, _, ok in entries if not ok),
+            "rps": round(len(entries) / duration, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "statements_per_request": round(
+                sum(count for _, count, _ in entries) / len(entries), 3
+            ) if entries else 0.0,
+        }
+    total = sum(route["requests"] for route in routes.values())
+    return {
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("output", "baseline", "save_baseline")},
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "total_rps": round(total / duration, 2),
+        "routes": routes,
+    }
+
+def print_report(result):
+    print(f"{'route':<32} {'req':>6} {'err':>4} {'rps':>8} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'stmt/req':>8}")
+    for route, stats in result["routes"].items():
+        print(f"{route:<32} {stats['requests']:>6} {stats['errors']:>4} {stats['rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+              f"{stats['statements_per_request']:>8.2f}")
+    print(f"total throughput: {result['total_rps']:.1f} req/s")
+
+def compare(result, baseline, tolerance) -> list:
+    """Regressions of ``result`` against ``baseline`` as readable strings"""
+    regressions = []
+    for route, stats in result["routes"].items():
+        base = baseline.get("routes", {}).get(route)
+        if not base or not base["requests"]:
+            continue
+        if stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {stats['p95_ms']:.2f}ms vs baseline {base['p95_ms']:.2f}ms")
+        # Statement counts are deterministic enough to allow only rounding noise
+        if stats["statements_per_request"] > base["statements_per_request"] + 0.25:
+            regressions.append(
+                f"{route}: {stats['statements_per_request']:.2f} statements/request "
+                f"vs baseline {base['statements_per_request']:.2f}"
+            )
+        if stats["errors"] > base["errors"]:
+            regressions.append(f"{route}: {stats['errors']} errors vs baseline {base['errors']}")
+    return regressions
+
+async def main(args) -> int:
+    use_temp_database()
+    import database
+    from sqlalchemy import event
+
+    event.listen(database.engine.sync_engine, "before_cursor_execute", _count_statement)
+    rng = random.Random(args.seed)
+    samples = {}
+    async with app_client() as client:
+        users = await seed(args)
+        stop_at = time.perf_counter() + args.duration
+        await asyncio.gather(*(
+            virtual_user(client, users[n % len(users)], stop_at, random.Random(rng.random()), samples)
+            for n in range(args.concurrency)
+        ))
+
+    result = report(samples, args.duration, args)
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(result, fh, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as fh:
+            json.dump(result, fh, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(result, json.load(fh), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print("no regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--projects", type=int, default=3, help="projects per user")
+    parser.add_argument("--issues", type=int, default=200, help="issues per project")
+    parser.add_argument("--concurrency", type=int, default=32, help="virtual users")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative p95 slowdown before flagging a regression")
+    sys.exit(asyncio.run(main(parser.parse_args())))
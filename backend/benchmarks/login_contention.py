@@ -0,0 +1,62 @@
+"""p99 latency of GET /api/projects while logins run concurrently.
+
+Compares bcrypt on the event loop ("inline") with the bounded hashing pool
+configured by PASSWORD_HASH_EXECUTOR / PASSWORD_HASH_WORKERS.
+
+    python -m benchmarks.login_contention --duration 5 --logins 8
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks._common import app_client, signup, summarize, use_temp_database
+
+async def _board_reader(client, headers, stop_at, samples):
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+        response = await client.get("/api/projects/", headers=headers)
+        samples.append(time.perf_counter() - started)
+        response.raise_for_status()
+
+async def _login_loop(client, username, stop_at, counts):
+    while time.perf_counter() < stop_at:
+        response = await client.post(
+            "/api/auth/login", json={"username": username, "password": "bench-password"}
+        )
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+
+async def _phase(client, headers, username, duration, readers, logins):
+    samples, counts = [], {}
+    stop_at = time.perf_counter() + duration
+    await asyncio.gather(
+        *[_board_reader(client, headers, stop_at, samples) for _ in range(readers)],
+        *[_login_loop(client, username, stop_at, counts) for _ in range(logins)],
+    )
+    return samples, counts
+
+async def main(args):
+    use_temp_database()
+    from core import security
+
+    async with app_client() as client:
+        headers = await signup(client, "bench")
+        for i in range(10):
+            await client.post("/api/projects/", json={"name": f"project {i}"}, headers=headers)
+
+        samples, _ = await _phase(client, headers, "bench", args.duration, args.readers, 0)
+        print(f"{'no logins':<24} {summarize(samples)}")
+
+        configured = security.PASSWORD_HASH_EXECUTOR
+        for mode in ("inline", configured if configured != "inline" else "thread"):
+            security.PASSWORD_HASH_EXECUTOR = mode
+            samples, counts = await _phase(
+                client, headers, "bench", args.duration, args.readers, args.logins
+            )
+            print(f"{'logins/' + mode:<24} {summarize(samples)} login statuses={counts}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per phase")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent GET /api/projects loops")
+    parser.add_argument("--logins", type=int, default=8, help="concurrent login loops")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,78 @@
+"""Bulk provisioning throughput against one signup request per user.
+
+Creates ``--signups`` users through ``POST /api/auth/signup``, then
+provisions ``--users`` more from generated NDJSON with ``provision_users``.
+``--plaintext`` of those carry a password to hash and the rest an existing
+bcrypt hash, so the run shows both the hashing rate per worker and the
+database path on its own. Finally every provisioned row is checked to exist
+and a second run of the same input is checked to fail every row.
+
+    python -m benchmarks.provision --users 10000 --plaintext 200 --workers 4
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+
+from benchmarks._common import app_client, use_temp_database
+
+async def main(args) -> int:
+    use_temp_database()
+    async with app_client() as client:
+        from sqlalchemy import func, select
+
+        from core.security import get_password_hash
+        from database import engine
+        from models.user import User
+        from provision_users import provision
+
+        started = time.perf_counter()
+        for n in range(args.signups):
+            response = await client.post("/api/auth/signup", json={
+                "username": f"signup{n}", "email": f"signup{n}@bench.example.com", "password": "bench-password"
+            })
+            response.raise_for_status()
+        per_signup = (time.perf_counter() - started) / max(1, args.signups)
+
+        existing_hash = get_password_hash("bench-password")
+        lines = []
+        for n in range(args.users):
+            record = {"username": f"user{n}", "email": f"user{n}@bench.example.com"}
+            if n < args.plaintext:
+                record["password"] = f"password-{n}"
+            else:
+                record["password_hash"] = existing_hash
+            lines.append(json.dumps(record))
+        data = "\n".join(lines) + "\n"
+
+        started = time.perf_counter()
+        created, failed = await provision(io.StringIO(data), "ndjson", io.StringIO(), args.workers, args.batch_size)
+        elapsed = time.perf_counter() - started
+        async with engine.connect() as conn:
+            stored = (await conn.execute(
+                select(func.count()).select_from(User).where(User.username.like("user%"))
+            )).scalar_one()
+        again_created, again_failed = await provision(
+            io.StringIO(data), "ndjson", io.StringIO(), args.workers, args.batch_size, dry_run=True
+        )
+
+    print(f"signup endpoint  {per_signup * 1000:8.1f}ms per user, "
+          f"{args.users} users would take {per_signup * args.users / 60:.1f} min")
+    print(f"provision_users  {args.users} users ({args.plaintext} hashed here, {args.workers} workers) "
+          f"in {elapsed:.1f}s: created={created} failed={failed} stored={stored}")
+    print(f"rerun            created={again_created} failed={again_failed}")
+    ok = created == stored == args.users and failed == 0 and again_created == 0 and again_failed == args.users
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--plaintext", type=int, default=200)
+    parser.add_argument("--signups", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,129 @@
+"""Drag-and-drop ordering: many consecutive moves within one column.
+
+Seeds a project with ``--issues`` issues in one column, then performs
+``--moves`` moves through ``PATCH /api/issues/{id}/status`` with
+``after_id``/``before_id``. ``--pattern random`` drops issues at random
+places, ``top`` always at the top of the column, and ``wedge`` always
+between the first two issues, the worst case for key growth. Reports move
+latency, key lengths, background rebalances, and checks that the board
+order matches every move made.
+
+First, ``--appends`` issues are imported into one column of another project
+and their keys checked to follow file order and stay short, since appending
+at the end of a column must not run out of key space.
+
+    python -m benchmarks.ranking --moves 10000
+    python -m benchmarks.ranking --moves 10000 --pattern wedge
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from benchmarks._common import app_client, signup, summarize, use_temp_database
+
+STATUS = "To Do"
+
+async def _count_rebalances(subscription, counter):
+    while True:
+        message = await subscription.get()
+        if message is None:
+            return
+        if json.loads(message)["type"] == "issues.reranked":
+            counter[0] += 1
+
+async def _check_appends(client, headers, count: int) -> bool:
+    project_id = (await client.post("/api/projects/", json={"name": "appends"}, headers=headers)).json()["id"]
+    body = b"".join(
+        json.dumps({"title": f"Appended {n}", "status": STATUS, "priority": "Low"}).encode() + b"\n"
+        for n in range(count)
+    )
+    started = time.perf_counter()
+    response = await client.post(f"/api/projects/{project_id}/import", content=body, headers=headers)
+    elapsed = time.perf_counter() - started
+    imported = response.json().get("imported") if response.status_code == 200 else response.status_code
+    board = (await client.get(f"/api/issues/project/{project_id}", headers=headers)).json()
+    board.sort(key=lambda issue: issue["id"])
+    ranks = [issue["rank"] for issue in board]
+    in_order = len(ranks) == count and all(a < b for a, b in zip(ranks, ranks[1:]))
+    longest = max(map(len, ranks), default=0)
+    print(f"appends={count} imported={imported} elapsed={elapsed:.2f}s key length max={longest} "
+          f"order {'OK' if in_order else 'MISMATCH'}")
+    return in_order
+
+async def main(args) -> int:
+    use_temp_database()
+    rng = random.Random(args.seed)
+    async with app_client() as client:
+        from events import get_broker, project_channel
+
+        headers = await signup(client, "ranker")
+        appends_ok = await _check_appends(client, headers, args.appends)
+        project_id = (await client.post("/api/projects/", json={"name": "ranking"}, headers=headers)).json()["id"]
+        created = await client.post("/api/issues/bulk", json=[
+            {"title": f"Issue {n}", "status": STATUS, "priority": "Low", "project_id": project_id}
+            for n in range(args.issues)
+        ], headers=headers)
+        order = [result["issue"]["id"] for result in created.json()]
+
+        rebalances = [0]
+        broker = get_broker()
+        subscription = broker.subscribe(project_channel(project_id))
+        listener = asyncio.create_task(_count_rebalances(subscription, rebalances))
+
+        latencies = []
+        key_lengths = []
+        conflicts = 0
+        started = time.perf_counter()
+        for _ in range(args.moves):
+            index = rng.randrange(len(order))
+            issue_id = order.pop(index)
+            if args.pattern == "random":
+                position = rng.randrange(len(order) + 1)
+            else:
+                position = 0 if args.pattern == "top" else 1
+            body = {"status": STATUS}
+            if position > 0:
+                body["after_id"] = order[position - 1]
+            if position < len(order):
+                body["before_id"] = order[position]
+            before = time.perf_counter()
+            response = await client.patch(f"/api/issues/{issue_id}/status", json=body, headers=headers)
+            latencies.append(time.perf_counter() - before)
+            if response.status_code == 409:
+                # Raced with a rebalance; the issue stays put and a client would retry
+                conflicts += 1
+                order.insert(index, issue_id)
+                await asyncio.sleep(0)
+                continue
+            response.raise_for_status()
+            key_lengths.append(len(response.json()["rank"]))
+            order.insert(position, issue_id)
+        elapsed = time.perf_counter() - started
+
+        # Let any scheduled rebalance finish before checking the final order
+        await asyncio.sleep(0.5)
+        board = (await client.get(f"/api/issues/project/{project_id}", headers=headers)).json()
+        listener.cancel()
+        broker.unsubscribe(subscription)
+
+    board.sort(key=lambda issue: (issue["rank"], issue["id"]))
+    in_order = [issue["id"] for issue in board] == order
+    print(f"pattern={args.pattern} issues={args.issues} moves={args.moves} "
+          f"elapsed={elapsed:.2f}s moves/s={args.moves / elapsed:,.0f}")
+    print(f"latency     {summarize(latencies)}")
+    print(f"key length  max={max(key_lengths)} mean={sum(key_lengths) / len(key_lengths):.1f} "
+          f"final max={max(len(issue['rank']) for issue in board)}")
+    print(f"rebalances={rebalances[0]} conflicts={conflicts} order {'OK' if in_order else 'MISMATCH'}")
+    return 0 if in_order and appends_ok else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--issues", type=int, default=200)
+    parser.add_argument("--moves", type=int, default=10000)
+    parser.add_argument("--pattern", choices=("random", "top", "wedge"), default="random")
+    parser.add_argument("--appends", type=int, default=60000)
+    parser.add_argument("--seed", type=int, default=1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
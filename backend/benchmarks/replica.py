@@ -0,0 +1,159 @@
+"""Read routing against a replica stand-in: offload, read-your-writes, fallback.
+
+Runs the app with DATABASE_URL and READ_DATABASE_URL on two SQLite files. A
+background thread copies the primary into the replica every ``--lag``
+seconds with SQLite's backup API, standing in for asynchronous replication.
+
+* offload: board loads by a user who hasn't written lately go to the replica
+* read-your-writes: a user creating an issue and loading the board right
+  away always sees it, although the replica usually doesn't have it yet
+* fallback: with the replica file gone, reads move to the primary after the
+  first failure and return to the replica once it is restored
+
+    python -m benchmarks.replica --reads 2000 --lag 0.5
+"""
+import argparse
+import asyncio
+import glob
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from benchmarks._common import app_client, signup, summarize, use_temp_database
+
+os.environ.setdefault("REPLICA_STICKY_SECONDS", "1")
+os.environ.setdefault("REPLICA_HEALTH_INTERVAL", "0.2")
+
+class Replication(threading.Thread):
+    """Copies the primary into the replica file every ``lag`` seconds"""
+
+    def __init__(self, primary: str, replica: str, lag: float):
+        super().__init__(daemon=True)
+        self.primary = primary
+        self.replica = replica
+        self.lag = lag
+        self.stopped = threading.Event()
+
+    def copy(self) -> None:
+        source = sqlite3.connect(self.primary)
+        target = sqlite3.connect(self.replica)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.lag):
+            self.copy()
+
+def _on_replica(replica: str, issue_id: int) -> bool:
+    conn = sqlite3.connect(f"file:{replica}?mode=ro", uri=True)
+    try:
+        return conn.execute("SELECT 1 FROM issue WHERE id = ?", (issue_id,)).fetchone() is not None
+    finally:
+        conn.close()
+
+async def _load_boards(client, headers, project_id, count) -> tuple:
+    latencies, errors = [], 0
+    for _ in range(count):
+        before = time.perf_counter()
+        try:
+            response = await client.get(f"/api/issues/project/{project_id}", headers=headers)
+            response.raise_for_status()
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - before)
+    return latencies, errors
+
+def _routing_delta(before: dict, after: dict) -> str:
+    return " ".join(
+        f"{field[len('reads_'):]}={after[field] - before[field]}"
+        for field in ("reads_replica", "reads_sticky", "reads_fallback")
+    )
+
+async def main(args) -> int:
+    primary = use_temp_database()
+    replica = os.path.join(os.path.dirname(primary), "replica.db")
+    os.environ["READ_DATABASE_URL"] = f"sqlite+aiosqlite:///{replica}"
+    ok = True
+    async with app_client() as client:
+        from database import read_engine
+        from replica import REPLICA_HEALTH_INTERVAL, REPLICA_STICKY_SECONDS, replica_monitor
+
+        writer = await signup(client, "writer")
+        reader = await signup(client, "reader")
+        projects = {}
+        for name, headers in (("writer", writer), ("reader", reader)):
+            project_id = (await client.post("/api/projects/", json={"name": name}, headers=headers)).json()["id"]
+            await client.post("/api/issues/bulk", json=[
+                {"title": f"Issue {n}", "status": "To Do", "priority": "Low", "project_id": project_id}
+                for n in range(args.issues)
+            ], headers=headers)
+            projects[name] = project_id
+
+        replication = Replication(primary, replica, args.lag)
+        replication.copy()
+        replication.start()
+        await replica_monitor.check()
+        await asyncio.sleep(REPLICA_STICKY_SECONDS)
+
+        # Offload
+        before = replica_monitor.stats()
+        latencies, errors = await _load_boards(client, reader, projects["reader"], args.reads)
+        print(f"offload          {summarize(latencies)} errors={errors} "
+              f"{_routing_delta(before, replica_monitor.stats())}")
+        ok &= errors == 0
+
+        # Read-your-writes
+        before = replica_monitor.stats()
+        seen = lagging = 0
+        for n in range(args.writes):
+            created = await client.post("/api/issues/", json={
+                "title": f"Fresh {n}", "status": "To Do", "priority": "Low", "project_id": projects["writer"]
+            }, headers=writer)
+            issue_id = created.json()["id"]
+            board = (await client.get(f"/api/issues/project/{projects['writer']}", headers=writer)).json()
+            seen += any(issue["id"] == issue_id for issue in board)
+            lagging += not _on_replica(replica, issue_id)
+        print(f"read-your-writes writes={args.writes} seen={seen} not yet on replica={lagging} "
+              f"{_routing_delta(before, replica_monitor.stats())}")
+        ok &= seen == args.writes
+
+        # Fallback: the replica disappears, then comes back
+        replication.stopped.set()
+        replication.join()
+        for path in glob.glob(replica + "*"):
+            os.remove(path)
+        await read_engine.dispose()
+        before = replica_monitor.stats()
+        latencies, errors = await _load_boards(client, reader, projects["reader"], args.reads // 10)
+        print(f"replica down     {summarize(latencies)} errors={errors} "
+              f"{_routing_delta(before, replica_monitor.stats())}")
+        ok &= errors <= 1 and not replica_monitor.healthy
+
+        await read_engine.dispose()
+        replication = Replication(primary, replica, args.lag)
+        replication.copy()
+        replication.start()
+        await asyncio.sleep(REPLICA_HEALTH_INTERVAL * 2)
+        before = replica_monitor.stats()
+        latencies, errors = await _load_boards(client, reader, projects["reader"], args.reads // 10)
+        after = replica_monitor.stats()
+        print(f"replica restored {summarize(latencies)} errors={errors} {_routing_delta(before, after)}")
+        ok &= errors == 0 and after["reads_replica"] > before["reads_replica"]
+        replication.stopped.set()
+        replication.join()
+
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--issues", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--writes", type=int, default=50)
+    parser.add_argument("--lag", type=float, default=0.5)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,89 @@
+"""Full-text search latency on a synthetic issue corpus.
+
+Boots the app once to create the schema and search triggers, seeds
+``--issues`` issues (default 1,000,000) across ``--projects`` projects
+straight into SQLite (the triggers index them as they land), then times
+GET /api/issues/search for common, rare and prefix queries.
+
+    python -m benchmarks.search --issues 1000000
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import time
+
+from benchmarks._common import app_client, signup, summarize, use_temp_database
+
+WORDS = (
+    "login signup board drag drop column crash error timeout slow memory cache "
+    "database index query api token password email project issue status priority "
+    "assignee kanban sprint backlog release deploy build test flaky regression "
+    "mobile desktop layout button modal dialog render scroll keyboard shortcut"
+).split()
+
+def _text(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+def seed(path, issues, projects):
+    rng = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executemany(
+        "INSERT INTO project (id, name, owner_id) VALUES (?, ?, 1)",
+        [(pid, f"project {pid}") for pid in range(1, projects + 1)],
+    )
+    batch = []
+    for issue_id in range(1, issues + 1):
+        # A rare marker word lets us time highly selective queries too
+        title = _text(rng, 5) + (" zeppelin" if issue_id % 10000 == 0 else "")
+        batch.append((title, _text(rng, 20), "To Do", "Low", rng.randint(1, projects)))
+        if len(batch) == 50000:
+            conn.executemany(
+                "INSERT INTO issue (title, description, status, priority, project_id) VALUES (?, ?, ?, ?, ?)",
+                batch,
+            )
+            batch.clear()
+    if batch:
+        conn.executemany(
+            "INSERT INTO issue (title, description, status, priority, project_id) VALUES (?, ?, ?, ?, ?)",
+            batch,
+        )
+    conn.commit()
+    conn.close()
+
+async def main(args):
+    path = use_temp_database()
+    import database
+
+    async with app_client() as client:
+        headers = await signup(client, "search")
+    await database.engine.dispose()
+
+    started = time.perf_counter()
+    seed(path, args.issues, args.projects)
+    print(f"seeded {args.issues:,} issues in {time.perf_counter() - started:.1f}s")
+
+    async with app_client() as client:
+        for label, params in (
+            ("rare word", {"q": "zeppelin"}),
+            ("two words", {"q": "crash login"}),
+            ("prefix", {"q": "regress"}),
+            ("one project", {"q": "crash", "project_id": 1}),
+            ("common word", {"q": "crash"}),
+        ):
+            samples = []
+            for _ in range(args.repeat):
+                before = time.perf_counter()
+                response = await client.get("/api/issues/search", params=params, headers=headers)
+                samples.append(time.perf_counter() - before)
+                response.raise_for_status()
+            print(f"{label:<12} {summarize(samples)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--issues", type=int, default=1_000_000)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,71 @@
+"""Serialization cost per 10k board rows: Pydantic path vs fast path.
+
+"pydantic" mirrors the old handlers: one IssueRead per ORM row, then
+FastAPI validating and serializing the list again for ``response_model``.
+"fast" is what list endpoints do now: column tuples to dicts, encoded once.
+
+    python -m benchmarks.serialization --rows 10000
+"""
+import argparse
+import json
+import time
+from typing import List
+
+from benchmarks import _common  # noqa: F401  (sets up sys.path)
+from pydantic import TypeAdapter
+
+import responses
+from models.issue import Issue
+from schemas.issue import IssueRead
+from routers.issue import ISSUE_READ_KEYS
+
+def _make_rows(count):
+    return [
+        (i, f"Issue {i}", "A reasonably sized description " * 3, "To Do", "Medium", i % 50 or None, 1)
+        for i in range(1, count + 1)
+    ]
+
+def pydantic_path(rows):
+    adapter = TypeAdapter(List[IssueRead])
+    issues = [Issue(**dict(zip(ISSUE_READ_KEYS, row))) for row in rows]
+    reads = [IssueRead(
+        id=issue.id,
+        title=issue.title,
+        description=issue.description,
+        status=issue.status,
+        priority=issue.priority,
+        assignee_id=issue.assignee_id,
+        project_id=issue.project_id
+    ) for issue in issues]
+    validated = adapter.validate_python(reads)
+    return json.dumps(adapter.dump_python(validated, mode="json")).encode()
+
+def fast_path(rows):
+    return responses.dumps(responses.rows_to_dicts(ISSUE_READ_KEYS, rows))
+
+def stdlib_fast_path(rows):
+    return json.dumps(responses.rows_to_dicts(ISSUE_READ_KEYS, rows), separators=(",", ":")).encode()
+
+def _time(func, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(rows)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main(args):
+    rows = _make_rows(args.rows)
+    assert json.loads(pydantic_path(rows)) == json.loads(fast_path(rows))
+    baseline = _time(pydantic_path, rows, args.repeat)
+    print(f"{'pydantic':<16} {baseline * 1000:8.2f} ms per {args.rows:,} rows")
+    for name, func in (("fast (orjson)" if responses.orjson else "fast (json)", fast_path),
+                       ("fast (stdlib)", stdlib_fast_path)):
+        elapsed = _time(func, rows, args.repeat)
+        print(f"{name:<16} {elapsed * 1000:8.2f} ms per {args.rows:,} rows  ({baseline / elapsed:.1f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,222 @@
+"""Issue sharding over several SQLite files.
+
+Puts the main database and ``--shards - 1`` more SQLite files in SHARD_URLS
+(the main one first, as when sharding existing data), creates
+``--projects`` projects with ``--issues`` issues each through cross-shard
+bulk requests, and checks that:
+
+* every project's issues are on the shard the shard map names, and nowhere else
+* boards, single-issue reads and writes, bulk updates and history work
+* search across shards pages through every match exactly once
+* project summaries count each project's issues
+* a change feed client stays consistent across a ``rebalance_shards`` move
+* ``balance`` evens out a skewed placement
+
+Then ``--writers`` concurrent clients drag issues around on their own
+projects for ``--seconds`` and the write rate is reported. Run again with
+``--shards 1`` for the unsharded rate on the same machine.
+
+    python -m benchmarks.shards --shards 4 --projects 8 --issues 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import time
+
+from benchmarks._common import app_client, signup, summarize, use_temp_database
+
+STATUSES = ("To Do", "In Progress", "Done")
+
+def _configure(shards: int) -> list:
+    main = use_temp_database()
+    paths = [main] + [os.path.join(os.path.dirname(main), f"shard{n}.db") for n in range(1, shards)]
+    if shards > 1:
+        os.environ["SHARD_URLS"] = ",".join(f"sqlite+aiosqlite:///{path}" for path in paths)
+    return paths
+
+def _issue_projects(path: str) -> dict:
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute("SELECT project_id, COUNT(*) FROM issue GROUP BY project_id").fetchall())
+    finally:
+        conn.close()
+
+async def _catch_up(client, headers, project_id, cursor, replica) -> int:
+    while True:
+        changes = (await client.get(f"/api/issues/project/{project_id}/changes",
+                                    params={"since": cursor}, headers=headers)).json()
+        for deleted in changes["deleted"]:
+            replica.pop(deleted, None)
+        replica.update((issue["id"], issue) for issue in changes["issues"])
+        cursor = changes["cursor"]
+        if not changes["has_more"]:
+            return cursor
+
+def _check(failures: list, ok: bool, message: str) -> None:
+    print(f"{'ok  ' if ok else 'FAIL'} {message}")
+    if not ok:
+        failures.append(message)
+
+async def main(args) -> int:
+    paths = _configure(args.shards)
+    rng = random.Random(args.seed)
+    failures = []
+    async with app_client() as client:
+        import shards
+        from rebalance_shards import move_project, plan_balance, shard_sizes
+
+        headers = await signup(client, "sharded")
+        project_ids = []
+        for n in range(args.projects):
+            response = await client.post("/api/projects/", json={"name": f"project {n}"}, headers=headers)
+            project_ids.append(response.json()["id"])
+
+        # Bulk requests spanning every shard
+        issue_projects = {}
+        started = time.perf_counter()
+        for start in range(0, args.issues, 1000 // args.projects):
+            count = min(1000 // args.projects, args.issues - start)
+            items = [
+                {"title": f"{'alpha' if (start + n) % 10 == 0 else 'beta'} issue {start + n}",
+                 "status": STATUSES[0], "priority": "Low", "project_id": project_id}
+                for project_id in project_ids for n in range(count)
+            ]
+            for result in (await client.post("/api/issues/bulk", json=items, headers=headers)).json():
+                issue_projects[result["issue"]["id"]] = result["issue"]["project_id"]
+        elapsed = time.perf_counter() - started
+        print(f"created {len(issue_projects)} issues over {args.shards} shards in {elapsed:.1f}s")
+        _check(failures, len(issue_projects) == args.projects * args.issues, "issue ids are unique across shards")
+
+        placement = await shards.project_shards(project_ids)
+        on_disk = [_issue_projects(path) for path in paths]
+        _check(failures, all(
+            on_disk[placement[project_id]].get(project_id) == args.issues
+            and sum(shard.get(project_id, 0) for shard in on_disk) == args.issues
+            for project_id in project_ids
+        ), f"issues live on their project's shard only ({sorted(placement.values())})")
+
+        boards = {}
+        for project_id in project_ids:
+            board = (await client.get(f"/api/issues/project/{project_id}", headers=headers)).json()
+            boards[project_id] = board
+        _check(failures, all(len(board) == args.issues for board in boards.values()), "boards are complete")
+
+        # Single-issue routes, each on a different shard
+        singles_ok = True
+        for project_id in project_ids[:args.shards]:
+            issue_id = boards[project_id][0]["id"]
+            fetched = (await client.get(f"/api/issues/{issue_id}", headers=headers)).json()
+            moved = await client.patch(f"/api/issues/{issue_id}/status", json={"status": "Done"}, headers=headers)
+            history = (await client.get(f"/api/issues/{issue_id}/history", headers=headers)).json()
+            singles_ok &= fetched["project_id"] == project_id and moved.status_code == 200
+            singles_ok &= [event["action"] for event in history][-1:] == ["status_changed"]
+        _check(failures, singles_ok, "get, status change and history route by issue id")
+
+        targets = [boards[project_id][1]["id"] for project_id in project_ids]
+        moved = (await client.patch("/api/issues/bulk/status", headers=headers, json=[
+            {"id": issue_id, "status": "In Progress"} for issue_id in targets
+        ])).json()
+        _check(failures, all(result["ok"] for result in moved), "bulk status spans shards")
+
+        # Search fan-out, page by page
+        expected = sum(1 for issue in (issue for board in boards.values() for issue in board)
+                       if issue["title"].startswith("alpha"))
+        seen, cursor = [], None
+        while True:
+            params = {"q": "alpha", "limit": args.search_page}
+            if cursor:
+                params["after"] = cursor
+            response = await client.get("/api/issues/search", params=params, headers=headers)
+            seen += [issue["id"] for issue in response.json()]
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                break
+        _check(failures, len(seen) == len(set(seen)) == expected,
+               f"search pages through all {expected} matches once ({len(seen)} returned)")
+
+        summaries = (await client.get("/api/projects/", params={"include": "summary"}, headers=headers)).json()
+        _check(failures, sorted(project["summary"]["total"] for project in summaries) == [args.issues] * args.projects,
+               "project summaries count every shard")
+
+        if args.shards > 1:
+            # A change feed client across a move
+            mover = project_ids[0]
+            replica = {}
+            cursor = await _catch_up(client, headers, mover, 0, replica)
+            victim = boards[mover][2]["id"]
+            await client.delete(f"/api/issues/{victim}", headers=headers)
+            source = placement[mover]
+            target = (source + 1) % args.shards
+            started = time.perf_counter()
+            count = await move_project(mover, target)
+            elapsed = time.perf_counter() - started
+            # Other workers would wait out SHARD_MAP_CACHE_TTL
+            shards.forget_project(mover)
+            await client.patch(f"/api/issues/{boards[mover][3]['id']}/status", json={"status": "Done"}, headers=headers)
+            cursor = await _catch_up(client, headers, mover, cursor, replica)
+            board = {issue["id"]: issue for issue in (
+                await client.get(f"/api/issues/project/{mover}", headers=headers)
+            ).json()}
+            on_disk = [_issue_projects(path) for path in paths]
+            print(f"moved project {mover} ({count} issues) shard {source} -> {target} in {elapsed:.2f}s")
+            _check(failures, replica == board and victim not in board and len(board) == args.issues - 1,
+                   "change feed replica matches the board after the move")
+            _check(failures, on_disk[target].get(mover) == count and not on_disk[source].get(mover),
+                   "moved issues left the old shard")
+
+            # Skew: pile every project onto shard 0, then let balance spread them
+            for project_id in project_ids:
+                await move_project(project_id, 0)
+                shards.forget_project(project_id)
+            moves = plan_balance(await shard_sizes(), max_moves=args.projects)
+            for project_id, _, shard, _ in moves:
+                await move_project(project_id, shard)
+                shards.forget_project(project_id)
+            totals = [sum(projects.values()) for projects in (await shard_sizes()).values()]
+            _check(failures, max(totals) - min(totals) <= args.issues,
+                   f"balance spread the issues with {len(moves)} moves: {totals}")
+            after = (await client.get("/api/projects/", params={"include": "summary"}, headers=headers)).json()
+            _check(failures, sum(project["summary"]["total"] for project in after) == sum(totals),
+                   "summaries agree after rebalancing")
+
+        # Concurrent drags, one writer per project
+        boards = {project_id: (await client.get(f"/api/issues/project/{project_id}", headers=headers)).json()
+                  for project_id in project_ids}
+        latencies, errors = [], []
+
+        async def writer(project_id: int, deadline: float) -> None:
+            ids = [issue["id"] for issue in boards[project_id]]
+            while time.perf_counter() < deadline:
+                before = time.perf_counter()
+                try:
+                    response = await client.patch(f"/api/issues/{rng.choice(ids)}/status",
+                                                  json={"status": rng.choice(STATUSES)}, headers=headers)
+                    response.raise_for_status()
+                except Exception as exc:
+                    # A single SQLite file gives up after SQLITE_BUSY_TIMEOUT_MS
+                    errors.append(type(exc).__name__)
+                    continue
+                latencies.append(time.perf_counter() - before)
+
+        deadline = time.perf_counter() + args.seconds
+        await asyncio.gather(*(
+            writer(project_ids[n % len(project_ids)], deadline) for n in range(args.writers)
+        ))
+        print(f"writes {len(latencies) / args.seconds:8.0f}/s  {summarize(latencies)}  failed={len(errors)}")
+
+    print("OK" if not failures else f"FAILED: {len(failures)} checks")
+    return 0 if not failures else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--projects", type=int, default=8)
+    parser.add_argument("--issues", type=int, default=2000, help="per project")
+    parser.add_argument("--search-page", type=int, default=25)
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,74 @@
+"""Hold write endpoints and the project list to their SQL statement budget.
+
+Counts the statements each request sends to the database (with the
+principal cache warm) and exits non-zero when an endpoint exceeds its
+budget, so regressions back to select-then-mutate show up immediately.
+
+    python -m benchmarks.statement_budget
+"""
+import asyncio
+import sys
+
+from sqlalchemy import event
+
+from benchmarks._common import app_client, signup, use_temp_database
+
+# (method, path template, json body, expected status, max statements)
+BUDGETS = [
+    ("PUT", "/api/issues/{issue}", {"title": "t", "status": "Done", "priority": "High", "project_id": 0}, 200, 1),
+    ("PATCH", "/api/issues/{issue}/status", {"status": "In Progress"}, 200, 1),
+    ("PATCH", "/api/issues/{issue}/status", {}, 200, 1),
+    ("PUT", "/api/issues/{other_issue}", {"title": "t", "status": "Done", "priority": "High", "project_id": 0}, 404, 1),
+    ("DELETE", "/api/issues/{other_issue}", None, 404, 1),
+    ("DELETE", "/api/issues/{issue}", None, 200, 1),
+    ("PUT", "/api/projects/{project}", {"name": "renamed"}, 200, 1),
+    ("PUT", "/api/projects/{other_project}", {"name": "renamed"}, 404, 1),
+    ("GET", "/api/projects/?include=summary", None, 200, 1),
+    ("GET", "/api/projects/?include=summary&limit=1", None, 200, 1),
+    # Marks the project purging, deletes issues, their history and the project
+    ("DELETE", "/api/projects/{project}", None, 200, 4),
+]
+
+async def main() -> int:
+    use_temp_database()
+    import database
+    from history import history_writer
+
+    statements = []
+    event.listen(
+        database.engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, sql, params, context, executemany: statements.append(sql),
+    )
+
+    failures = 0
+    async with app_client() as client:
+        headers = await signup(client, "budget")
+        other_headers = await signup(client, "budget-other")
+        ids = {}
+        for key, owner in (("", headers), ("other_", other_headers)):
+            project = await client.post("/api/projects/", json={"name": "p"}, headers=owner)
+            ids[f"{key}project"] = project.json()["id"]
+            issue = await client.post("/api/issues/", json={
+                "title": "t", "status": "To Do", "priority": "Low", "project_id": ids[f"{key}project"]
+            }, headers=owner)
+            ids[f"{key}issue"] = issue.json()["id"]
+        # Warm the principal cache so only the handler's own statements count
+        await client.get("/api/auth/me", headers=headers)
+
+        for method, template, body, expected, budget in BUDGETS:
+            path = template.format(**ids)
+            # History of earlier requests is written behind them; don't
+            # count it against this one
+            await history_writer.sync()
+            statements.clear()
+            response = await client.request(method, path, json=body, headers=headers)
+            used = len(statements)
+            ok = response.status_code == expected and used <= budget
+            failures += not ok
+            print(f"{'ok ' if ok else 'FAIL'} {method:6} {template:32} status={response.status_code} "
+                  f"statements={used}/{budget}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
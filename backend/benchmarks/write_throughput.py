@@ -0,0 +1,79 @@
+"""Concurrent write throughput: default engine vs the configured profile.
+
+Each profile gets a fresh SQLite file. Writers insert-and-commit issues
+while readers scan the board, mirroring drag-and-drop traffic; the report
+shows committed writes per second and failed ("database is locked") ops.
+
+    python -m benchmarks.write_throughput --writers 8 --readers 4 --duration 5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks import _common  # noqa: F401  (sets up sys.path)
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+import database
+from models.issue import Issue
+from models.project import Project
+from models.user import User
+
+async def _writer(factory, stop_at, stats):
+    while time.perf_counter() < stop_at:
+        try:
+            async with factory() as session:
+                await session.execute(insert(Issue).values(
+                    title="bench", status="To Do", priority="Low", project_id=1
+                ))
+                await session.commit()
+            stats["writes"] += 1
+        except OperationalError:
+            stats["errors"] += 1
+
+async def _reader(factory, stop_at, stats):
+    while time.perf_counter() < stop_at:
+        try:
+            async with factory() as session:
+                result = await session.execute(
+                    select(Issue).where(Issue.project_id == 1).order_by(Issue.id.desc()).limit(200)
+                )
+                result.scalars().all()
+            stats["reads"] += 1
+        except OperationalError:
+            stats["errors"] += 1
+
+async def run_profile(name, tuned, args):
+    path = os.path.join(tempfile.mkdtemp(prefix="pm-bench-"), "bench.db")
+    engine = database.build_engine(f"sqlite+aiosqlite:///{path}", echo=False, tuned=tuned)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.execute(insert(User).values(id=1, username="u", email="u@x", hashed_password="x"))
+        await conn.execute(insert(Project).values(id=1, name="p", owner_id=1))
+
+    stats = {"writes": 0, "reads": 0, "errors": 0}
+    stop_at = time.perf_counter() + args.duration
+    await asyncio.gather(
+        *[_writer(factory, stop_at, stats) for _ in range(args.writers)],
+        *[_reader(factory, stop_at, stats) for _ in range(args.readers)],
+    )
+    await engine.dispose()
+    print(f"{name:<10} writes/s={stats['writes'] / args.duration:9.1f} "
+          f"reads/s={stats['reads'] / args.duration:9.1f} errors={stats['errors']}")
+
+async def main(args):
+    await run_profile("default", False, args)
+    await run_profile("tuned", True, args)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+"""Versioned cache of serialized Kanban boards.
+
+A board's version is its project's ``epoch`` and ``change_seq`` (see
+changes.py). The database advances the sequence on every issue write,
+whichever worker makes it, and the epoch is random per project, so a new
+project that SQLite gave a deleted one's id (its sequence starting over)
+still gets versions of its own. The board handler reads both in its
+ownership check, so a cached board is valid exactly as long as its version
+is current and a stale entry can never be served. Responses carry a strong
+ETag derived from the version; a client revalidating an unchanged board gets
+a 304 after that one indexed lookup.
+
+Writes also bump a per-process counter that is part of the cache key, which
+drops this worker's entries at once when a project is deleted.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional
+
+BOARD_CACHE_MAX_BYTES = int(os.getenv("BOARD_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+_versions = {}
+
+class BoardEntry(NamedTuple):
+    etag: str
+    body: bytes
+    owner_id: int
+    headers: dict
+
+def board_version(project_id: int) -> int:
+    return _versions.get(project_id, 0)
+
+def bump_board_version(*project_ids: int) -> None:
+    """Invalidate the cached boards of the given projects"""
+    for project_id in project_ids:
+        _versions[project_id] = _versions.get(project_id, 0) + 1
+
+def make_etag(project_id: int, epoch: str, change_seq: int, owner_id: int, params: Hashable) -> str:
+    # The same on every worker, so revalidations succeed wherever they land
+    digest = hashlib.blake2b(repr((project_id, owner_id, params)).encode(), digest_size=6).hexdigest()
+    return f'"{epoch}-{change_seq}-{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+class BoardCache:
+    """LRU cache of board bodies bounded by their total size in bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, BoardEntry]" = OrderedDict()
+
+    def get(self, project_id: int, epoch: str, change_seq: int, version: int, params: Hashable) -> Optional[BoardEntry]:
+        key = (project_id, epoch, change_seq, version, params)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, project_id: int, epoch: str, change_seq: int, version: int, params: Hashable,
+            entry: BoardEntry) -> None:
+        if len(entry.body) > self.max_bytes:
+            return
+        key = (project_id, epoch, change_seq, version, params)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size_bytes -= len(previous.body)
+        self._entries[key] = entry
+        self.size_bytes += len(entry.body)
+        while self.size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= len(evicted.body)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+board_cache = BoardCache(BOARD_CACHE_MAX_BYTES)
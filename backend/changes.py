@@ -0,0 +1,136 @@
+"""Per-project change sequence behind the delta-sync feed.
+
+Every project has a ``change_seq`` counter. Each issue write advances the
+counter of the issue's project and stamps the issue with the new value in
+``updated_seq``. Deleting an issue, or moving it to another project, records
+an ``issue_tombstone`` row carrying the next value of the project it left.
+The ``(project_id, updated_seq)`` and ``(project_id, seq)`` indexes turn "what
+changed since N" into two range scans.
+
+Triggers do the bookkeeping, so every write path is covered without an extra
+statement: single and bulk endpoints, imports, purges and rank rebalances.
+For the same reason they also refuse writes to a project's issues while the
+project is ``fenced`` for a move between shards (see rebalance_shards.py).
+Deletes from a project marked ``purging`` are not sequenced: the project and
+its tombstones are about to go, and the change feed already treats it as
+gone, so a purge doesn't write two extra rows per deleted issue.
+
+A trigger also gives every new project a random ``epoch``, which versions its
+sequence: unlike ids and sequence numbers it is never reused.
+On PostgreSQL, advancing the counter locks the project row until commit. That
+serializes writers within one project, so sequence numbers become visible in
+order and a reader never skips a number that commits later. SQLite has a
+single writer anyway.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database import engine
+from models.issue import Issue
+
+# Writes to any other column bump the sequence; the triggers' own update of
+# updated_seq must not
+TRACKED_COLUMNS = ", ".join(
+    column.name for column in Issue.__table__.columns if column.name not in ("id", "updated_seq")
+)
+
+SQLITE_CHANGES_DDL = [
+    "DROP TRIGGER IF EXISTS issue_changes_ai",
+    "DROP TRIGGER IF EXISTS issue_changes_au",
+    "DROP TRIGGER IF EXISTS issue_changes_ad",
+    "DROP TRIGGER IF EXISTS issue_tombstone_project_ad",
+    """CREATE TRIGGER issue_changes_ai AFTER INSERT ON issue BEGIN
+        SELECT RAISE(ABORT, 'project is fenced for a shard move') FROM project
+        WHERE id = new.project_id AND fenced;
+        UPDATE project SET change_seq = change_seq + 1 WHERE id = new.project_id;
+        UPDATE issue SET updated_seq = (SELECT change_seq FROM project WHERE id = new.project_id)
+        WHERE id = new.id;
+    END""",
+    f"""CREATE TRIGGER issue_changes_au AFTER UPDATE OF {TRACKED_COLUMNS} ON issue BEGIN
+        SELECT RAISE(ABORT, 'project is fenced for a shard move') FROM project
+        WHERE id IN (old.project_id, new.project_id) AND fenced;
+        UPDATE project SET change_seq = change_seq + 1
+        WHERE id = old.project_id AND old.project_id != new.project_id;
+        INSERT INTO issue_tombstone (issue_id, project_id, seq)
+        SELECT old.id, old.project_id, change_seq FROM project
+        WHERE id = old.project_id AND old.project_id != new.project_id;
+        UPDATE project SET change_seq = change_seq + 1 WHERE id = new.project_id;
+        UPDATE issue SET updated_seq = (SELECT change_seq FROM project WHERE id = new.project_id)
+        WHERE id = new.id;
+    END""",
+    """CREATE TRIGGER issue_changes_ad AFTER DELETE ON issue BEGIN
+        SELECT RAISE(ABORT, 'project is fenced for a shard move') FROM project
+        WHERE id = old.project_id AND fenced;
+        UPDATE project SET change_seq = change_seq + 1 WHERE id = old.project_id AND NOT purging;
+        INSERT INTO issue_tombstone (issue_id, project_id, seq)
+        SELECT old.id, old.project_id, change_seq FROM project WHERE id = old.project_id AND NOT purging;
+    END""",
+    # Foreign keys aren't enforced on our SQLite connections, so no cascade
+    """CREATE TRIGGER issue_tombstone_project_ad AFTER DELETE ON project BEGIN
+        DELETE FROM issue_tombstone WHERE project_id = old.id;
+    END""",
+    "DROP TRIGGER IF EXISTS project_epoch_ai",
+    """CREATE TRIGGER project_epoch_ai AFTER INSERT ON project WHEN new.epoch = '' BEGIN
+        UPDATE project SET epoch = lower(hex(randomblob(8))) WHERE id = new.id;
+    END""",
+    "UPDATE project SET epoch = lower(hex(randomblob(8))) WHERE epoch = ''",
+]
+
+POSTGRES_CHANGES_DDL = [
+    """CREATE OR REPLACE FUNCTION issue_track_change() RETURNS trigger AS $$
+    DECLARE
+        left_seq bigint;
+    BEGIN
+        IF EXISTS (SELECT 1 FROM project WHERE id IN (OLD.project_id, NEW.project_id) AND fenced) THEN
+            RAISE EXCEPTION 'project is fenced for a shard move';
+        END IF;
+        IF TG_OP = 'DELETE' OR OLD.project_id <> NEW.project_id THEN
+            -- No row when the project itself is being deleted or purged
+            UPDATE project SET change_seq = change_seq + 1
+            WHERE id = OLD.project_id AND NOT (TG_OP = 'DELETE' AND purging)
+            RETURNING change_seq INTO left_seq;
+            IF FOUND THEN
+                INSERT INTO issue_tombstone (issue_id, project_id, seq) VALUES (OLD.id, OLD.project_id, left_seq);
+            END IF;
+            IF TG_OP = 'DELETE' THEN
+                RETURN OLD;
+            END IF;
+        END IF;
+        UPDATE project SET change_seq = change_seq + 1 WHERE id = NEW.project_id
+        RETURNING change_seq INTO NEW.updated_seq;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS issue_changes ON issue",
+    f"""CREATE TRIGGER issue_changes BEFORE INSERT OR UPDATE OF {TRACKED_COLUMNS} OR DELETE ON issue
+        FOR EACH ROW EXECUTE FUNCTION issue_track_change()""",
+    """CREATE OR REPLACE FUNCTION project_set_epoch() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.epoch = '' THEN
+            NEW.epoch := substr(md5(random()::text || clock_timestamp()::text), 1, 16);
+        END IF;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS project_epoch ON project",
+    """CREATE TRIGGER project_epoch BEFORE INSERT ON project
+        FOR EACH ROW EXECUTE FUNCTION project_set_epoch()""",
+    "UPDATE project SET epoch = substr(md5(random()::text || id::text), 1, 16) WHERE epoch = ''",
+]
+
+# Issues written before change tracking existed: any distinct value will do,
+# then each project's counter continues from its highest one
+BACKFILL_SQL = [
+    "UPDATE issue SET updated_seq = id WHERE updated_seq IS NULL",
+    """UPDATE project SET change_seq = (SELECT MAX(updated_seq) FROM issue WHERE issue.project_id = project.id)
+    WHERE change_seq < (SELECT MAX(updated_seq) FROM issue WHERE issue.project_id = project.id)""",
+]
+
+async def install_change_tracking(target: AsyncEngine = engine) -> None:
+    """(Re)create the change triggers and sequence issues that have none"""
+    async with target.begin() as conn:
+        postgres = conn.dialect.name == "postgresql"
+        for statement in POSTGRES_CHANGES_DDL if postgres else SQLITE_CHANGES_DDL:
+            await conn.exec_driver_sql(statement)
+        for statement in BACKFILL_SQL:
+            await conn.execute(text(statement))
@@ -1,24 +1,130 @@
+import asyncio
 import os
 from sqlmodel import SQLModel, create_engine, Session
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import event, inspect
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from typing import AsyncGenerator
 
+def _env_flag(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
 # Database URL from environment variable
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./project_management.db")
+# Optional read replica for GET handlers (see replica.py); unset reads the primary
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", "").strip()
+
+# Engine profile. SQL echo is for local debugging only; it logs every statement.
+DB_ECHO = _env_flag("DB_ECHO", False)
+
+# Connection pool (server databases such as PostgreSQL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_PRE_PING = _env_flag("DB_POOL_PRE_PING", True)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# Connections opened at startup so the first requests don't pay for connecting
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", 2))
+
+# SQLite pragmas applied to every new connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+# Negative values are KiB, as with PRAGMA cache_size itself
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -64 * 1024))
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    cursor.close()
+
+def build_engine(url: str, echo: bool = DB_ECHO, tuned: bool = True) -> AsyncEngine:
+    """Create an async engine using the configured profile.
+
+    ``tuned=False`` gives SQLAlchemy's defaults (no pool settings or pragmas),
+    which the benchmarks use as a baseline.
+    """
+    is_sqlite = make_url(url).get_backend_name() == "sqlite"
+    options = {"echo": echo}
+    if tuned and not is_sqlite:
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    async_engine = create_async_engine(url, **options)
+    if tuned and is_sqlite:
+        event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return async_engine
 
 # Create async engine
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = build_engine(DATABASE_URL)
 
 # Create async session factory
 async_session_factory = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
-async def create_db_and_tables():
+def _set_sqlite_query_only(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+def build_read_engine(url: str) -> AsyncEngine:
+    """Engine for a read replica. SQLite connections are made read-only, so a
+    second file or the primary's own file can stand in for a replica locally."""
+    read_engine = build_engine(url)
+    if make_url(url).get_backend_name() == "sqlite":
+        event.listen(read_engine.sync_engine, "connect", _set_sqlite_query_only)
+    return read_engine
+
+read_engine = build_read_engine(READ_DATABASE_URL) if READ_DATABASE_URL else None
+
+read_session_factory = sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False
+) if read_engine is not None else None
+
+def _create_missing_indexes(connection):
+    """Create indexes added to models after their table already existed"""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+def _add_missing_columns(connection):
+    """Add nullable columns added to models after their table already existed"""
+    inspector = inspect(connection)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                raise RuntimeError(
+                    f"Cannot add NOT NULL column {table.name}.{column.name} without a server default"
+                )
+            table_name = connection.dialect.identifier_preparer.format_table(table)
+            ddl = CreateColumn(column).compile(dialect=connection.dialect)
+            connection.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {ddl}")
+
+async def create_db_and_tables(target: AsyncEngine = engine):
     """Create database tables"""
-    async with engine.begin() as conn:
+    async with target.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        await conn.run_sync(_create_missing_indexes)
+
+async def warm_pool(size: int = DB_POOL_WARM):
+    """Open ``size`` pooled connections up front"""
+    # Hold them all at once so the pool really grows to ``size``
+    connections = await asyncio.gather(*(engine.connect().start() for _ in range(size)))
+    await asyncio.gather(*(conn.close() for conn in connections))
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """Dependency to get database session"""
@@ -0,0 +1,95 @@
+"""User directory: prefix autocomplete over usernames and emails.
+
+A prefix becomes a half-open range ``[prefix, successor)`` on the unique
+``username`` or ``email`` index, so a lookup is one index range scan no matter
+how many accounts exist (``LIKE`` with a bound parameter can't use the
+index). Matching is case-sensitive, as the indexes are. Pages are keyset
+paginated on the searched column and only the public columns are selected.
+The cursor is the last value of a page, base64-encoded so that any
+username fits in a response header.
+
+The first page of short prefixes, which every picker asks for while the user
+types the first characters, is kept in a small per-process cache for
+DIRECTORY_CACHE_TTL seconds. Signups clear it, so a worker's own new users
+show up at once and other workers' within the TTL.
+"""
+import base64
+import binascii
+import os
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import LRUCache
+from models.user import User
+
+DIRECTORY_CACHE_SIZE = int(os.getenv("DIRECTORY_CACHE_SIZE", 2048))
+DIRECTORY_CACHE_TTL = float(os.getenv("DIRECTORY_CACHE_TTL", 30))
+# Longer prefixes are rarely repeated and already narrow the scan
+DIRECTORY_CACHE_MAX_PREFIX = int(os.getenv("DIRECTORY_CACHE_MAX_PREFIX", 3))
+
+DIRECTORY_KEYS = ("id", "username", "email")
+DIRECTORY_FIELDS = {"username": User.username, "email": User.email}
+
+_MAX_CODE_POINT = 0x10FFFF
+# Surrogates can't be encoded as UTF-8, so successors skip over them
+_SURROGATES = range(0xD800, 0xE000)
+
+directory_cache = LRUCache(DIRECTORY_CACHE_SIZE, ttl=DIRECTORY_CACHE_TTL)
+
+def prefix_successor(prefix: str) -> Optional[str]:
+    """Smallest string greater than every string starting with ``prefix``,
+    None if there is none (an empty prefix matches everything)"""
+    while prefix:
+        last = ord(prefix[-1])
+        if last < _MAX_CODE_POINT:
+            successor = last + 1
+            if successor in _SURROGATES:
+                successor = _SURROGATES.stop
+            return prefix[:-1] + chr(successor)
+        prefix = prefix[:-1]
+    return None
+
+def encode_directory_cursor(value: str) -> str:
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+def decode_directory_cursor(cursor: str) -> str:
+    """Raises ValueError for malformed cursors"""
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (UnicodeError, binascii.Error) as exc:
+        raise ValueError("invalid cursor") from exc
+
+def directory_statement(field: str, prefix: str, limit: int, after: Optional[str] = None):
+    column = DIRECTORY_FIELDS[field]
+    statement = select(User.id, User.username, User.email)
+    if prefix:
+        statement = statement.where(column >= prefix)
+        upper = prefix_successor(prefix)
+        if upper is not None:
+            statement = statement.where(column < upper)
+    if after is not None:
+        statement = statement.where(column > after)
+    return statement.order_by(column).limit(limit)
+
+async def search_directory(
+    session: AsyncSession, field: str, prefix: str, limit: int, after: Optional[str] = None
+) -> List[dict]:
+    """Up to ``limit`` users whose ``field`` starts with ``prefix``, ordered by
+    that field and starting past ``after``"""
+    cacheable = after is None and len(prefix) <= DIRECTORY_CACHE_MAX_PREFIX
+    key = (field, prefix, limit)
+    if cacheable:
+        users = directory_cache.get(key)
+        if users is not None:
+            return users
+
+    result = await session.execute(directory_statement(field, prefix, limit, after))
+    users = [dict(zip(DIRECTORY_KEYS, row)) for row in result.all()]
+    if cacheable:
+        directory_cache.set(key, users)
+    return users
+
+def clear_directory_cache() -> None:
+    directory_cache.clear()
@@ -0,0 +1,120 @@
+"""Publish/subscribe hub for live board updates.
+
+Issue writes publish a small JSON event on the project's channel and every
+connected board receives it. The broker is pluggable: ``LocalBroker`` fans
+out inside this process, and a multi-node deployment can install another
+``Broker`` (for example one relaying through Redis pub/sub) with
+``set_broker`` without touching the publishers or the WebSocket endpoint.
+
+Each subscriber has a bounded queue. A subscriber that falls that far behind
+is dropped instead of slowing down publishers or growing memory; its stream
+ends and the client is expected to reload the board and resubscribe.
+"""
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Set
+
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 256))
+
+class Subscription:
+    def __init__(self, channel: str, maxsize: int):
+        self.channel = channel
+        self.dropped = False
+        self._queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize)
+
+    def deliver(self, message: str) -> bool:
+        """Queue ``message``; returns False when the subscriber is too slow"""
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self) -> None:
+        # Make room for the end-of-stream marker even if the queue is full
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    async def get(self) -> Optional[str]:
+        """Next message, or None once the subscription has been closed"""
+        return await self._queue.get()
+
+class Broker(ABC):
+    """Interface every broker implements"""
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str) -> None:
+        ...
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> Subscription:
+        ...
+
+    @abstractmethod
+    def unsubscribe(self, subscription: Subscription) -> None:
+        ...
+
+    def stats(self) -> dict:
+        return {}
+
+class LocalBroker(Broker):
+    """In-process fan-out; publishing never blocks on subscribers"""
+
+    def __init__(self, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.published = 0
+        self.dropped = 0
+        self._channels: Dict[str, Set[Subscription]] = {}
+
+    async def publish(self, channel: str, message: str) -> None:
+        self.published += 1
+        subscribers = self._channels.get(channel)
+        if not subscribers:
+            return
+        slow = [sub for sub in subscribers if not sub.deliver(message)]
+        for sub in slow:
+            sub.dropped = True
+            self.unsubscribe(sub)
+            sub.close()
+            self.dropped += 1
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(channel, self.queue_size)
+        self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._channels.get(subscription.channel)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._channels[subscription.channel]
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "subscribers": sum(len(subs) for subs in self._channels.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+_broker: Broker = LocalBroker()
+
+def get_broker() -> Broker:
+    return _broker
+
+def set_broker(broker: Broker) -> None:
+    global _broker
+    _broker = broker
+
+def project_channel(project_id: int) -> str:
+    return f"project:{project_id}"
+
+async def publish_project_event(project_id: int, event_type: str, **fields) -> None:
+    """Encode an event once and publish it to everyone watching the project"""
+    message = json.dumps({"type": event_type, "project_id": project_id, **fields})
+    await _broker.publish(project_channel(project_id), message)
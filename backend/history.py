@@ -0,0 +1,173 @@
+"""Write-behind issue history.
+
+Issue writes queue an ``IssueEvent`` row in memory instead of inserting it in
+the request's transaction. A background task started from the app lifespan
+drains the queue and writes multi-row INSERTs of up to HISTORY_BATCH_SIZE
+rows, at least every HISTORY_FLUSH_INTERVAL seconds while events are
+pending. Shutdown drains whatever is still queued.
+
+The queue holds at most HISTORY_QUEUE_SIZE events. When it is full, writers
+wait up to HISTORY_PUT_TIMEOUT seconds for room (backpressure), then drop
+the event and count it rather than stall the request indefinitely. Events
+live in process memory until flushed, so a crash loses at most one
+flush interval's worth.
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from database import engine
+from models.issue_event import IssueEvent
+
+ISSUE_HISTORY_ENABLED = os.getenv("ISSUE_HISTORY_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", 500))
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", 0.5))
+HISTORY_QUEUE_SIZE = int(os.getenv("HISTORY_QUEUE_SIZE", 10000))
+HISTORY_PUT_TIMEOUT = float(os.getenv("HISTORY_PUT_TIMEOUT", 1.0))
+
+log = logging.getLogger("history")
+
+def issue_event(issue_id: int, project_id: int, actor_id: int, action: str, changes: Optional[dict] = None) -> dict:
+    """An IssueEvent row, stamped now"""
+    return {
+        "issue_id": issue_id,
+        "project_id": project_id,
+        "actor_id": actor_id,
+        "action": action,
+        "changes": json.dumps(changes, default=str) if changes is not None else None,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+class HistoryWriter:
+    def __init__(
+        self,
+        enabled: bool = ISSUE_HISTORY_ENABLED,
+        batch_size: int = HISTORY_BATCH_SIZE,
+        flush_interval: float = HISTORY_FLUSH_INTERVAL,
+        queue_size: int = HISTORY_QUEUE_SIZE,
+        put_timeout: float = HISTORY_PUT_TIMEOUT
+    ):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.put_timeout = put_timeout
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        self._queue = asyncio.Queue(self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Write everything still queued, then stop the background task"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def record(self, events: Iterable[dict]) -> None:
+        if self._task is None:
+            return
+        for event in events:
+            try:
+                self._queue.put_nowait(event)
+            except asyncio.QueueFull:
+                try:
+                    await asyncio.wait_for(self._queue.put(event), self.put_timeout)
+                except asyncio.TimeoutError:
+                    self.dropped += 1
+                    continue
+            self.queued += 1
+
+    async def sync(self) -> None:
+        """Wait until every event queued so far has been written (or dropped)"""
+        if self._task is None:
+            return
+        # Markers travel through the queue, so everything ahead of this one
+        # is written by the time it is reached
+        marker = asyncio.Event()
+        await self._queue.put(marker)
+        await marker.wait()
+
+    async def _next_batch(self) -> Tuple[List[dict], List[asyncio.Event], bool]:
+        """Collect events until the batch is full, the interval elapses, a
+        sync marker arrives or the writer is stopped"""
+        batch, markers = [], []
+        item = await self._queue.get()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while True:
+            if item is None:
+                return batch, markers, True
+            if isinstance(item, asyncio.Event):
+                markers.append(item)
+                return batch, markers, False
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, markers, False
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return batch, markers, False
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    return batch, markers, False
+
+    async def _write(self, batch: List[dict]) -> None:
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(insert(IssueEvent), batch)
+            self.written += len(batch)
+        except Exception:
+            self.failed += len(batch)
+            log.exception("failed to write %d issue history events", len(batch))
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, markers, stopping = await self._next_batch()
+            if batch:
+                await self._write(batch)
+            for marker in markers:
+                marker.set()
+        # Writers that raced with stop() may still have queued events
+        leftovers = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if isinstance(item, asyncio.Event):
+                item.set()
+            elif item is not None:
+                leftovers.append(item)
+        for start in range(0, len(leftovers), self.batch_size):
+            await self._write(leftovers[start:start + self.batch_size])
+
+    def stats(self) -> dict:
+        return {
+            "enabled": int(self.enabled),
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+history_writer = HistoryWriter()
+
+async def record_issue_events(events: Iterable[dict]) -> None:
+    await history_writer.record(events)
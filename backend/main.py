@@ -1,22 +1,39 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from sqlalchemy.orm import configure_mappers
 import sys
 import os
 
-# Add current directory to path for imports
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add current directory (and the repo root, for ``core``) to path for imports,
+# once, however often this module is imported
+for _path in (os.path.dirname(os.path.abspath(__file__)), os.path.dirname(os.path.dirname(os.path.abspath(__file__)))):
+    if _path not in sys.path:
+        sys.path.append(_path)
 
-from routers import user, project, issue
-from database import create_db_and_tables
+from routers import user, project, issue, events
+from database import engine, warm_pool
+from core.security import shutdown_password_hasher
+from migrate import prepare_database
+from metrics import MetricsMiddleware, instrument_engine, render_metrics
+from ratelimit import RateLimitMiddleware
+from history import history_writer
+from replica import ReadYourWritesMiddleware, replica_monitor
+from shards import shard_engines
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create database tables on startup
-    await create_db_and_tables()
+    # Migrate, or with several workers just check the schema (see migrate.py)
+    await prepare_database()
+    await warm_pool()
+    await history_writer.start()
+    await replica_monitor.start()
     yield
-    # Cleanup on shutdown (if needed)
+    # Cleanup on shutdown; queued history is written before exiting
+    await replica_monitor.stop()
+    await history_writer.stop()
+    shutdown_password_hasher()
 
 app = FastAPI(
     title="Project Management API",
@@ -25,6 +42,16 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+instrument_engine(engine)
+for shard_engine in shard_engines:
+    instrument_engine(shard_engine)
+
+# Innermost: rate-limited requests never reach a handler, so never write
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Inside CORS so 429 responses stay readable by the browser
+app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -32,12 +59,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Change-Seq"],
 )
+# Outermost, so latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(user.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(project.router, prefix="/api/projects", tags=["projects"])
 app.include_router(issue.router, prefix="/api/issues", tags=["issues"])
+app.include_router(events.router, prefix="/api/events", tags=["events"])
 
 @app.get("/")
 async def root():
@@ -47,6 +78,16 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+# Build the route table, OpenAPI schema and ORM mappers at import rather than
+# on the first request; a preloading server (gunicorn --preload) then does it
+# once, before forking workers
+app.openapi()
+configure_mappers()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
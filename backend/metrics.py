@@ -0,0 +1,261 @@
+"""Request and database instrumentation exposed in Prometheus text format.
+
+``MetricsMiddleware`` records per-route latency histograms and in-flight
+counts, keyed by the matched route template so cardinality stays bounded.
+Engine event hooks count statements and DB time, both globally and for the
+request that issued them (via a contextvar), which makes N+1 regressions
+visible as a shift in the statements-per-request histogram. Statements
+slower than SLOW_QUERY_MS are logged to the ``metrics.slow_query`` logger.
+
+Everything runs on the event loop thread with plain counters, so it is
+cheap enough to leave enabled.
+"""
+import bisect
+import contextvars
+import logging
+import os
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Statements at or above this many milliseconds are logged; 0 disables the log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+slow_query_log = logging.getLogger("metrics.slow_query")
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            yield bound, running
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+_current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "metrics_request", default=None
+)
+
+class Registry:
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.statements: Dict[Tuple[str, str], Histogram] = {}
+        self.db_time: Dict[Tuple[str, str], Histogram] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.db_statements_total = 0
+        self.db_seconds_total = 0.0
+        self.slow_queries_total = 0
+
+    def record_request(self, method: str, route: str, status_code: int,
+                       elapsed: float, stats: RequestStats) -> None:
+        key = (method, route)
+        status_class = f"{status_code // 100}xx"
+        self.requests[(method, route, status_class)] = self.requests.get((method, route, status_class), 0) + 1
+        if key not in self.latency:
+            self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.statements[key] = Histogram(STATEMENT_BUCKETS)
+            self.db_time[key] = Histogram(LATENCY_BUCKETS)
+        self.latency[key].observe(elapsed)
+        self.statements[key].observe(stats.statements)
+        self.db_time[key].observe(stats.db_seconds)
+
+    def reset(self) -> None:
+        self.__init__()
+
+registry = Registry()
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    regex = getattr(route, "path_regex", None)
+    if template is None or regex is None:
+        # Unmatched paths share one label so scanners can't inflate cardinality
+        return "unmatched"
+    # Depending on the FastAPI version the route's template may omit the
+    # include_router prefix; recover it from the part of the path it didn't match
+    path = scope["path"]
+    start = 0
+    while start != -1:
+        if regex.match(path[start:]):
+            return path[:start] + template
+        start = path.find("/", start + 1)
+    return template
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; avoids BaseHTTPMiddleware's per-request task overhead"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        registry.in_flight[method] = registry.in_flight.get(method, 0) + 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            registry.in_flight[method] -= 1
+            _current_request.reset(token)
+            registry.record_request(method, _route_label(scope), status_code, elapsed, stats)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+    registry.db_statements_total += 1
+    registry.db_seconds_total += elapsed
+    stats = _current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        registry.slow_queries_total += 1
+        slow_query_log.warning(
+            "slow query %.1fms%s: %s",
+            elapsed * 1000,
+            " (executemany)" if executemany else "",
+            " ".join(statement.split())[:1000]
+        )
+
+def _handle_error(context):
+    # Failed statements never reach after_cursor_execute
+    starts = context.connection.info.get("metrics_query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+def instrument_engine(async_engine: AsyncEngine) -> None:
+    sync_engine = async_engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+def _histogram_lines(name: str, help_text: str, histograms) -> list:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (method, route), histogram in sorted(histograms.items()):
+        for bound, count in histogram.cumulative():
+            lines.append(f"{name}_bucket{_labels(method=method, route=route, le=_format_bound(bound))} {count}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {histogram.total}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {histogram.count}")
+    return lines
+
+def _gauge_lines(name: str, help_text: str, kind: str, samples) -> list:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(**labels) if labels else ''} {value}")
+    return lines
+
+def render_metrics() -> str:
+    """All metrics in Prometheus text exposition format"""
+    from auth import principal_cache_stats
+    from board_cache import board_cache
+    from core.security import password_hasher_stats
+    from directory import directory_cache
+    from events import get_broker
+    from history import history_writer
+    from ratelimit import rate_limit_stats
+    from replica import replica_stats
+    from shards import SHARDED, shard_stats
+
+    lines = []
+    lines += _gauge_lines(
+        "http_requests_total", "HTTP requests by route and status class", "counter",
+        [({"method": m, "route": r, "status": s}, v) for (m, r, s), v in sorted(registry.requests.items())]
+    )
+    lines += _gauge_lines(
+        "http_requests_in_flight", "HTTP requests currently being handled", "gauge",
+        [({"method": m}, v) for m, v in sorted(registry.in_flight.items())]
+    )
+    lines += _histogram_lines("http_request_duration_seconds", "Request latency by route", registry.latency)
+    lines += _histogram_lines("http_request_db_statements", "SQL statements issued per request", registry.statements)
+    lines += _histogram_lines("http_request_db_seconds", "Time spent in SQL per request", registry.db_time)
+    lines += _gauge_lines("db_statements_total", "SQL statements executed", "counter",
+                          [({}, registry.db_statements_total)])
+    lines += _gauge_lines("db_seconds_total", "Time spent executing SQL", "counter",
+                          [({}, registry.db_seconds_total)])
+    lines += _gauge_lines("db_slow_queries_total", f"Statements slower than {SLOW_QUERY_MS:g}ms", "counter",
+                          [({}, registry.slow_queries_total)])
+
+    cache_samples = []
+    for cache_name, cache_stats in principal_cache_stats().items():
+        for field in ("size", "hits", "misses", "evictions"):
+            cache_samples.append(({"cache": f"auth_{cache_name}", "field": field}, cache_stats[field]))
+    for field, value in board_cache.stats().items():
+        cache_samples.append(({"cache": "board", "field": field}, value))
+    for field in ("size", "hits", "misses", "evictions"):
+        cache_samples.append(({"cache": "directory", "field": field}, directory_cache.stats()[field]))
+    lines += _gauge_lines("cache_stats", "In-process cache sizes and hit counters", "gauge", cache_samples)
+
+    hasher = password_hasher_stats()
+    lines += _gauge_lines("password_hasher_pending", "Password hashes queued or running", "gauge",
+                          [({"executor": hasher["executor"]}, hasher["pending"])])
+    lines += _gauge_lines("password_hasher_max_queue", "Queue limit before logins are shed", "gauge",
+                          [({}, hasher["max_queue"])])
+    lines += _gauge_lines("events_broker", "Live board event broker counters", "gauge",
+                          [({"field": field}, value) for field, value in get_broker().stats().items()])
+    lines += _gauge_lines("issue_history_writer", "Write-behind issue history queue counters", "gauge",
+                          [({"field": field}, value) for field, value in history_writer.stats().items()])
+    limiter = rate_limit_stats()
+    if limiter is not None:
+        lines += _gauge_lines("rate_limiter", "Rate limiter buckets and decisions", "gauge",
+                              [({"field": field}, value) for field, value in limiter.items()])
+    replica = replica_stats()
+    if replica is not None:
+        lines += _gauge_lines("read_replica", "Read replica health and read routing", "gauge",
+                              [({"field": field}, value) for field, value in replica.items()])
+    if SHARDED:
+        lines += _gauge_lines("issue_shards", "Issue shards and shard routing caches", "gauge",
+                              [({"field": field}, value) for field, value in shard_stats().items()])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,198 @@
+"""Schema setup that runs once per deploy instead of once per worker.
+
+``migrate()`` brings the database up to this code's schema: it creates
+missing tables, columns and indexes, installs the search index and change
+tracking triggers and rebuilds counters and backfills ranks. Every step is idempotent. The
+``schema_version`` table records a fingerprint of the schema they produce,
+so a database that already matches costs one SELECT. A lock serializes
+concurrent runs (an advisory lock on PostgreSQL, a lock file otherwise), so
+workers starting together do the DDL once and the rest find it done.
+
+With SHARD_URLS set (see shards.py) every shard is migrated the same way,
+then the main database, which also gets the issue id sequence. The shard
+list is part of the fingerprint, so changing it migrates again.
+
+DB_SCHEMA_MODE picks what the app lifespan does:
+
+* ``migrate`` (default): ``migrate()`` as above
+* ``verify``: only compare the fingerprint and refuse to start on a
+  mismatch, for workers of a deploy that migrates before forking::
+
+      python migrate.py && DB_SCHEMA_MODE=verify uvicorn main:app --workers 4
+
+* ``skip``: nothing
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from sqlalchemy import delete, insert, inspect, select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+from changes import install_change_tracking
+from database import create_db_and_tables, engine
+# Every table model, so the fingerprint is the same here and in the app
+from models import id_block, issue, issue_counter, issue_event, issue_tombstone, project, user  # noqa: F401
+from models.schema_version import SchemaVersion
+from ranking import ensure_ranks
+from search import install_search_index
+from shards import SHARD_URLS, SHARDED, ensure_id_blocks, shard_engines
+from stats import ISSUE_STATS_COUNTERS, ensure_counters
+
+DB_SCHEMA_MODE = os.getenv("DB_SCHEMA_MODE", "migrate").strip().lower()
+SCHEMA_MODES = ("migrate", "verify", "skip")
+
+# Bump when a migration step changes in a way the models don't show
+MIGRATION_REVISION = 3
+# pg_advisory_lock key shared by every process migrating this database
+MIGRATION_LOCK_KEY = 0x706D5F6D6967
+
+log = logging.getLogger("migrate")
+
+def schema_fingerprint() -> str:
+    """Identifies the schema ``migrate()`` produces for the current models and settings"""
+    # URLs only feed the digest, credentials included
+    parts = [f"counters={int(ISSUE_STATS_COUNTERS)}", f"shards={','.join(SHARD_URLS)}"]
+    for table in SQLModel.metadata.sorted_tables:
+        parts.append(f"table {table.name}")
+        for column in table.columns:
+            foreign_keys = ",".join(sorted(fk.target_fullname for fk in column.foreign_keys))
+            parts.append(f"{column.name} {column.type!r} null={column.nullable} pk={column.primary_key} fk={foreign_keys}")
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            parts.append(f"index {index.name} {[column.name for column in index.columns]} unique={index.unique}")
+    digest = hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+    return f"{MIGRATION_REVISION}-{digest}"
+
+def migration_targets() -> List[AsyncEngine]:
+    """Shards first: the main database is stamped last, once every shard is done"""
+    return [shard for shard in shard_engines if shard is not engine] + [engine]
+
+async def current_version(target: AsyncEngine = engine) -> Optional[str]:
+    """The fingerprint the database was last migrated to, None if never"""
+    async with target.connect() as conn:
+        try:
+            result = await conn.execute(select(SchemaVersion.version).where(SchemaVersion.id == 1))
+        except (OperationalError, ProgrammingError):
+            # No schema_version table yet
+            return None
+        return result.scalar_one_or_none()
+
+def _lock_file_path(target: AsyncEngine = engine) -> str:
+    url = target.url
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        return f"{url.database}.migrate.lock"
+    digest = hashlib.sha256(url.render_as_string(hide_password=True).encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"pm-migrate-{digest}.lock")
+
+@asynccontextmanager
+async def migration_lock(target: AsyncEngine = engine):
+    """Held by at most one process migrating this database at a time"""
+    if target.url.get_backend_name() == "postgresql":
+        async with target.connect() as conn:
+            await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            try:
+                yield
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        return
+    if fcntl is None:
+        yield
+        return
+    with open(_lock_file_path(target), "a") as lock_file:
+        # Blocks until the process holding it finishes; off the event loop
+        await asyncio.to_thread(fcntl.flock, lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def _drop_user_foreign_keys(connection) -> None:
+    """Users live in the main database only, so on a shard the user ids in
+    projects and issues reference nothing. SQLite doesn't enforce them here."""
+    if connection.dialect.name != "postgresql":
+        return
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    for table in SQLModel.metadata.sorted_tables:
+        for foreign_key in inspector.get_foreign_keys(table.name):
+            if foreign_key["referred_table"] == "user" and foreign_key.get("name"):
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"DROP CONSTRAINT {preparer.quote(foreign_key['name'])}"
+                )
+
+async def _migrate_database(target: AsyncEngine, fingerprint: str) -> bool:
+    if await current_version(target) == fingerprint:
+        return False
+    async with migration_lock(target):
+        # Another process may have finished while we waited for the lock
+        if await current_version(target) == fingerprint:
+            return False
+        await create_db_and_tables(target)
+        if target is not engine:
+            async with target.begin() as conn:
+                await conn.run_sync(_drop_user_foreign_keys)
+        await install_search_index(target)
+        await install_change_tracking(target)
+        await ensure_counters(target)
+        await ensure_ranks(target)
+        if target is engine and SHARDED:
+            await ensure_id_blocks()
+        async with target.begin() as conn:
+            await conn.execute(delete(SchemaVersion))
+            await conn.execute(insert(SchemaVersion).values(
+                id=1, version=fingerprint, migrated_at=datetime.now(timezone.utc)
+            ))
+    log.info("database %s schema migrated to %s", target.url.render_as_string(hide_password=True), fingerprint)
+    return True
+
+async def migrate() -> bool:
+    """Bring the schema up to date; returns False if it already was"""
+    fingerprint = schema_fingerprint()
+    migrated = False
+    for target in migration_targets():
+        migrated |= await _migrate_database(target, fingerprint)
+    return migrated
+
+async def verify_schema() -> None:
+    """Raise RuntimeError unless every database was migrated for this code"""
+    fingerprint = schema_fingerprint()
+    for target in migration_targets():
+        version = await current_version(target)
+        if version != fingerprint:
+            raise RuntimeError(
+                f"Database {target.url.render_as_string(hide_password=True)} schema is "
+                f"{version or 'not set up'}, this code expects {fingerprint}; run `python migrate.py` first"
+            )
+
+async def prepare_database(mode: str = DB_SCHEMA_MODE) -> None:
+    """Startup schema step for the app lifespan, as chosen by DB_SCHEMA_MODE"""
+    if mode not in SCHEMA_MODES:
+        raise RuntimeError(f"DB_SCHEMA_MODE must be one of {', '.join(SCHEMA_MODES)}, not {mode!r}")
+    if mode == "migrate":
+        await migrate()
+    elif mode == "verify":
+        await verify_schema()
+
+async def main() -> int:
+    migrated = await migrate()
+    print(f"{'migrated to' if migrated else 'already at'} schema {schema_fingerprint()}")
+    for target in migration_targets():
+        await target.dispose()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,8 @@
+from sqlmodel import SQLModel, Field
+
+class IdBlock(SQLModel, table=True):
+    """Next unallocated value of an id sequence shared by all shards, see shards.py"""
+    __tablename__ = "id_block"
+
+    name: str = Field(primary_key=True)
+    next_id: int
@@ -1,11 +1,38 @@
+from datetime import datetime, timezone
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from typing import Optional
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class Issue(SQLModel, table=True):
+    # Composite indexes back the keyset-paginated board listing: every page is
+    # an index range scan on (project_id[, filter column], id) no matter how
+    # deep the cursor is.
+    __table_args__ = (
+        Index("ix_issue_project_id_id", "project_id", "id"),
+        Index("ix_issue_project_status_id", "project_id", "status", "id"),
+        Index("ix_issue_project_priority_id", "project_id", "priority", "id"),
+        Index("ix_issue_project_assignee_id", "project_id", "assignee_id", "id"),
+        # Column order on the board, see ranking.py
+        Index("ix_issue_project_status_rank", "project_id", "status", "rank"),
+        # Last update per project for the project list summary
+        Index("ix_issue_project_updated_at", "project_id", "updated_at"),
+        # Change feed for delta sync, see changes.py
+        Index("ix_issue_project_updated_seq", "project_id", "updated_seq"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     description: Optional[str] = None
     status: str  # "To Do", "In Progress", "Done"
     priority: str  # "Low", "Medium", "High"
     assignee_id: Optional[int] = Field(default=None, foreign_key="user.id")
-    project_id: int = Field(foreign_key="project.id")
+    project_id: int = Field(foreign_key="project.id", ondelete="CASCADE")
+    rank: Optional[str] = None  # fractional position within its status column
+    # Set on insert and by every UPDATE that doesn't set it itself; NULL for
+    # issues written before the column existed
+    updated_at: Optional[datetime] = Field(default_factory=_utcnow, sa_column_kwargs={"onupdate": _utcnow})
+    # Project change_seq of the last write, set by database triggers
+    updated_seq: Optional[int] = None
@@ -0,0 +1,10 @@
+from sqlmodel import SQLModel, Field
+
+class IssueCounter(SQLModel, table=True):
+    """Incrementally maintained issue counts per project and column value"""
+    __tablename__ = "issue_counter"
+
+    project_id: int = Field(foreign_key="project.id", primary_key=True, ondelete="CASCADE")
+    dimension: str = Field(primary_key=True)  # "status", "priority", "assignee"
+    value: str = Field(primary_key=True)  # assignee ids as text, "" when unassigned
+    count: int = 0
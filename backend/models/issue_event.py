@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
+from typing import Optional
+
+class IssueEvent(SQLModel, table=True):
+    """Append-only audit trail of issue changes, written in batches by history.py"""
+    __tablename__ = "issue_event"
+    # History pages are a range scan on (issue_id, id); project purges
+    # delete by (project_id, id)
+    __table_args__ = (
+        Index("ix_issue_event_issue_id_id", "issue_id", "id"),
+        Index("ix_issue_event_project_id_id", "project_id", "id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # No foreign keys to issue/project: history outlives deleted issues, and
+    # is deleted with its project by purge.py
+    issue_id: int
+    project_id: int
+    actor_id: int = Field(foreign_key="user.id")
+    action: str  # "created", "updated", "status_changed", "deleted"
+    changes: Optional[str] = None  # JSON object of the values written
+    created_at: datetime
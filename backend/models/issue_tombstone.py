@@ -0,0 +1,16 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
+from typing import Optional
+
+class IssueTombstone(SQLModel, table=True):
+    """Marks an issue deleted from (or moved out of) a project, see changes.py"""
+    __tablename__ = "issue_tombstone"
+    # Change feeds are a range scan on (project_id, seq)
+    __table_args__ = (
+        Index("ix_issue_tombstone_project_seq", "project_id", "seq"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    issue_id: int  # no foreign key: the issue is gone
+    project_id: int = Field(foreign_key="project.id", ondelete="CASCADE")
+    seq: int  # the project's change_seq when the issue left it
@@ -1,8 +1,30 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, false
 from typing import Optional
 
 class Project(SQLModel, table=True):
+    # The project list is a keyset page over one owner's projects
+    __table_args__ = (
+        Index("ix_project_owner_id_id", "owner_id", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     description: Optional[str] = None
     owner_id: int = Field(foreign_key="user.id")
+    # Last sequence number handed to a change of one of its issues; advanced
+    # by database triggers, see changes.py
+    change_seq: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # Random per project, filled in by a trigger on insert (see changes.py).
+    # SQLite may give a new project a deleted one's id, and change_seq starts
+    # over; the epoch tells the two apart in cache keys and ETags.
+    epoch: str = Field(default="", sa_column_kwargs={"server_default": ""})
+    # Index into SHARD_URLS of the database holding the project's issues;
+    # kept in the main database only, see shards.py
+    shard: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # The change triggers refuse issue writes for a fenced project: set in the
+    # database a project is moving out of (rebalance_shards.py)
+    fenced: bool = Field(default=False, sa_column_kwargs={"server_default": false()})
+    # Set while purge.py deletes the project: the change triggers then skip
+    # sequencing and tombstones for its issues
+    purging: bool = Field(default=False, sa_column_kwargs={"server_default": false()})
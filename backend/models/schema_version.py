@@ -0,0 +1,10 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+
+class SchemaVersion(SQLModel, table=True):
+    """Single row recording the schema fingerprint the database was migrated to"""
+    __tablename__ = "schema_version"
+
+    id: int = Field(default=1, primary_key=True)
+    version: str
+    migrated_at: datetime
@@ -0,0 +1,265 @@
+"""Bulk user provisioning from CSV or NDJSON.
+
+Creates accounts far faster than one signup request per user. Each batch of
+rows is checked for existing usernames and emails with one set-based query.
+Passwords are hashed in parallel on a process pool (all cores by default).
+The new users go in with one multi-row INSERT per batch, and every batch
+commits on its own.
+
+Rows carry ``username``, ``email`` and either ``password`` (hashed here) or
+``password_hash`` (an existing bcrypt hash, e.g. from another system, stored
+as is). A row fails, without stopping the run, when:
+
+* it is invalid
+* it repeats a username or email from an earlier row
+* the username or email is already taken
+
+One report line per row goes to ``--report`` (stdout by default) as NDJSON;
+a summary goes to stderr. Exits 1 if any row failed::
+
+    python provision_users.py users.csv --report report.ndjson
+    python provision_users.py - --format ndjson < users.ndjson
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+for _path in (os.path.dirname(os.path.abspath(__file__)), os.path.dirname(os.path.dirname(os.path.abspath(__file__)))):
+    if _path not in sys.path:
+        sys.path.append(_path)
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from core.security import get_password_hash, pwd_context
+from database import async_session_factory, engine
+from models.user import User
+from schemas.user import UserCreate
+
+FORMATS = ("csv", "ndjson")
+
+class Row:
+    __slots__ = ("number", "username", "email", "password", "password_hash", "error", "id")
+
+    def __init__(self, number: int, username: str = "", email: str = "",
+                 password: str = "", password_hash: str = "", error: Optional[str] = None):
+        self.number = number
+        self.username = username
+        self.email = email
+        self.password = password
+        self.password_hash = password_hash
+        self.error = error
+        self.id = None
+
+    def report(self) -> dict:
+        if self.error is not None:
+            return {"row": self.number, "username": self.username, "status": "failed", "error": self.error}
+        return {"row": self.number, "username": self.username, "status": "created", "id": self.id}
+
+def _from_record(number: int, record) -> Row:
+    if not isinstance(record, dict):
+        return Row(number, error="not an object")
+    fields = {key: str(record.get(key) or "").strip()
+              for key in ("username", "email", "password", "password_hash")}
+    # Passwords are taken verbatim, surrounding spaces included
+    fields["password"] = str(record.get("password") or "")
+    row = Row(number, **fields)
+    if not row.username:
+        row.error = "username is required"
+    elif bool(row.password) == bool(row.password_hash):
+        row.error = "exactly one of password and password_hash is required"
+    elif row.password_hash and pwd_context.identify(row.password_hash) is None:
+        row.error = "password_hash is not a bcrypt hash"
+    else:
+        try:
+            UserCreate(username=row.username, email=row.email, password=row.password)
+        except ValidationError as exc:
+            row.error = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors())
+    return row
+
+def read_rows(stream, fmt: str) -> Iterator[Row]:
+    """Rows numbered by their line in the input (the CSV header is line 1)"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield _from_record(reader.line_num, record)
+        return
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield Row(number, error=f"invalid JSON: {exc}")
+            continue
+        yield _from_record(number, record)
+
+def _batches(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class Provisioner:
+    def __init__(self, workers: int, dry_run: bool = False):
+        self.pool = ProcessPoolExecutor(max_workers=workers) if not dry_run else None
+        self.dry_run = dry_run
+        self.seen_usernames = set()
+        self.seen_emails = set()
+        self.hash_seconds = 0.0
+        self.insert_seconds = 0.0
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def _deduplicate(self, rows: List[Row]) -> None:
+        for row in rows:
+            if row.error is not None:
+                continue
+            if row.username in self.seen_usernames:
+                row.error = "duplicate username in input"
+            elif row.email in self.seen_emails:
+                row.error = "duplicate email in input"
+            self.seen_usernames.add(row.username)
+            self.seen_emails.add(row.email)
+
+    async def _mark_taken(self, session, rows: List[Row]) -> int:
+        """Fail rows whose username or email already exists; one query"""
+        pending = [row for row in rows if row.error is None]
+        if not pending:
+            return 0
+        result = await session.execute(select(User.username, User.email).where(or_(
+            User.username.in_([row.username for row in pending]),
+            User.email.in_([row.email for row in pending]),
+        )))
+        taken_usernames, taken_emails = set(), set()
+        for username, email in result.all():
+            taken_usernames.add(username)
+            taken_emails.add(email)
+        marked = 0
+        for row in pending:
+            if row.username in taken_usernames:
+                row.error = "username already registered"
+            elif row.email in taken_emails:
+                row.error = "email already registered"
+            else:
+                continue
+            marked += 1
+        return marked
+
+    async def _hash(self, rows: List[Row]) -> None:
+        plain = [row for row in rows if row.error is None and row.password]
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        hashes = await asyncio.gather(*(
+            loop.run_in_executor(self.pool, get_password_hash, row.password) for row in plain
+        ))
+        for row, password_hash in zip(plain, hashes):
+            row.password_hash = password_hash
+            row.password = ""
+        self.hash_seconds += time.perf_counter() - started
+
+    async def _insert(self, session, rows: List[Row]) -> None:
+        started = time.perf_counter()
+        while True:
+            pending = [row for row in rows if row.error is None]
+            if not pending:
+                break
+            try:
+                result = await session.execute(
+                    insert(User).returning(User.id, User.username),
+                    [{"username": row.username, "email": row.email, "hashed_password": row.password_hash}
+                     for row in pending]
+                )
+                ids = {username: user_id for user_id, username in result.all()}
+                await session.commit()
+            except IntegrityError:
+                # Someone signed up with one of these since the check
+                await session.rollback()
+                if not await self._mark_taken(session, pending):
+                    raise
+                continue
+            for row in pending:
+                row.id = ids[row.username]
+            break
+        self.insert_seconds += time.perf_counter() - started
+
+    async def run(self, rows: List[Row]) -> None:
+        self._deduplicate(rows)
+        async with async_session_factory() as session:
+            await self._mark_taken(session, rows)
+            if self.dry_run:
+                return
+            await self._hash(rows)
+            await self._insert(session, rows)
+
+async def provision(stream, fmt: str, report, workers: int, batch_size: int, dry_run: bool = False) -> Tuple[int, int]:
+    """Provision every row of ``stream``; returns (created, failed)"""
+    provisioner = Provisioner(workers, dry_run)
+    created = failed = 0
+    started = time.perf_counter()
+    try:
+        for batch in _batches(read_rows(stream, fmt), batch_size):
+            await provisioner.run(batch)
+            for row in batch:
+                report.write(json.dumps(row.report()) + "\n")
+                if row.error is None:
+                    created += 1
+                else:
+                    failed += 1
+            report.flush()
+    finally:
+        provisioner.close()
+    print(
+        f"{'would create' if dry_run else 'created'} {created}, failed {failed} "
+        f"in {time.perf_counter() - started:.1f}s "
+        f"(hashing {provisioner.hash_seconds:.1f}s, inserting {provisioner.insert_seconds:.1f}s)",
+        file=sys.stderr,
+    )
+    return created, failed
+
+def _format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".ndjson", ".jsonl"):
+        return "ndjson"
+    raise SystemExit("cannot tell the input format from the file name; pass --format")
+
+async def main(args) -> int:
+    fmt = _format(args.input, args.format)
+    stream = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    report = sys.stdout if args.report == "-" else open(args.report, "w", encoding="utf-8")
+    try:
+        _, failed = await provision(stream, fmt, report, args.workers, args.batch_size, args.dry_run)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if report is not sys.stdout:
+            report.close()
+        await engine.dispose()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV or NDJSON file, - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--report", default="-", help="per-row NDJSON report file (default stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="password hashing processes")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per conflict check and INSERT")
+    parser.add_argument("--dry-run", action="store_true", help="validate and check conflicts only")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,189 @@
+"""Set-based project deletion.
+
+A project's issues are deleted with ``DELETE ... WHERE id IN (SELECT ...
+LIMIT n)`` in chunks of PROJECT_PURGE_CHUNK_SIZE rows, together with a chunk
+of their history, committing after each chunk so SQLite's write lock (and
+the FTS delete triggers) are only held for one bounded transaction at a
+time. The project is marked ``purging`` first, so the change triggers don't
+write a tombstone and a sequence number per deleted issue. History has to
+go too: SQLite reuses the ids of deleted rows, and a later project or issue
+with the same id must not inherit it. The final chunk, the counters and the
+project row are deleted in one transaction, so issues created while the
+purge was running are swept up with the project. With sharding that
+transaction runs on the project's shard and removes the shard's copy of the
+project row; the row in the main database goes right after.
+
+Purges can also run in the background; progress is kept in an in-process
+registry of ``PurgeJob`` objects. Running jobs stay registered until they
+finish, so a second request can't start a duplicate purge; finished ones
+stay readable until PURGE_JOB_TTL expires.
+"""
+import asyncio
+import os
+import time
+from typing import Dict, Optional, Set
+
+from sqlalchemy import delete, func, select, update
+
+from board_cache import bump_board_version
+from cache import LRUCache
+from database import async_session_factory
+from events import publish_project_event
+from history import history_writer
+from models.issue import Issue
+from models.issue_event import IssueEvent
+from models.project import Project
+from shards import forget_project, is_main, project_session, project_shards, shard_session
+from stats import delete_project_counters
+
+PROJECT_PURGE_CHUNK_SIZE = int(os.getenv("PROJECT_PURGE_CHUNK_SIZE", 5000))
+# How long finished background jobs stay readable, in seconds
+PURGE_JOB_TTL = float(os.getenv("PURGE_JOB_TTL", 3600))
+
+class PurgeJob:
+    def __init__(self, project_id: int, owner_id: int, total: int = 0):
+        self.project_id = project_id
+        self.owner_id = owner_id
+        self.status = "pending"  # "running", "done", "failed"
+        self.total = total
+        self.deleted = 0
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("pending", "running")
+
+    def as_dict(self) -> dict:
+        return {
+            "project_id": self.project_id,
+            "status": self.status,
+            "total": self.total,
+            "deleted": self.deleted,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+# Running jobs never expire; only finished ones age out
+_running_jobs: Dict[int, PurgeJob] = {}
+_finished_jobs = LRUCache(maxsize=10000, ttl=PURGE_JOB_TTL)
+# Strong references so running purges aren't garbage collected
+_tasks: Set[asyncio.Task] = set()
+
+def get_purge_job(project_id: int) -> Optional[PurgeJob]:
+    job = _running_jobs.get(project_id)
+    return job if job is not None else _finished_jobs.get(project_id)
+
+async def purge_project(project_id: int, owner_id: int, job: Optional[PurgeJob] = None) -> Optional[int]:
+    """Delete the project and all of its issues.
+
+    Returns the number of issues deleted, or None when the user owns no such
+    project (nothing is deleted then).
+    """
+    owned = select(Project.id).where(Project.id == project_id, Project.owner_id == owner_id)
+    chunk = (
+        select(Issue.id)
+        .where(Issue.project_id == project_id, Issue.project_id.in_(owned))
+        .limit(PROJECT_PURGE_CHUNK_SIZE)
+    )
+    history_chunk = (
+        select(IssueEvent.id)
+        .where(IssueEvent.project_id == project_id, IssueEvent.project_id.in_(owned))
+        .limit(PROJECT_PURGE_CHUNK_SIZE)
+    )
+    deleted = 0
+    shard = (await project_shards([project_id])).get(project_id, 0)
+    # Events still queued for writing would outlive the purge
+    await history_writer.sync()
+    async with shard_session(shard) as session, async_session_factory() as main_session:
+        # History lives in the main database
+        history_session = session if is_main(shard) else main_session
+        # Deletes from here on skip change tracking (see changes.py)
+        result = await session.execute(
+            update(Project)
+            .where(Project.id == project_id, Project.owner_id == owner_id)
+            .values(purging=True)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            await session.rollback()
+            return None
+        while True:
+            result = await session.execute(
+                delete(Issue).where(Issue.id.in_(chunk)).execution_options(synchronize_session=False)
+            )
+            history = await history_session.execute(
+                delete(IssueEvent).where(IssueEvent.id.in_(history_chunk))
+                .execution_options(synchronize_session=False)
+            )
+            deleted += result.rowcount
+            if job is not None:
+                job.deleted = deleted
+            if max(result.rowcount, history.rowcount) < PROJECT_PURGE_CHUNK_SIZE:
+                break
+            await session.commit()
+            await history_session.commit()
+            # Let other requests get the write lock between chunks
+            await asyncio.sleep(0)
+
+        # Last chunk, counters and project commit together
+        result = await session.execute(
+            delete(Project)
+            .where(Project.id == project_id, Project.owner_id == owner_id)
+            .returning(Project.id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.first() is None:
+            await session.rollback()
+            await history_session.rollback()
+            return None
+        await delete_project_counters(session, project_id)
+        await session.commit()
+        await history_session.commit()
+
+    if not is_main(shard):
+        async with async_session_factory() as session:
+            await session.execute(
+                delete(Project).where(Project.id == project_id).execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        forget_project(project_id)
+
+    bump_board_version(project_id)
+    await publish_project_event(project_id, "project.deleted", deleted_issues=deleted)
+    return deleted
+
+async def _run_job(job: PurgeJob) -> None:
+    job.status = "running"
+    try:
+        await purge_project(job.project_id, job.owner_id, job)
+    except Exception as exc:
+        # Committed chunks stay deleted; deleting again resumes the purge
+        job.status = "failed"
+        job.error = str(exc) or exc.__class__.__name__
+    else:
+        job.status = "done"
+    finally:
+        job.finished_at = time.time()
+        # Keep the result readable for the full TTL after it finishes
+        _running_jobs.pop(job.project_id, None)
+        _finished_jobs.set(job.project_id, job)
+
+async def start_purge(project_id: int, owner_id: int) -> PurgeJob:
+    """Start a background purge, or return the one already running"""
+    job = _running_jobs.get(project_id)
+    if job is not None:
+        return job
+    async with project_session(project_id) as session:
+        result = await session.execute(
+            select(func.count()).select_from(Issue).where(Issue.project_id == project_id)
+        )
+        total = result.scalar_one()
+    job = PurgeJob(project_id, owner_id, total)
+    _running_jobs[project_id] = job
+    task = asyncio.create_task(_run_job(job))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
@@ -0,0 +1,269 @@
+"""Fractional ranks for user-defined ordering within board columns.
+
+A rank is a string of base-36 digits read as a fraction (``"i"`` is 0.5), so
+a key strictly between any two others always exists and moving an issue
+rewrites only that issue's row. Lowercase letters and digits sort the same
+under byte-wise and locale collations. Keys never end in ``"0"``, which
+keeps room below every key.
+
+Repeatedly inserting at the same spot makes keys grow by about one digit per
+five moves. A column whose keys pass RANK_MAX_LENGTH is rebalanced in the
+background: its issues get evenly spaced keys of minimal length.
+"""
+import asyncio
+import bisect
+import os
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import String, bindparam, case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import aliased
+
+from database import async_session_factory, engine
+from models.issue import Issue
+from shards import project_session
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+_INDEX = {digit: value for value, digit in enumerate(DIGITS)}
+
+# Keys longer than this trigger a rebalance of their column
+RANK_MAX_LENGTH = int(os.getenv("RANK_MAX_LENGTH", 24))
+# Appending steps the key by one unit in this digit, leaving room for
+# BASE ** APPEND_DIGITS appends to a column before keys grow by as many digits
+APPEND_DIGITS = 3
+
+def _midpoint(a: str, b: Optional[str]) -> str:
+    # a < b as fractions, neither ending in "0"; b=None means 1.0
+    prefix = []
+    while True:
+        if b is not None:
+            n = 0
+            while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+                n += 1
+            if n:
+                prefix.append(b[:n])
+                a, b = a[n:], b[n:]
+                continue
+        digit_a = _INDEX[a[0]] if a else 0
+        digit_b = _INDEX[b[0]] if b is not None else BASE
+        if digit_b - digit_a > 1:
+            prefix.append(DIGITS[(digit_a + digit_b) // 2])
+        elif b is not None and len(b) > 1:
+            prefix.append(b[0])
+        else:
+            prefix.append(DIGITS[digit_a])
+            a, b = a[1:], None
+            continue
+        return "".join(prefix)
+
+def _to_digits(value: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return "".join(reversed(digits)).rstrip("0")
+
+def _head(key: str, width: int) -> int:
+    value = 0
+    for digit in key[:width].ljust(width, "0"):
+        value = value * BASE + _INDEX[digit]
+    return value
+
+def _append(before: str) -> str:
+    # Step the key by one unit in its leading APPEND_DIGITS digits instead of
+    # halving the gap to 1.0, so a column built by appending keeps short
+    # keys. Once those run out, step in the next APPEND_DIGITS: keys grow by
+    # that much every BASE ** APPEND_DIGITS appends.
+    width = APPEND_DIGITS
+    while True:
+        value = _head(before, width) + 1
+        if value < BASE ** width:
+            return _to_digits(value, width)
+        width += APPEND_DIGITS
+
+def _prepend(after: str) -> str:
+    # Mirror of _append for drops at the top of a column
+    width = APPEND_DIGITS
+    while True:
+        value = _head(after, width)
+        if len(after) <= width:
+            value -= 1
+        if value > 0:
+            return _to_digits(value, width)
+        width += APPEND_DIGITS
+
+def rank_between(before: Optional[str] = None, after: Optional[str] = None) -> str:
+    """A key sorting after ``before`` and before ``after`` (None = open end)"""
+    before = before or ""
+    if after is not None and before >= after:
+        raise ValueError(f"rank {before!r} does not sort before {after!r}")
+    if after is None and before:
+        return _append(before)
+    if after is not None and not before:
+        return _prepend(after)
+    return _midpoint(before, after)
+
+def spread_ranks(count: int) -> List[str]:
+    """``count`` evenly spaced keys of the shortest length that fits them"""
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    step = BASE ** width // (count + 1)
+    return [_to_digits(position * step, width) for position in range(1, count + 1)]
+
+# The column's issues in last_rank, aliased so the subquery can correlate to
+# an outer issue row, including the target of an UPDATE
+_column_issue = aliased(Issue, name="column_issue")
+
+def last_rank(project_id, status: str):
+    """Scalar subquery for the highest key in a column (an index seek)"""
+    return (
+        select(func.max(_column_issue.rank))
+        .where(_column_issue.project_id == project_id, _column_issue.status == status)
+        .scalar_subquery()
+    )
+
+def _successor(digit):
+    # The next digit, "" after "z"; a position lookup instead of a CASE
+    # keeps the statement small, which matters for its cache key
+    position = func.strpos if engine.dialect.name == "postgresql" else func.instr
+    return func.substr(DIGITS, position(DIGITS, digit) + 1, 1, type_=String)
+
+def _appended_rank(tail):
+    # SQL for rank_between(tail, None). Steps the leading APPEND_DIGITS
+    # digits as _append does: the last of them that isn't "z" goes up by one
+    # and the ones after it are dropped. A tail that has used them all up
+    # gets a digit appended instead, and check_rank_length has its column
+    # rebalanced once keys grow long.
+    head = func.substr(func.coalesce(tail, "", type_=String) + "0" * APPEND_DIGITS, 1, APPEND_DIGITS, type_=String)
+    whens = [(tail.is_(None), rank_between())]
+    for position in reversed(range(APPEND_DIGITS)):
+        digit = func.substr(head, position + 1, 1, type_=String)
+        stepped = _successor(digit)
+        if position:
+            stepped = func.substr(head, 1, position, type_=String) + stepped
+        whens.append((digit != DIGITS[-1], stepped))
+    return case(*whens, else_=tail + DIGITS[BASE // 2])
+
+def next_rank(project_id, status: str):
+    """Scalar subquery for a key after the last one in a column, so one
+    statement can move an issue to its end"""
+    # max() appears several times in the expression but is computed once
+    return (
+        select(_appended_rank(func.max(_column_issue.rank)))
+        .where(_column_issue.project_id == project_id, _column_issue.status == status)
+        .scalar_subquery()
+    )
+
+def append_ranks(rows: List[dict], tails: dict) -> None:
+    """Set ``rank`` on new issue rows, appending each to the end of its column.
+
+    ``tails`` maps (project_id, status) to the column's current last key and
+    is advanced past the keys handed out.
+    """
+    for row in rows:
+        key = (row["project_id"], row["status"])
+        row["rank"] = tails[key] = rank_between(tails.get(key), None)
+
+async def rebalance_column(project_id: int, status: str, target: Optional[AsyncEngine] = None) -> int:
+    """Give one column evenly spaced keys, keeping its current order.
+
+    Issues moved into or within the column while it was being read keep
+    their place: once the rewrite holds the write lock, their keys are
+    translated from the old key space into the new one. Runs on the
+    project's shard unless ``target`` names the database. Returns the number
+    of rows rewritten.
+    """
+    table = Issue.__table__
+    column = (Issue.project_id == project_id, Issue.status == status)
+    session_scope = async_session_factory(bind=target) if target is not None else project_session(project_id)
+    async with session_scope as session:
+        statement = select(Issue.id, Issue.rank).where(*column).order_by(Issue.rank, Issue.id)
+        if session.bind.dialect.name == "postgresql":
+            statement = statement.with_for_update()
+        rows = (await session.execute(statement)).all()
+        new_ranks = dict(zip((issue_id for issue_id, _ in rows), spread_ranks(len(rows))))
+        params = [
+            {"b_id": issue_id, "b_old": old_rank or "", "b_rank": new_ranks[issue_id]}
+            for issue_id, old_rank in rows
+            if old_rank != new_ranks[issue_id]
+        ]
+        if not params:
+            return 0
+        guarded = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"), func.coalesce(table.c.rank, "") == bindparam("b_old"))
+            .values(rank=bindparam("b_rank"))
+        )
+        await session.execute(guarded, params)
+
+        # The transaction now writes, so concurrent moves are shut out.
+        # Issues that moved meanwhile still hold old-space keys.
+        current = (await session.execute(select(Issue.id, Issue.rank).where(*column))).all()
+        moved = sorted((rank or "", issue_id) for issue_id, rank in current if new_ranks.get(issue_id) != rank)
+        if moved:
+            moved_ids = {issue_id for _, issue_id in moved}
+            anchors = sorted((old_rank or "", issue_id) for issue_id, old_rank in rows if issue_id not in moved_ids)
+            fixes = []
+            previous = None
+            for rank, issue_id in moved:
+                # Place it between the new keys of its old-space neighbours,
+                # after any other moved issue that landed in the same gap
+                position = bisect.bisect_left(anchors, (rank, issue_id))
+                lower = new_ranks[anchors[position - 1][1]] if position else None
+                upper = new_ranks[anchors[position][1]] if position < len(anchors) else None
+                if previous is not None and previous[0] == position:
+                    lower = previous[1]
+                new_rank = rank_between(lower, upper)
+                previous = (position, new_rank)
+                fixes.append({"b_id": issue_id, "b_old": rank, "b_rank": new_rank})
+            await session.execute(guarded, fixes)
+        await session.commit()
+
+    # Imported here: board_cache and events don't depend on ranking
+    from board_cache import bump_board_version
+    from events import publish_project_event
+
+    bump_board_version(project_id)
+    await publish_project_event(project_id, "issues.reranked", status=status)
+    return len(params)
+
+_pending: Set[Tuple[int, str]] = set()
+_tasks: Set[asyncio.Task] = set()
+
+async def _run_rebalance(project_id: int, status: str) -> None:
+    try:
+        await rebalance_column(project_id, status)
+    finally:
+        _pending.discard((project_id, status))
+
+def schedule_rebalance(project_id: int, status: str) -> None:
+    """Rebalance a column in the background, at most once at a time"""
+    key = (project_id, status)
+    if key in _pending:
+        return
+    _pending.add(key)
+    task = asyncio.create_task(_run_rebalance(project_id, status))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+def check_rank_length(project_id: int, status: str, rank: Optional[str]) -> None:
+    if rank is not None and len(rank) > RANK_MAX_LENGTH:
+        schedule_rebalance(project_id, status)
+
+def check_appended_ranks(rows: List[dict]) -> None:
+    """check_rank_length on the last key ``append_ranks`` gave each column"""
+    tails = {(row["project_id"], row["status"]): row["rank"] for row in rows}
+    for (project_id, status), rank in tails.items():
+        check_rank_length(project_id, status, rank)
+
+async def ensure_ranks(target: AsyncEngine = engine) -> None:
+    """Rank issues written before ranking existed, column by column"""
+    async with target.connect() as conn:
+        result = await conn.execute(
+            select(Issue.project_id, Issue.status).where(Issue.rank.is_(None)).distinct()
+        )
+        columns = result.all()
+    for project_id, status in columns:
+        await rebalance_column(project_id, status, target)
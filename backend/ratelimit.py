@@ -0,0 +1,172 @@
+"""Per-principal token-bucket rate limiting.
+
+``RateLimitMiddleware`` charges every request a route-specific cost against
+a token bucket keyed by the JWT ``sub`` claim, or by client IP for anonymous
+requests such as login and signup. Requests over the limit get a 429 with
+``Retry-After`` before routing, so they never reach the database or the
+password hasher.
+
+Buckets live in a pluggable ``RateLimitStore``. ``MemoryRateLimitStore``
+keeps them in this process with O(1) updates and evicts idle keys; a
+multi-worker deployment can install a shared store with ``set_store``.
+"""
+import math
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from responses import dumps
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+# Sustained tokens per second and bucket capacity, per user or IP
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", 20))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", 60))
+# Buckets untouched this long are full again and can be forgotten
+RATE_LIMIT_IDLE_TTL = float(os.getenv("RATE_LIMIT_IDLE_TTL", 600))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+# Only enable behind a proxy that sets X-Forwarded-For itself
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").strip().lower() in ("1", "true", "yes", "on")
+
+# (method, path pattern, cost); first match wins, unmatched requests cost 1.
+# Weights follow server cost: bcrypt work, bulk writes and imports dominate.
+ROUTE_COSTS = [
+    ("POST", r"/api/auth/(login|signup)", 10),
+    ("POST", r"/api/projects/\d+/import", 20),
+    ("DELETE", r"/api/projects/\d+", 10),
+    (None, r"/api/issues/bulk(/status)?", 5),
+    ("GET", r"/api/projects/\d+/export", 5),
+    ("GET", r"/api/issues/search", 2),
+]
+_COMPILED_COSTS = [(method, re.compile(pattern + "$"), cost) for method, pattern, cost in ROUTE_COSTS]
+
+# Never limited: health checks, scrapes and CORS preflights
+EXEMPT_PATHS = frozenset(("/health", "/metrics"))
+
+def route_cost(method: str, path: str) -> float:
+    for route_method, pattern, cost in _COMPILED_COSTS:
+        if (route_method is None or route_method == method) and pattern.match(path):
+            return cost
+    return 1
+
+class RateLimitStore(ABC):
+    """Interface every store implements"""
+
+    @abstractmethod
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        """Charge ``cost`` tokens to ``key``.
+
+        Returns 0 when allowed, otherwise the seconds until enough tokens
+        will have accumulated (nothing is charged then).
+        """
+
+    def stats(self) -> dict:
+        return {}
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Buckets in an OrderedDict kept in last-use order, so idle keys sit at the front"""
+
+    def __init__(self, idle_ttl: float = RATE_LIMIT_IDLE_TTL, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.idle_ttl = idle_ttl
+        self.max_keys = max_keys
+        self.allowed = 0
+        self.limited = 0
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def _evict(self, now: float) -> None:
+        buckets = self._buckets
+        while buckets:
+            key, (_, updated) = next(iter(buckets.items()))
+            if len(buckets) <= self.max_keys and now - updated < self.idle_ttl:
+                return
+            del buckets[key]
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        # A request costing more than the bucket holds is charged a full bucket
+        cost = min(cost, burst)
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+            self.allowed += 1
+        else:
+            wait = (cost - tokens) / rate
+            self.limited += 1
+        self._buckets[key] = (tokens, now)
+        self._evict(now)
+        return wait
+
+    def stats(self) -> dict:
+        return {"keys": len(self._buckets), "allowed": self.allowed, "limited": self.limited}
+
+_store: RateLimitStore = MemoryRateLimitStore()
+
+def get_store() -> RateLimitStore:
+    return _store
+
+def set_store(store: RateLimitStore) -> None:
+    global _store
+    _store = store
+
+def _client_ip(scope) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+def rate_limit_key(scope) -> str:
+    """``user:<sub>`` for a valid bearer token, ``ip:<address>`` otherwise"""
+    from auth import decode_token_cached
+
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                payload = decode_token_cached(token)
+                if payload is not None and payload.get("sub") is not None:
+                    return f"user:{payload['sub']}"
+            break
+    return f"ip:{_client_ip(scope)}"
+
+class RateLimitMiddleware:
+    def __init__(self, app, rate: float = RATE_LIMIT_RATE, burst: float = RATE_LIMIT_BURST):
+        self.app = app
+        self.rate = rate
+        self.burst = burst
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not RATE_LIMIT_ENABLED
+            or scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or scope["path"] in EXEMPT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        cost = route_cost(scope["method"], scope["path"])
+        wait = await _store.take(rate_limit_key(scope), cost, self.rate, self.burst)
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+
+        body = dumps({"detail": "Too many requests"})
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+def rate_limit_stats() -> Optional[dict]:
+    return _store.stats() if RATE_LIMIT_ENABLED else None
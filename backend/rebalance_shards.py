@@ -0,0 +1,244 @@
+"""Move projects between issue shards (see shards.py).
+
+    python rebalance_shards.py status
+    python rebalance_shards.py move 42 --to 2
+    python rebalance_shards.py balance --max-moves 10 --dry-run
+
+Moving a project:
+
+1. fences it on its current shard: the change triggers refuse writes to its
+   issues there, so writes fail while it moves (reads carry on)
+2. copies its row, issues (ids kept), tombstones and counters to the target
+3. points the shard map in the main database at the target
+4. deletes its issues from the old shard, in chunks
+
+If anything fails before step 3, the partial copy is removed and the fence
+lifted. After step 3, workers may send the project to the old shard for up
+to SHARD_MAP_CACHE_TTL seconds. Reads there find nothing, and writes are
+refused. A project moved off the main database stays fenced there, so such
+writes can't land where nobody reads them. Change feed clients catch up
+by receiving every issue once more.
+
+``balance`` repeatedly moves the biggest project that narrows the gap
+between the fullest and the emptiest shard.
+"""
+import argparse
+import asyncio
+import os
+import sys
+from typing import Dict, List, Tuple
+
+for _path in (os.path.dirname(os.path.abspath(__file__)), os.path.dirname(os.path.dirname(os.path.abspath(__file__)))):
+    if _path not in sys.path:
+        sys.path.append(_path)
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database import engine
+from models.issue import Issue
+from models.issue_counter import IssueCounter
+from models.issue_tombstone import IssueTombstone
+from models.project import Project
+from shards import SHARDED, is_main, shard_engines
+from stats import ISSUE_STATS_COUNTERS, rebuild_counters
+
+# Issues per copy batch and per delete chunk on the old shard
+SHARD_MOVE_BATCH_SIZE = int(os.getenv("SHARD_MOVE_BATCH_SIZE", 1000))
+
+ISSUE_COLUMNS = tuple(Issue.__table__.columns)
+
+async def _set_fenced(target: AsyncEngine, project_id: int, fenced: bool) -> None:
+    async with target.begin() as conn:
+        await conn.execute(update(Project).where(Project.id == project_id).values(fenced=fenced))
+
+async def _clear_project(shard: int, project_id: int, batch_size: int, fenced_after: bool) -> None:
+    """Delete a project's issue data from one shard in chunks. Its row goes
+    too, unless the shard is the main database, where it ends up fenced or
+    not as asked."""
+    target = shard_engines[shard]
+    chunk = select(Issue.id).where(Issue.project_id == project_id).limit(batch_size)
+    while True:
+        # Lifted only inside the transaction, so nobody else can write meanwhile
+        async with target.begin() as conn:
+            await conn.execute(update(Project).where(Project.id == project_id).values(fenced=False))
+            result = await conn.execute(delete(Issue).where(Issue.id.in_(chunk)))
+            await conn.execute(delete(IssueTombstone).where(IssueTombstone.project_id == project_id))
+            await conn.execute(update(Project).where(Project.id == project_id).values(fenced=True))
+        if result.rowcount < batch_size:
+            break
+    async with target.begin() as conn:
+        await conn.execute(delete(IssueCounter).where(IssueCounter.project_id == project_id))
+        if is_main(shard):
+            await conn.execute(update(Project).where(Project.id == project_id).values(fenced=fenced_after))
+        else:
+            await conn.execute(delete(Project).where(Project.id == project_id))
+
+async def _copy_project(project, source: int, target: int, batch_size: int) -> int:
+    """Copy a fenced project's issue data from ``source`` to ``target``;
+    returns the number of issues copied"""
+    source_engine, target_engine = shard_engines[source], shard_engines[target]
+    async with source_engine.connect() as conn:
+        change_seq = (await conn.execute(
+            select(Project.change_seq).where(Project.id == project.id)
+        )).scalar_one()
+        tombstones = (await conn.execute(
+            select(IssueTombstone.issue_id, IssueTombstone.project_id, IssueTombstone.seq)
+            .where(IssueTombstone.project_id == project.id)
+        )).all()
+
+    # The feed's sequence continues past everything clients have seen; the
+    # issues inserted below advance it further, so clients fetch them again
+    async with target_engine.begin() as conn:
+        if is_main(target):
+            await conn.execute(update(Project).where(Project.id == project.id).values(
+                fenced=False,
+                change_seq=case((Project.change_seq < change_seq, change_seq), else_=Project.change_seq),
+            ))
+        else:
+            await conn.execute(insert(Project).values(
+                id=project.id, name=project.name, description=project.description,
+                owner_id=project.owner_id, shard=target, change_seq=change_seq,
+            ))
+        if tombstones:
+            await conn.execute(insert(IssueTombstone), [
+                {"issue_id": issue_id, "project_id": project_id, "seq": seq}
+                for issue_id, project_id, seq in tombstones
+            ])
+
+    copied = 0
+    async with source_engine.connect() as source_conn:
+        result = await source_conn.stream(
+            select(*ISSUE_COLUMNS)
+            .where(Issue.project_id == project.id)
+            .order_by(Issue.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions():
+            async with target_engine.begin() as conn:
+                await conn.execute(insert(Issue), [dict(row._mapping) for row in rows])
+            copied += len(rows)
+
+    if ISSUE_STATS_COUNTERS:
+        async with target_engine.begin() as conn:
+            await rebuild_counters(conn, project.id)
+    return copied
+
+async def move_project(project_id: int, target: int, batch_size: int = SHARD_MOVE_BATCH_SIZE) -> int:
+    """Move a project's issues to shard ``target``; returns how many moved"""
+    if not 0 <= target < len(shard_engines):
+        raise ValueError(f"Shard {target} is not configured; SHARD_URLS lists {len(shard_engines)}")
+    async with engine.connect() as conn:
+        project = (await conn.execute(
+            select(Project.id, Project.name, Project.description, Project.owner_id,
+                   Project.shard, Project.fenced)
+            .where(Project.id == project_id)
+        )).first()
+    if project is None:
+        raise ValueError(f"No project {project_id}")
+    source = project.shard
+    if source == target:
+        return 0
+
+    await _set_fenced(shard_engines[source], project_id, True)
+    try:
+        # Leftovers of an earlier move that died before finishing
+        await _clear_project(target, project_id, batch_size, fenced_after=project.fenced)
+        moved = await _copy_project(project, source, target, batch_size)
+    except BaseException:
+        await _clear_project(target, project_id, batch_size, fenced_after=project.fenced)
+        await _set_fenced(shard_engines[source], project_id, False)
+        raise
+
+    async with engine.begin() as conn:
+        await conn.execute(update(Project).where(Project.id == project_id).values(shard=target))
+    await _clear_project(source, project_id, batch_size, fenced_after=True)
+    return moved
+
+async def shard_sizes() -> Dict[int, Dict[int, int]]:
+    """Issue count of every project, by the shard the shard map puts it on"""
+    async with engine.connect() as conn:
+        placement = dict((await conn.execute(select(Project.id, Project.shard))).all())
+    sizes = {shard: {} for shard in range(len(shard_engines))}
+    for project_id, shard in placement.items():
+        sizes.setdefault(shard, {})[project_id] = 0
+    for shard, shard_engine in enumerate(shard_engines):
+        async with shard_engine.connect() as conn:
+            result = await conn.execute(
+                select(Issue.project_id, func.count()).group_by(Issue.project_id)
+            )
+        for project_id, count in result.all():
+            # Only projects that live here; stray rows aren't load
+            if placement.get(project_id) == shard:
+                sizes[shard][project_id] = count
+    return sizes
+
+def plan_balance(sizes: Dict[int, Dict[int, int]], max_moves: int) -> List[Tuple[int, int, int, int]]:
+    """Moves as (project_id, source, target, issues), biggest useful first"""
+    sizes = {shard: dict(projects) for shard, projects in sizes.items()}
+    totals = {shard: sum(projects.values()) for shard, projects in sizes.items()}
+    moves = []
+    while len(moves) < max_moves and len(totals) > 1:
+        fullest = max(totals, key=totals.get)
+        emptiest = min(totals, key=totals.get)
+        gap = totals[fullest] - totals[emptiest]
+        # Moving n issues changes the gap to |gap - 2n|: smaller for 0 < n < gap
+        candidates = [(count, project_id) for project_id, count in sizes[fullest].items() if 0 < count < gap]
+        if not candidates:
+            break
+        count, project_id = max(candidates)
+        moves.append((project_id, fullest, emptiest, count))
+        sizes[emptiest][project_id] = sizes[fullest].pop(project_id)
+        totals[fullest] -= count
+        totals[emptiest] += count
+    return moves
+
+async def status() -> None:
+    for shard, projects in (await shard_sizes()).items():
+        if shard < len(shard_engines):
+            url = shard_engines[shard].url.render_as_string(hide_password=True)
+        else:
+            url = "(not in SHARD_URLS)"
+        print(f"shard {shard}: {len(projects)} projects, {sum(projects.values())} issues  {url}")
+
+async def main(args) -> int:
+    if not SHARDED and args.command != "status":
+        print("SHARD_URLS is not set: there is only one shard", file=sys.stderr)
+        return 1
+    try:
+        if args.command == "status":
+            await status()
+        elif args.command == "move":
+            for project_id in args.project_ids:
+                moved = await move_project(project_id, args.to, args.batch_size)
+                print(f"project {project_id}: {moved} issues moved to shard {args.to}")
+        else:
+            moves = plan_balance(await shard_sizes(), args.max_moves)
+            for project_id, source, target, count in moves:
+                print(f"project {project_id}: {count} issues, shard {source} -> {target}")
+                if not args.dry_run:
+                    await move_project(project_id, target, args.batch_size)
+            if not moves:
+                print("nothing to move")
+            elif not args.dry_run:
+                await status()
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    finally:
+        for shard_engine in {engine, *shard_engines}:
+            await shard_engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=SHARD_MOVE_BATCH_SIZE, help="issues per copy batch")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="projects and issues per shard")
+    move = commands.add_parser("move", help="move projects to a shard")
+    move.add_argument("project_ids", type=int, nargs="+")
+    move.add_argument("--to", type=int, required=True, help="target shard index")
+    balance = commands.add_parser("balance", help="even out issue counts across shards")
+    balance.add_argument("--max-moves", type=int, default=10)
+    balance.add_argument("--dry-run", action="store_true", help="print the moves only")
+    sys.exit(asyncio.run(main(parser.parse_args())))
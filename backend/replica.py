@@ -0,0 +1,186 @@
+"""Routing of read-only requests to a read replica.
+
+GET handlers take their session from ``get_read_session``. With
+READ_DATABASE_URL set it reads from the replica, except:
+
+* for a principal that wrote within the last REPLICA_STICKY_SECONDS.
+  ``ReadYourWritesMiddleware`` marks the principal when a write request
+  starts and again when it finishes, so reads racing with or following
+  one's own writes go to the primary and never miss them.
+* while the replica is down. ``replica_monitor`` probes it every
+  REPLICA_HEALTH_INTERVAL seconds, also checking replication lag on
+  PostgreSQL, and a connection error on a replica read marks it down at
+  once. The request that hit the error still fails.
+
+Stickiness is kept per process, so it only covers reads served by the
+worker that handled the write.
+"""
+import asyncio
+import logging
+import os
+from typing import AsyncGenerator, Optional
+
+from fastapi import Request
+from sqlalchemy import event, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import LRUCache
+from database import async_session_factory, read_engine, read_session_factory
+from models.project import Project
+from ratelimit import rate_limit_key
+
+# Reads by a principal go to the primary this long after its last write
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+REPLICA_STICKY_MAX_KEYS = int(os.getenv("REPLICA_STICKY_MAX_KEYS", 100000))
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", 5))
+REPLICA_HEALTH_TIMEOUT = float(os.getenv("REPLICA_HEALTH_TIMEOUT", 2))
+# Replicas further behind than this many seconds are bypassed (PostgreSQL)
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", 10))
+
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+log = logging.getLogger("replica")
+
+_recent_writers = LRUCache(REPLICA_STICKY_MAX_KEYS, ttl=REPLICA_STICKY_SECONDS)
+
+class ReplicaMonitor:
+    def __init__(self, interval: float = REPLICA_HEALTH_INTERVAL, timeout: float = REPLICA_HEALTH_TIMEOUT,
+                 max_lag: float = REPLICA_MAX_LAG):
+        self.interval = interval
+        self.timeout = timeout
+        self.max_lag = max_lag
+        self.healthy = read_engine is not None
+        self.lag = 0.0
+        self.checks = 0
+        self.failures = 0
+        self.reads_replica = 0
+        self.reads_sticky = 0
+        self.reads_fallback = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if read_engine is None or self._task is not None:
+            return
+        await self.check()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def mark_down(self, reason: str) -> None:
+        if self.healthy:
+            log.warning("read replica marked down: %s", reason)
+        self.healthy = False
+
+    async def _probe(self) -> float:
+        """Replication lag in seconds; raises if the replica can't serve reads"""
+        async with read_engine.connect() as conn:
+            # A real table: a reachable but empty replica is no use either
+            await conn.execute(select(Project.id).limit(1))
+            if conn.dialect.name != "postgresql":
+                return 0.0
+            # NULL when not in recovery; overstates lag while the primary is idle
+            result = await conn.execute(text(
+                "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+            ))
+            return float(result.scalar_one())
+
+    async def check(self) -> bool:
+        self.checks += 1
+        try:
+            self.lag = await asyncio.wait_for(self._probe(), self.timeout)
+        except Exception as exc:
+            self.failures += 1
+            self.mark_down(f"health check failed: {exc!r}")
+            return False
+        if self.lag > self.max_lag:
+            self.mark_down(f"replication lag {self.lag:.1f}s")
+            return False
+        if not self.healthy:
+            log.warning("read replica back up")
+        self.healthy = True
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    def stats(self) -> dict:
+        return {
+            "configured": int(read_engine is not None),
+            "healthy": int(self.healthy),
+            "lag_seconds": self.lag,
+            "checks": self.checks,
+            "failures": self.failures,
+            "reads_replica": self.reads_replica,
+            "reads_sticky": self.reads_sticky,
+            "reads_fallback": self.reads_fallback,
+            "sticky_principals": len(_recent_writers),
+        }
+
+replica_monitor = ReplicaMonitor()
+
+def _handle_error(context):
+    if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+        replica_monitor.mark_down(f"read failed: {context.original_exception!r}")
+
+if read_engine is not None:
+    event.listen(read_engine.sync_engine, "handle_error", _handle_error)
+
+def mark_write(scope) -> None:
+    """Send this principal's reads to the primary for REPLICA_STICKY_SECONDS"""
+    _recent_writers.set(rate_limit_key(scope), True)
+
+def use_replica(scope) -> bool:
+    if read_session_factory is None:
+        return False
+    if _recent_writers.get(rate_limit_key(scope)) is not None:
+        replica_monitor.reads_sticky += 1
+        return False
+    if not replica_monitor.healthy:
+        replica_monitor.reads_fallback += 1
+        return False
+    replica_monitor.reads_replica += 1
+    return True
+
+def read_session(scope) -> AsyncSession:
+    """A replica session when one may be used for this request, otherwise a
+    primary one. ``session.info["replica"]`` tells which."""
+    if use_replica(scope):
+        session = read_session_factory()
+        session.info["replica"] = True
+        return session
+    return async_session_factory()
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for read-only handlers, see ``read_session``"""
+    async with read_session(request.scope) as session:
+        yield session
+
+class ReadYourWritesMiddleware:
+    """Marks principals as recent writers around every unsafe request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if read_engine is None or scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+        mark_write(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            mark_write(scope)
+
+def replica_stats() -> Optional[dict]:
+    return replica_monitor.stats() if read_engine is not None else None
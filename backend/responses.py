@@ -0,0 +1,35 @@
+"""Fast JSON responses for list endpoints.
+
+List handlers select plain column tuples instead of ORM objects and encode
+them once with orjson (stdlib json when orjson is not installed), returning
+the bytes directly. FastAPI skips ``response_model`` validation for
+``Response`` return values, so the route keeps its ``response_model`` purely
+for the OpenAPI schema.
+"""
+import json
+from typing import Any, Iterable, Optional, Sequence
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode()
+
+def rows_to_dicts(keys: Sequence[str], rows: Iterable[tuple]) -> list:
+    return [dict(zip(keys, row)) for row in rows]
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def json_bytes_response(body: bytes, headers: Optional[dict] = None) -> Response:
+    """Response for a body that has already been encoded"""
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,5 +1,6 @@
 from . import user
 from . import project
 from . import issue
+from . import events
 
-__all__ = ["user", "project", "issue"]
+__all__ = ["user", "project", "issue", "events"]
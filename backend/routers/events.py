@@ -0,0 +1,66 @@
+import asyncio
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from sqlmodel import select
+
+from database import async_session_factory
+from models.project import Project
+from auth import decode_token_cached
+from events import get_broker, project_channel
+
+router = APIRouter()
+
+async def _forward(websocket: WebSocket, subscription) -> None:
+    while True:
+        message = await subscription.get()
+        if message is None:
+            # Dropped as a slow consumer: the client should reload and resubscribe
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return
+        try:
+            await websocket.send_text(message)
+        except (WebSocketDisconnect, RuntimeError):
+            return
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+@router.websocket("/project/{project_id}")
+async def project_events(
+    websocket: WebSocket,
+    project_id: int,
+    token: str = Query(..., description="JWT access token (browsers cannot set headers on WebSockets)")
+):
+    """Stream issue events for a project as JSON text frames"""
+    payload = decode_token_cached(token)
+    user_id = payload.get("sub") if payload else None
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    # Verify project exists and user has access
+    async with async_session_factory() as session:
+        statement = select(Project.id).where(
+            Project.id == project_id,
+            Project.owner_id == int(user_id)
+        )
+        result = await session.execute(statement)
+        if result.first() is None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+    await websocket.accept()
+    broker = get_broker()
+    subscription = broker.subscribe(project_channel(project_id))
+    tasks = [
+        asyncio.create_task(_forward(websocket, subscription)),
+        asyncio.create_task(_wait_for_disconnect(websocket)),
+    ]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        broker.unsubscribe(subscription)
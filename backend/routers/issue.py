@@ -1,51 +1,105 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlmodel import select
+from sqlalchemy import bindparam, case, delete, false, insert, update
+from sqlalchemy.orm import aliased
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from database import get_session
+from replica import get_read_session
+from shards import (
+    SHARDED,
+    assign_issue_ids,
+    get_issue_read_session,
+    get_issue_session,
+    get_project_read_session,
+    issue_shard,
+    new_issue_id,
+    on_shards,
+    project_session,
+    project_shard,
+    shard_session,
+    shards_for_issues,
+    shards_for_projects,
+)
 from models.issue import Issue
+from models.issue_event import IssueEvent
+from models.issue_tombstone import IssueTombstone
 from models.project import Project
 from models.user import User
-from schemas.issue import IssueCreate, IssueRead
+from schemas.issue import (
+    IssueBulkResult,
+    IssueBulkUpdate,
+    IssueChanges,
+    IssueCreate,
+    IssueEventRead,
+    IssueRead,
+    IssueStatusUpdate,
+)
 from auth import get_current_user
+from events import publish_project_event
+from history import history_writer, issue_event, record_issue_events
+from stats import COUNTER_COLUMNS, load_counter_rows, record_issue_changes
+from search import merge_search_pages, search_issues
+from ranking import (
+    append_ranks, check_appended_ranks, check_rank_length, last_rank, next_rank, rank_between,
+    schedule_rebalance
+)
+from responses import dumps, json_bytes_response, rows_to_dicts
+from board_cache import (
+    BoardEntry,
+    board_cache,
+    board_version,
+    bump_board_version,
+    etag_matches,
+    make_etag,
+)
 
 router = APIRouter()
 
-@router.post("/", response_model=IssueRead)
-async def create_issue(
-    issue_data: IssueCreate,
-    session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user)
-):
-    """Create a new issue"""
-    # Verify project exists and user has access
-    project_statement = select(Project).where(
-        Project.id == issue_data.project_id,
-        Project.owner_id == current_user.id
+# Upper bound for a single page of the board listing
+MAX_PAGE_SIZE = 1000
+# Upper bound for the number of items in one bulk request
+MAX_BULK_ITEMS = 1000
+# Upper bound for a single page of search results
+MAX_SEARCH_PAGE_SIZE = 100
+# Upper bound for a single page of issue history
+MAX_HISTORY_PAGE_SIZE = 200
+
+# Columns of IssueRead, selected directly for the fast list path
+ISSUE_READ_COLUMNS = (
+    Issue.id,
+    Issue.title,
+    Issue.description,
+    Issue.status,
+    Issue.priority,
+    Issue.assignee_id,
+    Issue.project_id,
+    Issue.rank,
+)
+ISSUE_READ_KEYS = tuple(column.key for column in ISSUE_READ_COLUMNS)
+
+# A status change without placement: an issue changing column goes to the
+# end of the new one. Built once, as the key arithmetic makes a statement
+# that is costly to build and to derive a cache key for on every request.
+STATUS_CHANGE_STATEMENT = (
+    update(Issue)
+    .where(
+        Issue.id == bindparam("b_id"),
+        Issue.project_id.in_(select(Project.id).where(Project.owner_id == bindparam("b_owner_id")))
     )
-    project_result = await session.execute(project_statement)
-    project = project_result.scalars().first()
-    
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
+    .values(
+        status=bindparam("b_status"),
+        rank=case(
+            (Issue.status != bindparam("b_status"), next_rank(Issue.project_id, bindparam("b_status"))),
+            else_=Issue.rank
         )
-    
-    issue = Issue(
-        title=issue_data.title,
-        description=issue_data.description,
-        status=issue_data.status,
-        priority=issue_data.priority,
-        assignee_id=issue_data.assignee_id,
-        project_id=issue_data.project_id
     )
-    
-    session.add(issue)
-    await session.commit()
-    await session.refresh(issue)
-    
+    .returning(*COUNTER_COLUMNS, Issue.rank)
+    .execution_options(synchronize_session=False)
+)
+
+def _to_issue_read(issue: Issue) -> IssueRead:
     return IssueRead(
         id=issue.id,
         title=issue.title,
@@ -53,49 +107,358 @@ async def create_issue(
         status=issue.status,
         priority=issue.priority,
         assignee_id=issue.assignee_id,
-        project_id=issue.project_id
+        project_id=issue.project_id,
+        rank=issue.rank
     )
 
+def _counter_row(issue) -> tuple:
+    return (issue.project_id, issue.status, issue.priority, issue.assignee_id)
+
+def _issue_changes(issue) -> dict:
+    """The user-editable fields of an issue, as recorded in its history"""
+    return {
+        "title": issue.title,
+        "description": issue.description,
+        "status": issue.status,
+        "priority": issue.priority,
+        "assignee_id": issue.assignee_id,
+    }
+
+def _check_bulk_size(items: list) -> None:
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BULK_ITEMS} items per bulk request"
+        )
+
+async def _publish_bulk(event_type: str, issues: List[IssueRead]) -> None:
+    """Publish one event per affected project rather than one per issue"""
+    by_project = {}
+    for issue in issues:
+        by_project.setdefault(issue.project_id, []).append(issue.model_dump())
+    for project_id, project_issues in by_project.items():
+        await publish_project_event(project_id, event_type, issues=project_issues)
+
+def _owned_project_ids(user: User):
+    """Subquery of the ids of projects owned by ``user``"""
+    return select(Project.id).where(Project.owner_id == user.id)
+
+async def _stale_board_or_missing(session: AsyncSession, issue_id: int, user: User) -> HTTPException:
+    """409 for a placement based on an outdated board, 404 if the issue is gone"""
+    statement = select(Issue.id).where(
+        Issue.id == issue_id,
+        Issue.project_id.in_(_owned_project_ids(user))
+    )
+    result = await session.execute(statement)
+    if result.first() is None:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Issue not found"
+        )
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Board changed since it was loaded; reload and retry"
+    )
+
+@router.post("/", response_model=IssueRead)
+async def create_issue(
+    issue_data: IssueCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """Create a new issue"""
+    async with project_session(issue_data.project_id) as session:
+        # Verify project exists and user has access, reading the end of the
+        # target column in the same statement
+        project_statement = select(Project.id, last_rank(Project.id, issue_data.status)).where(
+            Project.id == issue_data.project_id,
+            Project.owner_id == current_user.id
+        )
+        project_result = await session.execute(project_statement)
+        project = project_result.first()
+        
+        if not project:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+        
+        issue = Issue(
+            id=await new_issue_id(issue_data.project_id),
+            title=issue_data.title,
+            description=issue_data.description,
+            status=issue_data.status,
+            priority=issue_data.priority,
+            assignee_id=issue_data.assignee_id,
+            project_id=issue_data.project_id,
+            rank=rank_between(project[1], None)
+        )
+        
+        session.add(issue)
+        await record_issue_changes(session, after=[_counter_row(issue)])
+        await session.commit()
+        await session.refresh(issue)
+    
+    check_rank_length(issue.project_id, issue.status, issue.rank)
+    bump_board_version(issue.project_id)
+    
+    await record_issue_events([
+        issue_event(issue.id, issue.project_id, current_user.id, "created", _issue_changes(issue))
+    ])
+    issue_read = _to_issue_read(issue)
+    await publish_project_event(issue.project_id, "issue.created", issue=issue_read.model_dump())
+    
+    return issue_read
+
+async def _create_issues(session: AsyncSession, items: List[IssueCreate], indices: List[int], user: User):
+    """Insert the issues at ``indices`` whose project ``user`` owns; returns
+    their indices and the created issues, in the same order"""
+    # One ownership check covering every distinct project in the batch,
+    # which also reads the end of every target column
+    project_ids = {items[index].project_id for index in indices}
+    statuses = sorted({items[index].status for index in indices})
+    project_statement = select(
+        Project.id, *(last_rank(Project.id, item_status) for item_status in statuses)
+    ).where(Project.owner_id == user.id, Project.id.in_(project_ids))
+    project_result = await session.execute(project_statement)
+    tails = {}
+    for project_id, *project_tails in project_result.all():
+        for item_status, tail in zip(statuses, project_tails):
+            tails[(project_id, item_status)] = tail
+    owned = {project_id for project_id, _ in tails}
+    
+    accepted = [index for index in indices if items[index].project_id in owned]
+    if not accepted:
+        return [], []
+    rows = [items[index].model_dump() for index in accepted]
+    append_ranks(rows, tails)
+    await assign_issue_ids(rows)
+    # A single multi-row INSERT ... RETURNING. Its rows may come back in
+    # any order; each has a new key in its column, which maps it back to
+    # its item. (sort_by_parameter_order would insert row by row on SQLite.)
+    result = await session.scalars(insert(Issue).returning(Issue), rows)
+    by_rank = {(issue.project_id, issue.status, issue.rank): issue for issue in result.all()}
+    created = [by_rank[(row["project_id"], row["status"], row["rank"])] for row in rows]
+    await record_issue_changes(session, after=[_counter_row(issue) for issue in created])
+    await session.commit()
+    check_appended_ranks(rows)
+    return accepted, created
+
+@router.post("/bulk", response_model=List[IssueBulkResult])
+async def create_issues_bulk(
+    items: List[IssueCreate],
+    current_user: User = Depends(get_current_user)
+):
+    """Create many issues in one transaction (per shard) with a multi-row INSERT"""
+    _check_bulk_size(items)
+    
+    accepted, created = [], []
+    for shard, project_ids in (await shards_for_projects(item.project_id for item in items)).items():
+        shard_projects = set(project_ids)
+        indices = [index for index, item in enumerate(items) if item.project_id in shard_projects]
+        async with shard_session(shard) as session:
+            shard_accepted, shard_created = await _create_issues(session, items, indices, current_user)
+        accepted += shard_accepted
+        created += shard_created
+    if created:
+        bump_board_version(*{issue.project_id for issue in created})
+        await record_issue_events([
+            issue_event(issue.id, issue.project_id, current_user.id, "created", _issue_changes(issue))
+            for issue in created
+        ])
+    
+    results = [
+        IssueBulkResult(index=index, ok=False, detail="Project not found")
+        for index in range(len(items))
+    ]
+    for index, issue in zip(accepted, created):
+        results[index] = IssueBulkResult(index=index, ok=True, issue=_to_issue_read(issue))
+    await _publish_bulk("issues.created", [result.issue for result in results if result.ok])
+    return results
+
 @router.get("/project/{project_id}", response_model=List[IssueRead])
 async def get_issues_by_project(
     project_id: int,
-    session: AsyncSession = Depends(get_session),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = Query(None, description="Return issues with an id greater than this cursor"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    priority: Optional[str] = None,
+    assignee_id: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_project_read_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all issues for a specific project"""
-    # Verify project exists and user has access
-    project_statement = select(Project).where(
+    """Get issues for a specific project.
+
+    Without ``limit`` the whole (filtered) board is returned. With ``limit``
+    the result is a keyset page ordered by id; when more rows exist the id to
+    pass as ``after`` for the next page is returned in ``X-Next-Cursor``.
+    Responses carry an ETag and honour ``If-None-Match``. ``X-Change-Seq``
+    is a change feed cursor the board is at least as new as, for clients
+    that continue with deltas from there.
+    """
+    params = (limit, after, status_filter, priority, assignee_id)
+    version = board_version(project_id)
+    
+    # Verify project exists and user has access, reading the board's version.
+    # The issues are read after it, so a write racing with this request
+    # leaves what we store below under an already stale key.
+    project_statement = select(Project.epoch, Project.change_seq).where(
         Project.id == project_id,
         Project.owner_id == current_user.id
     )
-    project_result = await session.execute(project_statement)
-    project = project_result.scalars().first()
+    project = (await session.execute(project_statement)).first()
     
-    if not project:
+    if project is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
+    epoch, change_seq = project
+    
+    # Unchanged boards are answered from memory
+    cached = board_cache.get(project_id, epoch, change_seq, version, params)
+    if cached is not None and cached.owner_id == current_user.id:
+        if etag_matches(if_none_match, cached.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cached.headers)
+        return json_bytes_response(cached.body, headers=cached.headers)
+    
+    # Get issues for the project as plain rows, encoded once below
+    statement = select(*ISSUE_READ_COLUMNS).where(Issue.project_id == project_id)
+    if status_filter is not None:
+        statement = statement.where(Issue.status == status_filter)
+    if priority is not None:
+        statement = statement.where(Issue.priority == priority)
+    if assignee_id is not None:
+        statement = statement.where(Issue.assignee_id == assignee_id)
+    if after is not None:
+        statement = statement.where(Issue.id > after)
+    statement = statement.order_by(Issue.id)
+    if limit is not None:
+        # Fetch one extra row to learn whether another page exists
+        statement = statement.limit(limit + 1)
     
-    # Get issues for the project
-    statement = select(Issue).where(Issue.project_id == project_id)
     result = await session.execute(statement)
-    issues = result.scalars().all()
+    issues = rows_to_dicts(ISSUE_READ_KEYS, result.all())
     
-    return [IssueRead(
-        id=issue.id,
-        title=issue.title,
-        description=issue.description,
-        status=issue.status,
-        priority=issue.priority,
-        assignee_id=issue.assignee_id,
-        project_id=issue.project_id
-    ) for issue in issues]
+    etag = make_etag(project_id, epoch, change_seq, current_user.id, params)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "X-Change-Seq": str(change_seq)}
+    if limit is not None and len(issues) > limit:
+        issues = issues[:limit]
+        headers["X-Next-Cursor"] = str(issues[-1]["id"])
+    
+    body = dumps(issues)
+    # A lagging replica reports its own change_seq, which the body matches
+    board_cache.put(project_id, epoch, change_seq, version, params, BoardEntry(etag, body, current_user.id, headers))
+    
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return json_bytes_response(body, headers=headers)
+
+@router.get("/project/{project_id}/changes", response_model=IssueChanges)
+async def get_issue_changes(
+    project_id: int,
+    since: int = Query(0, ge=0, description="Cursor from the previous response; 0 for everything"),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_project_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Issues created or changed and ids of issues removed since ``since``.
+
+    Changes come in the order they were made, at most ``limit`` of them; see
+    changes.py for how they are sequenced.
+    """
+    # The project's counter bounds both queries below, so a change committed
+    # between them can't be skipped by the returned cursor
+    # A project being purged has stopped recording deletes: it is gone
+    project_statement = select(Project.change_seq).where(
+        Project.id == project_id,
+        Project.owner_id == current_user.id,
+        Project.purging == false()
+    )
+    upto = (await session.execute(project_statement)).scalar_one_or_none()
+    if upto is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    if since >= upto:
+        return json_bytes_response(dumps({"cursor": since, "issues": [], "deleted": [], "has_more": False}))
+    
+    # Fetch one extra row each to learn whether more changes exist
+    issue_statement = (
+        select(Issue.updated_seq, *ISSUE_READ_COLUMNS)
+        .where(Issue.project_id == project_id, Issue.updated_seq > since, Issue.updated_seq <= upto)
+        .order_by(Issue.updated_seq)
+        .limit(limit + 1)
+    )
+    changes = [(row[0], dict(zip(ISSUE_READ_KEYS, row[1:]))) for row in (await session.execute(issue_statement)).all()]
+    if since:
+        # A client starting from scratch never had the deleted issues
+        tombstone_statement = (
+            select(IssueTombstone.seq, IssueTombstone.issue_id)
+            .where(IssueTombstone.project_id == project_id, IssueTombstone.seq > since, IssueTombstone.seq <= upto)
+            .order_by(IssueTombstone.seq)
+            .limit(limit + 1)
+        )
+        changes += (await session.execute(tombstone_statement)).all()
+        changes.sort(key=lambda change: change[0])
+    
+    has_more = len(changes) > limit
+    if has_more:
+        changes = changes[:limit]
+    issues = [change for _, change in changes if isinstance(change, dict)]
+    # An issue that left and came back is listed as it is now
+    present = {issue["id"] for issue in issues}
+    deleted = list(dict.fromkeys(
+        change for _, change in changes if not isinstance(change, dict) and change not in present
+    ))
+    return json_bytes_response(dumps({
+        "cursor": changes[-1][0] if has_more else upto,
+        "issues": issues,
+        "deleted": deleted,
+        "has_more": has_more,
+    }))
+
+@router.get("/search", response_model=List[IssueRead])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    project_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor from a previous page's X-Next-Cursor"),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Full-text search over issue titles and descriptions, best matches first"""
+    try:
+        if SHARDED:
+            # Every shard holding one of the user's projects may have matches
+            shards = [await project_shard(project_id)] if project_id is not None else None
+            rows, next_cursor = merge_search_pages(await on_shards(
+                lambda shard, _: search_issues(
+                    shard, current_user.id, q, project_id=project_id, limit=limit, after=after
+                ),
+                shards
+            ), limit)
+        else:
+            rows, next_cursor = await search_issues(
+                session, current_user.id, q, project_id=project_id, limit=limit, after=after
+            )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+    return json_bytes_response(
+        dumps([{key: row[key] for key in ISSUE_READ_KEYS} for row in rows]),
+        headers=headers
+    )
 
 @router.get("/{issue_id}", response_model=IssueRead)
 async def get_issue(
     issue_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_issue_read_session),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific issue"""
@@ -113,118 +476,400 @@ async def get_issue(
             detail="Issue not found"
         )
     
-    issue = issue_project[0]
+    return _to_issue_read(issue_project[0])
+
+@router.get("/{issue_id}/history", response_model=List[IssueEventRead])
+async def get_issue_history(
+    issue_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_HISTORY_PAGE_SIZE),
+    after: Optional[int] = Query(None, description="Return events with an id greater than this cursor"),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Activity history of an issue, oldest first.
+
+    A keyset page ordered by event id; when more events exist the id to pass
+    as ``after`` for the next page is returned in ``X-Next-Cursor``. History
+    of deleted issues stays readable while their project exists.
+    """
+    # The issue as it is now decides access: an id SQLite handed out again
+    # must not show the previous issue's events to the new owner. History
+    # stays in the main database; the issue may be on a shard.
+    issue_statement = select(Issue.project_id, Project.owner_id).join(Project).where(Issue.id == issue_id)
+    if SHARDED:
+        async with shard_session(await issue_shard(issue_id)) as shard:
+            current = (await shard.execute(issue_statement)).first()
+    else:
+        current = (await session.execute(issue_statement)).first()
+    if current is not None and current.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Issue not found"
+        )
     
-    return IssueRead(
-        id=issue.id,
-        title=issue.title,
-        description=issue.description,
-        status=issue.status,
-        priority=issue.priority,
-        assignee_id=issue.assignee_id,
-        project_id=issue.project_id
+    # Events are written behind the request; make this reader's own
+    # writes visible first
+    await history_writer.sync()
+    
+    statement = select(IssueEvent).where(
+        IssueEvent.issue_id == issue_id,
+        IssueEvent.project_id.in_(_owned_project_ids(current_user))
     )
+    if after is not None:
+        statement = statement.where(IssueEvent.id > after)
+    # Fetch one extra row to learn whether another page exists
+    statement = statement.order_by(IssueEvent.id).limit(limit + 1)
+    result = await session.scalars(statement)
+    events = result.all()
+    
+    if not events and after is None and current is None:
+        # Neither history nor the issue itself
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Issue not found"
+        )
+    if len(events) > limit:
+        events = events[:limit]
+        response.headers["X-Next-Cursor"] = str(events[-1].id)
+    
+    return [
+        IssueEventRead(
+            id=event.id,
+            issue_id=event.issue_id,
+            project_id=event.project_id,
+            actor_id=event.actor_id,
+            action=event.action,
+            changes=json.loads(event.changes) if event.changes is not None else None,
+            created_at=event.created_at
+        )
+        for event in events
+    ]
+
+async def _update_issues(session: AsyncSession, items: List[IssueBulkUpdate], user: User) -> dict:
+    """Apply the updates to issues ``user`` may touch; returns their projects by issue id"""
+    # Resolve which issues the user may touch (and their projects) at once
+    statement = select(Issue.id, Issue.project_id).where(
+        Issue.id.in_({item.id for item in items}),
+        Issue.project_id.in_(_owned_project_ids(user))
+    )
+    result = await session.execute(statement)
+    project_by_issue = dict(result.all())
+    
+    accepted = [item for item in items if item.id in project_by_issue]
+    if not accepted:
+        return project_by_issue
+    before = await load_counter_rows(session, project_by_issue)
+    # ORM bulk UPDATE by primary key: a single executemany
+    await session.execute(update(Issue), [item.model_dump() for item in accepted])
+    if before:
+        # Duplicate ids: only the last occurrence of each issue sticks
+        final = {item.id: item for item in accepted}
+        await record_issue_changes(session, before=before.values(), after=[
+            (project_by_issue[issue_id], item.status, item.priority, item.assignee_id)
+            for issue_id, item in final.items()
+        ])
+    await session.commit()
+    return project_by_issue
+
+@router.put("/bulk", response_model=List[IssueBulkResult])
+async def update_issues_bulk(
+    items: List[IssueBulkUpdate],
+    current_user: User = Depends(get_current_user)
+):
+    """Update many issues in one transaction (per shard)"""
+    _check_bulk_size(items)
+    
+    project_by_issue = {}
+    for shard, issue_ids in (await shards_for_issues(item.id for item in items)).items():
+        shard_issues = set(issue_ids)
+        async with shard_session(shard) as session:
+            project_by_issue.update(await _update_issues(
+                session, [item for item in items if item.id in shard_issues], current_user
+            ))
+    
+    accepted = [index for index, item in enumerate(items) if item.id in project_by_issue]
+    if accepted:
+        bump_board_version(*{project_by_issue[items[index].id] for index in accepted})
+        await record_issue_events([
+            issue_event(items[index].id, project_by_issue[items[index].id], current_user.id, "updated",
+                        _issue_changes(items[index]))
+            for index in accepted
+        ])
+    
+    results = []
+    for index, item in enumerate(items):
+        if item.id not in project_by_issue:
+            results.append(IssueBulkResult(index=index, ok=False, detail="Issue not found"))
+            continue
+        results.append(IssueBulkResult(
+            index=index,
+            ok=True,
+            issue=IssueRead(project_id=project_by_issue[item.id], **item.model_dump())
+        ))
+    await _publish_bulk("issues.updated", [result.issue for result in results if result.ok])
+    return results
 
 @router.put("/{issue_id}", response_model=IssueRead)
 async def update_issue(
     issue_id: int,
     issue_data: IssueCreate,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_issue_session),
     current_user: User = Depends(get_current_user)
 ):
     """Update an issue"""
-    # Get issue and verify user has access through project ownership
-    statement = select(Issue, Project).join(Project).where(
-        Issue.id == issue_id,
-        Project.owner_id == current_user.id
+    before = await load_counter_rows(session, [issue_id])
+    
+    # Ownership check, update and read-back in a single statement
+    statement = (
+        update(Issue)
+        .where(
+            Issue.id == issue_id,
+            Issue.project_id.in_(_owned_project_ids(current_user))
+        )
+        .values(
+            title=issue_data.title,
+            description=issue_data.description,
+            status=issue_data.status,
+            priority=issue_data.priority,
+            assignee_id=issue_data.assignee_id
+        )
+        .returning(Issue)
+        .execution_options(synchronize_session=False)
     )
-    result = await session.execute(statement)
-    issue_project = result.first()
+    result = await session.scalars(statement)
+    issue = result.first()
     
-    if not issue_project:
+    if not issue:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Issue not found"
         )
     
-    issue = issue_project[0]
+    await record_issue_changes(session, before=before.values(), after=[_counter_row(issue)])
+    await session.commit()
+    bump_board_version(issue.project_id)
     
-    # Update issue fields
-    issue.title = issue_data.title
-    issue.description = issue_data.description
-    issue.status = issue_data.status
-    issue.priority = issue_data.priority
-    issue.assignee_id = issue_data.assignee_id
+    await record_issue_events([
+        issue_event(issue.id, issue.project_id, current_user.id, "updated", _issue_changes(issue))
+    ])
+    issue_read = _to_issue_read(issue)
+    await publish_project_event(issue.project_id, "issue.updated", issue=issue_read.model_dump())
+    return issue_read
+
+async def _move_issues(session: AsyncSession, target_status: dict, user: User) -> dict:
+    """Move issues ``user`` may touch to their target columns; returns the
+    moved issues by id"""
+    ids_by_status = {}
+    for issue_id, new_status in target_status.items():
+        ids_by_status.setdefault(new_status, []).append(issue_id)
     
-    await session.commit()
-    await session.refresh(issue)
+    before = await load_counter_rows(session, target_status)
     
-    return IssueRead(
-        id=issue.id,
-        title=issue.title,
-        description=issue.description,
-        status=issue.status,
-        priority=issue.priority,
-        assignee_id=issue.assignee_id,
-        project_id=issue.project_id
-    )
+    # Issues changing column go to its end, in request order. One read gets
+    # their current columns and the end of every target column.
+    statuses = sorted(ids_by_status)
+    current_statement = select(
+        Issue.id, Issue.project_id, Issue.status,
+        *(last_rank(Issue.project_id, new_status) for new_status in statuses)
+    ).where(Issue.id.in_(target_status), Issue.project_id.in_(_owned_project_ids(user)))
+    current, tails = {}, {}
+    for issue_id, project_id, old_status, *column_tails in (await session.execute(current_statement)).all():
+        current[issue_id] = (project_id, old_status)
+        for new_status, tail in zip(statuses, column_tails):
+            tails[(project_id, new_status)] = tail
+    rows = [
+        {"id": issue_id, "project_id": current[issue_id][0], "status": new_status}
+        for issue_id, new_status in target_status.items()
+        if issue_id in current and current[issue_id][1] != new_status
+    ]
+    append_ranks(rows, tails)
+    rank_by_id = {row["id"]: row["rank"] for row in rows}
+    
+    # One multi-row UPDATE per target column; the ownership check is part of
+    # the WHERE clause and RETURNING reports exactly which rows moved.
+    updated = {}
+    for new_status, issue_ids in ids_by_status.items():
+        values = {"status": new_status}
+        column_ranks = {issue_id: rank_by_id[issue_id] for issue_id in issue_ids if issue_id in rank_by_id}
+        if column_ranks:
+            values["rank"] = case(column_ranks, value=Issue.id, else_=Issue.rank)
+        statement = (
+            update(Issue)
+            .where(
+                Issue.id.in_(issue_ids),
+                Issue.project_id.in_(_owned_project_ids(user))
+            )
+            .values(**values)
+            .returning(Issue)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.scalars(statement)
+        for issue in result.all():
+            updated[issue.id] = issue
+    if updated:
+        await record_issue_changes(
+            session,
+            before=[before[issue_id] for issue_id in updated if issue_id in before],
+            after=[_counter_row(issue) for issue in updated.values()]
+        )
+        await session.commit()
+        check_appended_ranks(rows)
+    return updated
+
+@router.patch("/bulk/status", response_model=List[IssueBulkResult])
+async def update_issues_status_bulk(
+    items: List[IssueStatusUpdate],
+    current_user: User = Depends(get_current_user)
+):
+    """Move many issues between columns in one transaction (per shard)"""
+    _check_bulk_size(items)
+    
+    # Last write wins when an issue appears more than once
+    target_status = {item.id: item.status for item in items}
+    updated = {}
+    for shard, issue_ids in (await shards_for_issues(target_status)).items():
+        async with shard_session(shard) as session:
+            updated.update(await _move_issues(
+                session, {issue_id: target_status[issue_id] for issue_id in issue_ids}, current_user
+            ))
+    if updated:
+        bump_board_version(*{issue.project_id for issue in updated.values()})
+        await record_issue_events([
+            issue_event(issue.id, issue.project_id, current_user.id, "status_changed", {"status": issue.status})
+            for issue in updated.values()
+        ])
+    
+    await _publish_bulk("issues.updated", [_to_issue_read(issue) for issue in updated.values()])
+    
+    return [
+        IssueBulkResult(index=index, ok=True, issue=_to_issue_read(updated[item.id]))
+        if item.id in updated
+        else IssueBulkResult(index=index, ok=False, detail="Issue not found")
+        for index, item in enumerate(items)
+    ]
 
 @router.patch("/{issue_id}/status")
 async def update_issue_status(
     issue_id: int,
     status_data: dict,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_issue_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Update just the status of an issue (for drag-and-drop)"""
-    # Get issue and verify user has access through project ownership
-    statement = select(Issue, Project).join(Project).where(
-        Issue.id == issue_id,
-        Project.owner_id == current_user.id
-    )
-    result = await session.execute(statement)
-    issue_project = result.first()
+    """Update the status of an issue and optionally its place in the column.
+
+    For drag-and-drop, ``after_id`` and/or ``before_id`` name the issues it
+    was dropped between; only the moved issue's rank is rewritten. Without
+    them an issue changing column goes to the end of the new one.
+    """
+    values = {"status": status_data.get("status", Issue.status)}
+    conditions = []
+    after_id = status_data.get("after_id")
+    before_id = status_data.get("before_id")
+    neighbour_ids = [neighbour for neighbour in (after_id, before_id) if neighbour is not None]
+    if neighbour_ids:
+        # Neighbours must be in the moved issue's (owned) project
+        moved_project = select(Issue.project_id).where(Issue.id == issue_id).scalar_subquery()
+        neighbour_statement = select(Issue.id, Issue.rank, Issue.project_id, Issue.status).where(
+            Issue.id.in_(neighbour_ids),
+            Issue.project_id == moved_project,
+            Issue.project_id.in_(_owned_project_ids(current_user))
+        )
+        neighbours = {row[0]: row for row in (await session.execute(neighbour_statement)).all()}
+        if any(neighbours.get(neighbour) is None or neighbours[neighbour][1] is None for neighbour in neighbour_ids):
+            raise await _stale_board_or_missing(session, issue_id, current_user)
+        try:
+            values["rank"] = rank_between(
+                neighbours[after_id][1] if after_id is not None else None,
+                neighbours[before_id][1] if before_id is not None else None
+            )
+        except ValueError:
+            # Out of order (stale view) or equal keys (concurrent moves)
+            _, _, project_id, neighbour_status = neighbours[neighbour_ids[0]]
+            schedule_rebalance(project_id, neighbour_status)
+            raise await _stale_board_or_missing(session, issue_id, current_user)
+        # Only write if no rebalance rewrote the neighbours in the meantime
+        neighbour = aliased(Issue)
+        conditions = [
+            select(neighbour.rank).where(neighbour.id == neighbour_id).scalar_subquery() == neighbours[neighbour_id][1]
+            for neighbour_id in neighbour_ids
+        ]
     
-    if not issue_project:
+    before = await load_counter_rows(session, [issue_id])
+    
+    # Ownership check and update in a single statement; a missing "status"
+    # key leaves the column unchanged.
+    if neighbour_ids or "status" not in status_data:
+        statement = (
+            update(Issue)
+            .where(
+                Issue.id == issue_id,
+                Issue.project_id.in_(_owned_project_ids(current_user)),
+                *conditions
+            )
+            .values(**values)
+            .returning(*COUNTER_COLUMNS, Issue.rank)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(statement)
+    else:
+        result = await session.execute(STATUS_CHANGE_STATEMENT, {
+            "b_id": issue_id, "b_owner_id": current_user.id, "b_status": values["status"]
+        })
+    row = result.first()
+    
+    if row is None:
+        if conditions:
+            raise await _stale_board_or_missing(session, issue_id, current_user)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Issue not found"
         )
     
-    issue = issue_project[0]
-    
-    # Update only the status
-    issue.status = status_data.get("status", issue.status)
-    
+    await record_issue_changes(session, before=before.values(), after=[tuple(row[:4])])
     await session.commit()
-    await session.refresh(issue)
+    project_id, new_status, rank = row[0], row[1], row[4]
+    bump_board_version(project_id)
+    check_rank_length(project_id, new_status, rank)
+    await record_issue_events([
+        issue_event(issue_id, project_id, current_user.id, "status_changed", {"status": new_status, "rank": rank})
+    ])
+    await publish_project_event(
+        project_id, "issue.status_changed", issue_id=issue_id, status=new_status, rank=rank
+    )
     
-    return {"message": "Issue status updated successfully"}
+    return {"message": "Issue status updated successfully", "rank": rank}
 
 @router.delete("/{issue_id}")
 async def delete_issue(
     issue_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_issue_session),
     current_user: User = Depends(get_current_user)
 ):
     """Delete an issue"""
-    # Get issue and verify user has access through project ownership
-    statement = select(Issue, Project).join(Project).where(
-        Issue.id == issue_id,
-        Project.owner_id == current_user.id
+    statement = (
+        delete(Issue)
+        .where(
+            Issue.id == issue_id,
+            Issue.project_id.in_(_owned_project_ids(current_user))
+        )
+        .returning(*COUNTER_COLUMNS)
+        .execution_options(synchronize_session=False)
     )
     result = await session.execute(statement)
-    issue_project = result.first()
+    row = result.first()
     
-    if not issue_project:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Issue not found"
         )
     
-    issue = issue_project[0]
-    
-    await session.delete(issue)
+    await record_issue_changes(session, before=[tuple(row)])
     await session.commit()
+    project_id = row[0]
+    bump_board_version(project_id)
+    await record_issue_events([issue_event(issue_id, project_id, current_user.id, "deleted")])
+    await publish_project_event(project_id, "issue.deleted", issue_id=issue_id)
     
     return {"message": "Issue deleted successfully"}
@@ -1,16 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlmodel import select
+from sqlalchemy import func, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from database import get_session
+from database import async_session_factory, get_session
+from replica import get_read_session
+from shards import (
+    SHARDED,
+    assign_issue_ids,
+    get_project_read_session,
+    get_project_session,
+    place_new_project,
+    update_project_copy,
+)
+from models.issue import Issue
 from models.project import Project
 from models.user import User
-from schemas.project import ProjectCreate, ProjectRead
+from schemas.issue import IssueImport
+from schemas.project import (
+    ImportLineError,
+    ProjectCreate,
+    ProjectDeletion,
+    ProjectImportResult,
+    ProjectListItem,
+    ProjectRead,
+    ProjectStats,
+)
 from auth import get_current_user
+from board_cache import bump_board_version
+from events import publish_project_event
+from stats import get_project_stats, list_project_summaries, list_sharded_project_summaries, record_issue_changes
+from purge import get_purge_job, purge_project, start_purge
+from ranking import append_ranks, check_appended_ranks
+from responses import FastJSONResponse, dumps, rows_to_dicts
+from routers.issue import ISSUE_READ_COLUMNS, ISSUE_READ_KEYS
 
 router = APIRouter()
 
+PROJECT_READ_KEYS = ("id", "name", "description", "owner_id")
+
+# Upper bound for a single page of the project list
+MAX_PROJECT_PAGE_SIZE = 500
+
+# Rows per server-side cursor fetch while exporting
+EXPORT_BATCH_SIZE = 1000
+# Rows per INSERT (and commit) while importing
+IMPORT_BATCH_SIZE = 1000
+# Longest accepted NDJSON line; guards the line buffer against unbounded input
+MAX_IMPORT_LINE_BYTES = 1024 * 1024
+# Line errors reported back in the import result
+MAX_IMPORT_ERRORS = 100
+
+async def _ensure_project_access(session: AsyncSession, project_id: int, user: User) -> None:
+    statement = select(Project.id).where(
+        Project.id == project_id,
+        Project.owner_id == user.id
+    )
+    result = await session.execute(statement)
+    
+    if result.first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
 @router.post("/", response_model=ProjectRead)
 async def create_project(
     project_data: ProjectCreate,
@@ -25,6 +82,10 @@ async def create_project(
     )
     
     session.add(project)
+    if SHARDED:
+        # The id picks the shard
+        await session.flush()
+        await place_new_project(session, project)
     await session.commit()
     await session.refresh(project)
     
@@ -35,27 +96,49 @@ async def create_project(
         owner_id=project.owner_id
     )
 
-@router.get("/", response_model=List[ProjectRead])
+@router.get("/", response_model=List[ProjectListItem])
 async def get_projects(
-    session: AsyncSession = Depends(get_session),
+    include: Optional[str] = Query(None, pattern="^summary$", description="summary: add issue counts per project"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PROJECT_PAGE_SIZE),
+    after: Optional[int] = Query(None, description="Return projects with an id greater than this cursor"),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all projects for the current user"""
-    statement = select(Project).where(Project.owner_id == current_user.id)
-    result = await session.execute(statement)
-    projects = result.scalars().all()
+    """Get all projects for the current user.
+
+    With ``limit`` the result is a keyset page ordered by id; when more
+    projects exist the id to pass as ``after`` for the next page is returned
+    in ``X-Next-Cursor``. ``include=summary`` adds each project's issue
+    total, per-status counts and last update, from the same single query.
+    """
+    statement = select(
+        Project.id, Project.name, Project.description, Project.owner_id
+    ).where(Project.owner_id == current_user.id)
+    if after is not None:
+        statement = statement.where(Project.id > after)
+    statement = statement.order_by(Project.id)
+    if limit is not None:
+        # Fetch one extra row to learn whether another page exists
+        statement = statement.limit(limit + 1)
     
-    return [ProjectRead(
-        id=project.id,
-        name=project.name,
-        description=project.description,
-        owner_id=project.owner_id
-    ) for project in projects]
+    if include == "summary" and SHARDED:
+        projects = await list_sharded_project_summaries(session, statement)
+    elif include == "summary":
+        projects = await list_project_summaries(session, statement.subquery())
+    else:
+        result = await session.execute(statement)
+        projects = rows_to_dicts(PROJECT_READ_KEYS, result.all())
+    
+    headers = {}
+    if limit is not None and len(projects) > limit:
+        projects = projects[:limit]
+        headers["X-Next-Cursor"] = str(projects[-1]["id"])
+    return FastJSONResponse(projects, headers=headers)
 
 @router.get("/{project_id}", response_model=ProjectRead)
 async def get_project(
     project_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific project"""
@@ -79,6 +162,133 @@ async def get_project(
         owner_id=project.owner_id
     )
 
+@router.get("/{project_id}/stats", response_model=ProjectStats)
+async def get_project_statistics(
+    project_id: int,
+    session: AsyncSession = Depends(get_project_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Issue counts per status, priority and assignee"""
+    await _ensure_project_access(session, project_id, current_user)
+    
+    return ProjectStats(**await get_project_stats(session, project_id))
+
+async def _stream_issues_ndjson(project_id: int, bind):
+    # The request's session is closed once the handler returns, so the
+    # stream runs on its own session (on the same engine) and server-side cursor.
+    async with async_session_factory(bind=bind) as session:
+        statement = (
+            select(*ISSUE_READ_COLUMNS)
+            .where(Issue.project_id == project_id)
+            .order_by(Issue.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        result = await session.stream(statement)
+        async for rows in result.partitions():
+            yield b"".join(dumps(dict(zip(ISSUE_READ_KEYS, row))) + b"\n" for row in rows)
+
+@router.get("/{project_id}/export")
+async def export_project(
+    project_id: int,
+    session: AsyncSession = Depends(get_project_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream every issue of the project as NDJSON, one issue per line"""
+    await _ensure_project_access(session, project_id, current_user)
+    
+    return StreamingResponse(
+        _stream_issues_ndjson(project_id, session.bind),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="project-{project_id}-issues.ndjson"'}
+    )
+
+@router.post("/{project_id}/import", response_model=ProjectImportResult)
+async def import_project(
+    project_id: int,
+    request: Request,
+    session: AsyncSession = Depends(get_project_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Import NDJSON issues (as produced by export) into the project.
+
+    The body is parsed as it arrives and written in committed batches of
+    IMPORT_BATCH_SIZE rows; the next chunk is only read once the previous
+    batch is stored, so memory stays flat regardless of upload size. Lines
+    that fail to parse are skipped and reported; batches already committed
+    stay imported if the upload is interrupted, and boards see them either
+    way.
+    """
+    await _ensure_project_access(session, project_id, current_user)
+    
+    imported = failed = line_number = 0
+    errors = []
+    batch = []
+    # Last rank of each column, so imported issues are appended in file order
+    tails = {}
+    
+    async def flush():
+        nonlocal imported
+        if not batch:
+            return
+        unknown = {row["status"] for row in batch} - {column_status for _, column_status in tails}
+        if unknown:
+            result = await session.execute(
+                select(Issue.status, func.max(Issue.rank))
+                .where(Issue.project_id == project_id, Issue.status.in_(unknown))
+                .group_by(Issue.status)
+            )
+            tails.update({(project_id, column_status): None for column_status in unknown})
+            tails.update({(project_id, column_status): rank for column_status, rank in result.all()})
+        append_ranks(batch, tails)
+        await assign_issue_ids(batch)
+        await session.execute(insert(Issue), batch)
+        await record_issue_changes(session, after=[
+            (project_id, row["status"], row["priority"], row["assignee_id"]) for row in batch
+        ])
+        await session.commit()
+        bump_board_version(project_id)
+        check_appended_ranks(batch)
+        imported += len(batch)
+        batch.clear()
+    
+    def parse(line: bytes):
+        nonlocal failed
+        try:
+            item = IssueImport.model_validate(json.loads(line))
+        except (ValueError, ValidationError) as exc:
+            failed += 1
+            if len(errors) < MAX_IMPORT_ERRORS:
+                errors.append(ImportLineError(line=line_number, detail=str(exc).splitlines()[0]))
+            return
+        batch.append({**item.model_dump(), "project_id": project_id})
+    
+    try:
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            if len(buffer) > MAX_IMPORT_LINE_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Line {line_number + len(lines) + 1} exceeds {MAX_IMPORT_LINE_BYTES} bytes"
+                )
+            for line in lines:
+                line_number += 1
+                if line.strip():
+                    parse(line)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    await flush()
+        if buffer.strip():
+            line_number += 1
+            parse(buffer)
+        await flush()
+    finally:
+        # Also when a later line fails or the client goes away
+        if imported:
+            await publish_project_event(project_id, "issues.imported", count=imported)
+    
+    return ProjectImportResult(imported=imported, failed=failed, errors=errors)
+
 @router.put("/{project_id}", response_model=ProjectRead)
 async def update_project(
     project_id: int,
@@ -87,12 +297,18 @@ async def update_project(
     current_user: User = Depends(get_current_user)
 ):
     """Update a project"""
-    statement = select(Project).where(
-        Project.id == project_id,
-        Project.owner_id == current_user.id
+    statement = (
+        update(Project)
+        .where(
+            Project.id == project_id,
+            Project.owner_id == current_user.id
+        )
+        .values(name=project_data.name, description=project_data.description)
+        .returning(Project)
+        .execution_options(synchronize_session=False)
     )
-    result = await session.execute(statement)
-    project = result.scalars().first()
+    result = await session.scalars(statement)
+    project = result.first()
     
     if not project:
         raise HTTPException(
@@ -100,11 +316,8 @@ async def update_project(
             detail="Project not found"
         )
     
-    project.name = project_data.name
-    project.description = project_data.description
-    
     await session.commit()
-    await session.refresh(project)
+    await update_project_copy(project)
     
     return ProjectRead(
         id=project.id,
@@ -116,24 +329,50 @@ async def update_project(
 @router.delete("/{project_id}")
 async def delete_project(
     project_id: int,
+    request: Request,
+    response: Response,
+    background: bool = Query(False, description="Return 202 at once and purge the issues in the background"),
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Delete a project"""
-    statement = select(Project).where(
-        Project.id == project_id,
-        Project.owner_id == current_user.id
-    )
-    result = await session.execute(statement)
-    project = result.scalars().first()
+    """Delete a project and all of its issues"""
+    job = get_purge_job(project_id)
+    in_progress = job is not None and job.active and job.owner_id == current_user.id
     
-    if not project:
+    if background:
+        if not in_progress:
+            await _ensure_project_access(session, project_id, current_user)
+            job = await start_purge(project_id, current_user.id)
+        response.status_code = status.HTTP_202_ACCEPTED
+        response.headers["Location"] = str(request.url_for("get_project_deletion", project_id=project_id))
+        return ProjectDeletion(**job.as_dict())
+    
+    if in_progress:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Project deletion already in progress"
+        )
+    
+    deleted = await purge_project(project_id, current_user.id)
+    if deleted is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
     
-    await session.delete(project)
-    await session.commit()
+    return {"message": "Project deleted successfully", "deleted_issues": deleted}
+
+@router.get("/{project_id}/deletion", response_model=ProjectDeletion)
+async def get_project_deletion(
+    project_id: int,
+    current_user: User = Depends(get_current_user)
+):
+    """Progress of a background project deletion"""
+    job = get_purge_job(project_id)
+    if job is None or job.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No deletion in progress for this project"
+        )
     
-    return {"message": "Project deleted successfully"}
+    return ProjectDeletion(**job.as_dict())
@@ -1,16 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from database import get_session
+from directory import clear_directory_cache, decode_directory_cursor, encode_directory_cursor, search_directory
+from replica import get_read_session
 from models.user import User
 from schemas.user import UserCreate, UserRead, UserLogin
 from auth import get_current_user
-from core.security import verify_password, get_password_hash, create_access_token
+from responses import FastJSONResponse, rows_to_dicts
+from core.security import (
+    PasswordHasherBusy,
+    create_access_token,
+    get_password_hash_async,
+    verify_password_async,
+)
 
 router = APIRouter()
 
+# Upper bound for a single page of the user directory
+MAX_DIRECTORY_PAGE_SIZE = 100
+
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/signup", response_model=dict)
 async def signup(user_data: UserCreate, session: AsyncSession = Depends(get_session)):
     """Register a new user"""
@@ -28,7 +46,10 @@ async def signup(user_data: UserCreate, session: AsyncSession = Depends(get_sess
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = await get_password_hash_async(user_data.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     user = User(
         username=user_data.username,
         email=user_data.email,
@@ -38,6 +59,7 @@ async def signup(user_data: UserCreate, session: AsyncSession = Depends(get_sess
     session.add(user)
     await session.commit()
     await session.refresh(user)
+    clear_directory_cache()
     
     # Create access token
     access_token = create_access_token(data={"sub": str(user.id)})
@@ -60,7 +82,14 @@ async def login(user_data: UserLogin, session: AsyncSession = Depends(get_sessio
     result = await session.execute(statement)
     user = result.scalars().first()
     
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    try:
+        password_ok = user is not None and await verify_password_async(
+            user_data.password, user.hashed_password
+        )
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -89,18 +118,44 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
         email=current_user.email
     )
 
+@router.get("/directory", response_model=List[UserRead])
+async def get_user_directory(
+    q: str = Query("", max_length=254, description="Prefix of the username or email (case-sensitive)"),
+    by: str = Query("username", pattern="^(username|email)$", description="Column the prefix applies to"),
+    limit: int = Query(20, ge=1, le=MAX_DIRECTORY_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Return users sorting after this cursor"),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Users whose ``by`` column starts with ``q``, ordered by that column.
+
+    When more users match, the value to pass as ``after`` for the next page
+    is returned in ``X-Next-Cursor``.
+    """
+    if after is not None:
+        try:
+            after = decode_directory_cursor(after)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    # Fetch one extra row to learn whether another page exists
+    users = await search_directory(session, by, q, limit + 1, after)
+    headers = {}
+    if len(users) > limit:
+        users = users[:limit]
+        headers["X-Next-Cursor"] = encode_directory_cursor(users[-1][by])
+    return FastJSONResponse(users, headers=headers)
+
 @router.get("/", response_model=List[UserRead])
 async def get_users(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
 ):
     """Get all users (protected route)"""
-    statement = select(User)
+    # Project only the public columns; hashed_password is never loaded
+    statement = select(User.id, User.username, User.email)
     result = await session.execute(statement)
-    users = result.scalars().all()
     
-    return [UserRead(
-        id=user.id,
-        username=user.username,
-        email=user.email
-    ) for user in users]
+    return FastJSONResponse(rows_to_dicts(("id", "username", "email"), result.all()))
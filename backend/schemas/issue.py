@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 class IssueCreate(BaseModel):
     title: str
@@ -17,3 +18,47 @@ class IssueRead(BaseModel):
     priority: str
     assignee_id: Optional[int]
     project_id: int
+    rank: Optional[str] = None
+
+class IssueBulkUpdate(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    status: str
+    priority: str
+    assignee_id: Optional[int] = None
+
+class IssueStatusUpdate(BaseModel):
+    id: int
+    status: str
+
+class IssueBulkResult(BaseModel):
+    index: int
+    ok: bool
+    issue: Optional[IssueRead] = None
+    detail: Optional[str] = None
+
+class IssueImport(BaseModel):
+    """One NDJSON line of a project import; ids and project_id are ignored"""
+    title: str
+    description: Optional[str] = None
+    status: str
+    priority: str
+    assignee_id: Optional[int] = None
+
+class IssueChanges(BaseModel):
+    """Delta of a board since a cursor. Apply ``deleted`` first, then upsert
+    ``issues``; pass ``cursor`` as ``since`` next time."""
+    cursor: int
+    issues: List[IssueRead]
+    deleted: List[int]  # ids of issues deleted from or moved out of the project
+    has_more: bool  # more changes past ``cursor``; fetch again right away
+
+class IssueEventRead(BaseModel):
+    id: int
+    issue_id: int
+    project_id: int
+    actor_id: int
+    action: str
+    changes: Optional[Dict[str, Any]]
+    created_at: datetime
@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 
 class ProjectCreate(BaseModel):
     name: str
@@ -10,3 +11,35 @@ class ProjectRead(BaseModel):
     name: str
     description: Optional[str]
     owner_id: int
+
+class ProjectSummary(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    last_updated: Optional[datetime]  # latest issue update, None without issues
+
+class ProjectListItem(ProjectRead):
+    summary: Optional[ProjectSummary] = None  # only with ?include=summary
+
+class ProjectStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    by_priority: Dict[str, int]
+    by_assignee: Dict[str, int]  # assignee id, or "unassigned"
+
+class ImportLineError(BaseModel):
+    line: int
+    detail: str
+
+class ProjectImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportLineError]  # first failures only
+
+class ProjectDeletion(BaseModel):
+    project_id: int
+    status: str  # "pending", "running", "done", "failed"
+    total: int  # issues in the project when the purge started
+    deleted: int
+    started_at: float
+    finished_at: Optional[float]
+    error: Optional[str]
@@ -0,0 +1,172 @@
+"""Full-text issue search.
+
+SQLite uses an external-content FTS5 table (``issue_fts``) kept in sync with
+``issue`` by triggers, so every write path (single, bulk, imports) updates the
+index in its own transaction. PostgreSQL uses a generated ``tsvector`` column
+with a GIN index. Results are ranked (title matches weigh more than
+description matches) and paginated with an opaque (score, id) keyset cursor.
+"""
+import base64
+import binascii
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from database import engine
+
+SQLITE_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS issue_fts USING fts5(
+        title, description, content='issue', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS issue_fts_ai AFTER INSERT ON issue BEGIN
+        INSERT INTO issue_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS issue_fts_ad AFTER DELETE ON issue BEGIN
+        INSERT INTO issue_fts(issue_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    # Status drags don't touch the text columns and skip the index entirely
+    """CREATE TRIGGER IF NOT EXISTS issue_fts_au AFTER UPDATE OF title, description ON issue BEGIN
+        INSERT INTO issue_fts(issue_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO issue_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+POSTGRES_SEARCH_DDL = [
+    """ALTER TABLE issue ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_issue_search_vector ON issue USING GIN (search_vector)",
+]
+
+_ISSUE_COLUMNS = (
+    "issue.id, issue.title, issue.description, issue.status, "
+    "issue.priority, issue.assignee_id, issue.project_id, issue.rank"
+)
+
+SQLITE_SEARCH_SQL = f"""
+SELECT * FROM (
+    SELECT {_ISSUE_COLUMNS}, -bm25(issue_fts, 2.0, 1.0) AS score
+    FROM issue_fts
+    JOIN issue ON issue.id = issue_fts.rowid
+    JOIN project ON project.id = issue.project_id
+    WHERE issue_fts MATCH :query AND project.owner_id = :owner_id {{project_filter}}
+) AS ranked
+{{cursor_filter}}
+ORDER BY score DESC, id
+LIMIT :limit
+"""
+
+POSTGRES_SEARCH_SQL = f"""
+SELECT * FROM (
+    SELECT {_ISSUE_COLUMNS},
+           ts_rank(issue.search_vector, websearch_to_tsquery('english', :query)) AS score
+    FROM issue
+    JOIN project ON project.id = issue.project_id
+    WHERE issue.search_vector @@ websearch_to_tsquery('english', :query)
+      AND project.owner_id = :owner_id {{project_filter}}
+) AS ranked
+{{cursor_filter}}
+ORDER BY score DESC, id
+LIMIT :limit
+"""
+
+def _is_postgres(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+async def install_search_index(target: AsyncEngine = engine) -> None:
+    """Create the search index and its sync machinery if missing"""
+    async with target.begin() as conn:
+        if _is_postgres(conn):
+            for statement in POSTGRES_SEARCH_DDL:
+                await conn.exec_driver_sql(statement)
+            return
+        existed = (await conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'issue_fts'"
+        )).first()
+        for statement in SQLITE_SEARCH_DDL:
+            await conn.exec_driver_sql(statement)
+        if not existed:
+            # Index issues written before search existed
+            await conn.exec_driver_sql("INSERT INTO issue_fts(issue_fts) VALUES ('rebuild')")
+
+def fts5_query(query: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: every word required, last as a prefix"""
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    terms = ['"{}"'.format(word) for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+def encode_cursor(score: float, issue_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{score!r}:{issue_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Raises ValueError for malformed cursors"""
+    try:
+        score, issue_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return float(score), int(issue_id)
+    except (UnicodeDecodeError, binascii.Error) as exc:
+        raise ValueError("invalid cursor") from exc
+
+async def search_issues(
+    session: AsyncSession,
+    owner_id: int,
+    query: str,
+    project_id: Optional[int] = None,
+    limit: int = 20,
+    after: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Ranked issues matching ``query`` in the owner's projects.
+
+    Returns the page and the cursor for the next one (None on the last page).
+    """
+    postgres = _is_postgres(session.bind)
+    if not postgres:
+        query = fts5_query(query)
+        if query is None:
+            return [], None
+
+    params = {"query": query, "owner_id": owner_id, "limit": limit + 1}
+    project_filter = cursor_filter = ""
+    if project_id is not None:
+        project_filter = "AND issue.project_id = :project_id"
+        params["project_id"] = project_id
+    if after is not None:
+        params["after_score"], params["after_id"] = decode_cursor(after)
+        cursor_filter = "WHERE score < :after_score OR (score = :after_score AND id > :after_id)"
+
+    sql = POSTGRES_SEARCH_SQL if postgres else SQLITE_SEARCH_SQL
+    statement = text(sql.format(project_filter=project_filter, cursor_filter=cursor_filter))
+    result = await session.execute(statement, params)
+    rows = [dict(row) for row in result.mappings().all()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["score"], rows[-1]["id"])
+    return rows, next_cursor
+
+def merge_search_pages(pages: List[Tuple[List[dict], Optional[str]]], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """One page from the pages of the same search run on several shards.
+
+    Each shard returns its own best ``limit`` matches past the cursor, so the
+    best ``limit`` of their union are the best overall. Scores are computed
+    per shard (bm25 weighs words by how rare they are on that shard), so the
+    order across shards is close to, not exactly, what one database gives.
+    """
+    rows = sorted((row for page, _ in pages for row in page), key=lambda row: (-row["score"], row["id"]))
+    has_more = len(rows) > limit or any(next_cursor is not None for _, next_cursor in pages)
+    rows = rows[:limit]
+    if not has_more or not rows:
+        return rows, None
+    return rows, encode_cursor(rows[-1]["score"], rows[-1]["id"])
@@ -0,0 +1,319 @@
+"""Horizontal partitioning of issues by project.
+
+SHARD_URLS lists the databases ("shards") that hold issues. All of a
+project's issue data lives on one shard: issues, counters, tombstones and
+the search index. Users, projects and issue history stay in the main
+database (DATABASE_URL). That database also keeps the shard map:
+``project.shard`` is the index into SHARD_URLS of the project's shard. New
+projects are placed on ``id % N``, and ``rebalance_shards.py`` moves them
+later. Each shard holds a copy of its projects' rows, so ownership checks
+in issue queries and the change tracking triggers stay within one database.
+
+Issue handlers take their session from ``get_project_session`` or
+``get_issue_session`` (and the read variants). The shard map is cached per
+process for SHARD_MAP_CACHE_TTL seconds. An issue is found by id by asking
+every shard once and remembering its project. Issue ids come in blocks from
+the main database, so they are unique across shards and survive a move.
+Handlers that see several projects at once (bulk writes, search, project
+summaries) group the work by shard. Bulk writes are then atomic per shard,
+not across shards.
+
+Without SHARD_URLS the main database is the only shard and all of this
+passes straight through: no lookups, no extra statements, and reads still
+use the read replica. When sharding existing data, list DATABASE_URL first:
+existing projects are on shard 0, which is where their issues already are.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+from fastapi import Request
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from cache import LRUCache
+from database import DATABASE_URL, async_session_factory, build_engine, engine
+from models.id_block import IdBlock
+from models.issue import Issue
+from models.issue_event import IssueEvent
+from models.issue_tombstone import IssueTombstone
+from models.project import Project
+from replica import read_session
+
+# Comma-separated database URLs; unset keeps every issue in DATABASE_URL
+SHARD_URLS = [url.strip() for url in os.getenv("SHARD_URLS", "").split(",") if url.strip()]
+# How long a worker trusts its cached project -> shard entries, in seconds.
+# After a project moves, workers may send it to the old shard (and answer
+# 404) for up to this long.
+SHARD_MAP_CACHE_TTL = float(os.getenv("SHARD_MAP_CACHE_TTL", 30))
+SHARD_MAP_CACHE_SIZE = int(os.getenv("SHARD_MAP_CACHE_SIZE", 100000))
+# Issue -> project entries; an issue never changes project
+SHARD_ISSUE_CACHE_SIZE = int(os.getenv("SHARD_ISSUE_CACHE_SIZE", 1000000))
+# Issue ids reserved from the main database at a time, per worker
+SHARD_ID_BLOCK_SIZE = int(os.getenv("SHARD_ID_BLOCK_SIZE", 1000))
+
+shard_engines: List[AsyncEngine] = [
+    engine if url == DATABASE_URL else build_engine(url) for url in SHARD_URLS
+] or [engine]
+shard_session_factories = [
+    async_session_factory if shard is engine else sessionmaker(shard, class_=AsyncSession, expire_on_commit=False)
+    for shard in shard_engines
+]
+# False when the main database is the only shard
+SHARDED = any(shard is not engine for shard in shard_engines)
+
+T = TypeVar("T")
+
+_project_shards = LRUCache(SHARD_MAP_CACHE_SIZE, ttl=SHARD_MAP_CACHE_TTL)
+_issue_projects = LRUCache(SHARD_ISSUE_CACHE_SIZE)
+
+def place_project(project_id: int) -> int:
+    """Shard for a new project"""
+    return project_id % len(shard_engines)
+
+def is_main(shard: int) -> bool:
+    return shard_engines[shard] is engine
+
+def shard_session(shard: int) -> AsyncSession:
+    if not 0 <= shard < len(shard_engines):
+        raise RuntimeError(f"Shard {shard} is not configured; SHARD_URLS lists {len(shard_engines)}")
+    return shard_session_factories[shard]()
+
+async def project_shards(project_ids: Iterable[int]) -> Dict[int, int]:
+    """Shard of each existing project among ``project_ids``"""
+    if not SHARDED:
+        return {project_id: 0 for project_id in project_ids}
+    found, missing = {}, []
+    for project_id in set(project_ids):
+        shard = _project_shards.get(project_id)
+        if shard is None:
+            missing.append(project_id)
+        else:
+            found[project_id] = shard
+    if missing:
+        async with async_session_factory() as session:
+            result = await session.execute(select(Project.id, Project.shard).where(Project.id.in_(missing)))
+        for project_id, shard in result.all():
+            _project_shards.set(project_id, shard)
+            found[project_id] = shard
+    return found
+
+def forget_project(project_id: int) -> None:
+    _project_shards.pop(project_id)
+
+async def _issue_projects_on(shard: int, issue_ids: List[int]) -> list:
+    async with shard_session(shard) as session:
+        result = await session.execute(select(Issue.id, Issue.project_id).where(Issue.id.in_(issue_ids)))
+        return result.all()
+
+async def issue_projects(issue_ids: Iterable[int]) -> Dict[int, int]:
+    """Project of each existing issue among ``issue_ids``, asking every shard
+    about the ones not seen before"""
+    found, missing = {}, []
+    for issue_id in set(issue_ids):
+        project_id = _issue_projects.get(issue_id)
+        if project_id is None:
+            missing.append(issue_id)
+        else:
+            found[issue_id] = project_id
+    if missing:
+        results = await asyncio.gather(*(
+            _issue_projects_on(shard, missing) for shard in range(len(shard_engines))
+        ))
+        for rows in results:
+            for issue_id, project_id in rows:
+                _issue_projects.set(issue_id, project_id)
+                found[issue_id] = project_id
+    return found
+
+async def shards_for_projects(project_ids: Iterable[int]) -> Dict[int, List[int]]:
+    """``project_ids`` grouped by shard; unknown projects go to shard 0,
+    where the usual ownership checks turn them away"""
+    project_ids = list(dict.fromkeys(project_ids))
+    shards = await project_shards(project_ids)
+    grouped = {}
+    for project_id in project_ids:
+        grouped.setdefault(shards.get(project_id, 0), []).append(project_id)
+    return grouped
+
+async def shards_for_issues(issue_ids: Iterable[int]) -> Dict[int, List[int]]:
+    """``issue_ids`` grouped by shard, unknown issues on shard 0"""
+    issue_ids = list(dict.fromkeys(issue_ids))
+    if not SHARDED:
+        return {0: issue_ids} if issue_ids else {}
+    projects = await issue_projects(issue_ids)
+    shards = await project_shards(projects.values())
+    grouped = {}
+    for issue_id in issue_ids:
+        grouped.setdefault(shards.get(projects.get(issue_id), 0), []).append(issue_id)
+    return grouped
+
+async def project_shard(project_id: int) -> int:
+    """Shard of one project, 0 if there is no such project"""
+    return (await project_shards([project_id])).get(project_id, 0)
+
+async def issue_shard(issue_id: int) -> int:
+    """Shard of one issue, 0 if there is no such issue"""
+    if not SHARDED:
+        return 0
+    project_id = (await issue_projects([issue_id])).get(issue_id)
+    return 0 if project_id is None else await project_shard(project_id)
+
+@asynccontextmanager
+async def project_session(project_id: int) -> AsyncGenerator[AsyncSession, None]:
+    """Session on the shard holding ``project_id``"""
+    async with shard_session(await project_shard(project_id)) as session:
+        yield session
+
+async def get_project_session(project_id: int) -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for handlers with a ``project_id`` path parameter"""
+    async with project_session(project_id) as session:
+        yield session
+
+async def get_project_read_session(project_id: int, request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Read-only variant; may use the replica when not sharded"""
+    if not SHARDED:
+        async with read_session(request.scope) as session:
+            yield session
+        return
+    async with shard_session(await project_shard(project_id)) as session:
+        yield session
+
+async def get_issue_session(issue_id: int) -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for handlers with an ``issue_id`` path parameter"""
+    async with shard_session(await issue_shard(issue_id)) as session:
+        yield session
+
+async def get_issue_read_session(issue_id: int, request: Request) -> AsyncGenerator[AsyncSession, None]:
+    if not SHARDED:
+        async with read_session(request.scope) as session:
+            yield session
+        return
+    async with shard_session(await issue_shard(issue_id)) as session:
+        yield session
+
+async def on_shards(work: Callable[[AsyncSession, int], Awaitable[T]],
+                    shards: Optional[Iterable[int]] = None) -> List[T]:
+    """``await work(session, shard)`` on each of ``shards`` (default all) concurrently"""
+    async def run(shard: int) -> T:
+        async with shard_session(shard) as session:
+            return await work(session, shard)
+    return await asyncio.gather(*(run(shard) for shard in (range(len(shard_engines)) if shards is None else shards)))
+
+class IdAllocator:
+    """Hands out ids from blocks reserved in the main database's ``id_block``
+    table, so ids are unique across shards without coordinating per row"""
+
+    def __init__(self, name: str, block_size: int = SHARD_ID_BLOCK_SIZE):
+        self.name = name
+        self.block_size = block_size
+        self.blocks = 0
+        self._next = self._end = 0
+        self._lock = asyncio.Lock()
+
+    async def _reserve(self, size: int) -> None:
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                update(IdBlock)
+                .where(IdBlock.name == self.name)
+                .values(next_id=IdBlock.next_id + size)
+                .returning(IdBlock.next_id)
+            )
+            end = result.scalar_one_or_none()
+        if end is None:
+            raise RuntimeError(f"No {self.name!r} id block; run `python migrate.py` after setting SHARD_URLS")
+        self._next, self._end = end - size, end
+        self.blocks += 1
+
+    async def take(self, count: int) -> List[int]:
+        """``count`` new ids in ascending order"""
+        ids = []
+        async with self._lock:
+            while len(ids) < count:
+                if self._next >= self._end:
+                    await self._reserve(max(self.block_size, count - len(ids)))
+                taken = min(count - len(ids), self._end - self._next)
+                ids.extend(range(self._next, self._next + taken))
+                self._next += taken
+        return ids
+
+issue_ids = IdAllocator("issue")
+
+async def new_issue_id(project_id: int) -> Optional[int]:
+    """Id for one new issue when sharded; None lets the database assign it"""
+    if not SHARDED:
+        return None
+    issue_id = (await issue_ids.take(1))[0]
+    # This worker then never has to look for it
+    _issue_projects.set(issue_id, project_id)
+    return issue_id
+
+async def assign_issue_ids(rows: List[dict]) -> None:
+    """Give new issue rows their ids up front when sharded; otherwise the
+    database assigns them"""
+    if SHARDED and rows:
+        for row, issue_id in zip(rows, await issue_ids.take(len(rows))):
+            row["id"] = issue_id
+            _issue_projects.set(issue_id, row["project_id"])
+
+async def ensure_id_blocks() -> None:
+    """Start the issue id sequence above every id in use on any shard or in
+    history, so ids handed out by the allocator are never reused"""
+    highest = 0
+    for shard in shard_engines:
+        async with shard.connect() as conn:
+            for column in (Issue.id, IssueTombstone.issue_id):
+                highest = max(highest, (await conn.execute(select(func.max(column)))).scalar() or 0)
+    async with engine.begin() as conn:
+        highest = max(highest, (await conn.execute(select(func.max(IssueEvent.issue_id)))).scalar() or 0)
+        current = (await conn.execute(
+            select(IdBlock.next_id).where(IdBlock.name == issue_ids.name)
+        )).scalar_one_or_none()
+        if current is None:
+            await conn.execute(insert(IdBlock).values(name=issue_ids.name, next_id=highest + 1))
+        elif current <= highest:
+            await conn.execute(
+                update(IdBlock).where(IdBlock.name == issue_ids.name).values(next_id=highest + 1)
+            )
+
+async def place_new_project(session: AsyncSession, project: Project) -> None:
+    """Assign a just-flushed project to its shard and write the shard's copy
+    of its row. The copy is committed first; the caller's commit then makes
+    the project visible."""
+    if not SHARDED:
+        return
+    project.shard = place_project(project.id)
+    if not is_main(project.shard):
+        async with shard_session(project.shard) as shard:
+            await shard.execute(insert(Project).values(
+                id=project.id, name=project.name, description=project.description,
+                owner_id=project.owner_id, shard=project.shard
+            ))
+            await shard.commit()
+    _project_shards.set(project.id, project.shard)
+
+async def update_project_copy(project: Project) -> None:
+    """Carry a renamed project over to its shard's copy"""
+    if not SHARDED or is_main(project.shard):
+        return
+    async with shard_session(project.shard) as shard:
+        await shard.execute(
+            update(Project)
+            .where(Project.id == project.id)
+            .values(name=project.name, description=project.description)
+        )
+        await shard.commit()
+
+def shard_stats() -> dict:
+    return {
+        "shards": len(shard_engines),
+        "map_cache_size": len(_project_shards),
+        "map_cache_hits": _project_shards.stats()["hits"],
+        "map_cache_misses": _project_shards.stats()["misses"],
+        "issue_cache_size": len(_issue_projects),
+        "issue_cache_hits": _issue_projects.stats()["hits"],
+        "issue_cache_misses": _issue_projects.stats()["misses"],
+        "id_blocks_reserved": issue_ids.blocks,
+    }
@@ -0,0 +1,259 @@
+"""Per-project issue statistics.
+
+Stats are computed with one GROUP BY over the project's issues. With
+ISSUE_STATS_COUNTERS enabled, issue writes also maintain ``issue_counter``
+rows inside their own transaction and stats are read from those instead,
+costing O(distinct column values) rather than O(issues). The setting is
+part of the schema fingerprint, so turning counters on runs migrate.py,
+which rebuilds them from the issues: writes made while they were off
+aren't counted.
+"""
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import String, and_, cast, delete, false, func, literal, select, true, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import aliased
+
+from database import engine
+from models.issue import Issue
+from models.issue_counter import IssueCounter
+from models.project import Project
+from shards import on_shards
+
+ISSUE_STATS_COUNTERS = os.getenv("ISSUE_STATS_COUNTERS", "false").strip().lower() in ("1", "true", "yes", "on")
+
+UNASSIGNED = "unassigned"
+
+# (project_id, status, priority, assignee_id) of one issue
+CounterRow = Tuple[int, str, str, Optional[int]]
+
+COUNTER_COLUMNS = (Issue.project_id, Issue.status, Issue.priority, Issue.assignee_id)
+
+def _counter_keys(row: CounterRow):
+    project_id, status, priority, assignee_id = row
+    return (
+        (project_id, "status", status),
+        (project_id, "priority", priority),
+        (project_id, "assignee", "" if assignee_id is None else str(assignee_id)),
+    )
+
+def _empty_stats() -> dict:
+    return {"total": 0, "by_status": {}, "by_priority": {}, "by_assignee": {}}
+
+def _add(stats: dict, dimension: str, value: str, count: int) -> None:
+    if dimension == "status":
+        stats["by_status"][value] = stats["by_status"].get(value, 0) + count
+        stats["total"] += count
+    elif dimension == "priority":
+        stats["by_priority"][value] = stats["by_priority"].get(value, 0) + count
+    else:
+        key = value or UNASSIGNED
+        stats["by_assignee"][key] = stats["by_assignee"].get(key, 0) + count
+
+async def compute_project_stats(session: AsyncSession, project_id: int) -> dict:
+    """Aggregate stats with a single GROUP BY over the project's issues"""
+    statement = (
+        select(Issue.status, Issue.priority, Issue.assignee_id, func.count())
+        .where(Issue.project_id == project_id)
+        .group_by(Issue.status, Issue.priority, Issue.assignee_id)
+    )
+    result = await session.execute(statement)
+    stats = _empty_stats()
+    for status, priority, assignee_id, count in result.all():
+        for _, dimension, value in _counter_keys((project_id, status, priority, assignee_id)):
+            _add(stats, dimension, value, count)
+    return stats
+
+async def read_counter_stats(session: AsyncSession, project_id: int) -> dict:
+    statement = select(IssueCounter.dimension, IssueCounter.value, IssueCounter.count).where(
+        IssueCounter.project_id == project_id,
+        IssueCounter.count != 0
+    )
+    result = await session.execute(statement)
+    stats = _empty_stats()
+    for dimension, value, count in result.all():
+        _add(stats, dimension, value, count)
+    return stats
+
+async def get_project_stats(session: AsyncSession, project_id: int) -> dict:
+    if ISSUE_STATS_COUNTERS:
+        return await read_counter_stats(session, project_id)
+    return await compute_project_stats(session, project_id)
+
+async def list_project_summaries(session: AsyncSession, page) -> List[dict]:
+    """Projects of ``page`` (a subquery of id, name, description, owner_id),
+    each with its issue ``summary``, in one statement ordered by id.
+
+    Counts come from the counter table when counters are enabled and from a
+    GROUP BY over the page's issues otherwise; the last update is an index
+    seek per project either way.
+    """
+    project_columns = (page.c.id, page.c.name, page.c.description, page.c.owner_id)
+    # Aliased so the join below doesn't correlate the subquery's own table
+    updated_issue = aliased(Issue)
+    last_updated = (
+        select(func.max(updated_issue.updated_at))
+        .where(updated_issue.project_id == page.c.id)
+        .correlate(page)
+        .scalar_subquery()
+    )
+    if ISSUE_STATS_COUNTERS:
+        statement = select(*project_columns, IssueCounter.value, IssueCounter.count, last_updated).select_from(
+            page.outerjoin(IssueCounter, and_(
+                IssueCounter.project_id == page.c.id,
+                IssueCounter.dimension == "status"
+            ))
+        )
+    else:
+        statement = (
+            select(*project_columns, Issue.status, func.count(Issue.id), last_updated)
+            .select_from(page.outerjoin(Issue, Issue.project_id == page.c.id))
+            .group_by(*project_columns, Issue.status)
+        )
+    result = await session.execute(statement.order_by(page.c.id))
+    
+    projects = {}
+    for project_id, name, description, owner_id, status, count, updated in result.all():
+        project = projects.get(project_id)
+        if project is None:
+            project = projects[project_id] = {
+                "id": project_id,
+                "name": name,
+                "description": description,
+                "owner_id": owner_id,
+                "summary": {
+                    "total": 0,
+                    "by_status": {},
+                    "last_updated": updated.isoformat() if updated is not None else None,
+                },
+            }
+        if status is not None and count:
+            project["summary"]["by_status"][status] = count
+            project["summary"]["total"] += count
+    return list(projects.values())
+
+async def list_sharded_project_summaries(session: AsyncSession, page) -> List[dict]:
+    """``list_project_summaries`` with issues on shards.
+
+    ``page`` (a select of id, name, description, owner_id) is read from the
+    main database. Each shard holding some of its projects then summarizes
+    them with one statement, all shards at once.
+    """
+    result = await session.execute(page.add_columns(Project.shard))
+    projects, by_shard = [], {}
+    for project_id, name, description, owner_id, shard in result.all():
+        projects.append({
+            "id": project_id,
+            "name": name,
+            "description": description,
+            "owner_id": owner_id,
+            "summary": {"total": 0, "by_status": {}, "last_updated": None},
+        })
+        by_shard.setdefault(shard, []).append(project_id)
+    
+    async def summarize(shard_session: AsyncSession, shard: int) -> List[dict]:
+        shard_page = select(Project.id, Project.name, Project.description, Project.owner_id).where(
+            Project.id.in_(by_shard[shard])
+        )
+        return await list_project_summaries(shard_session, shard_page.subquery())
+    
+    summaries = {
+        project["id"]: project["summary"]
+        for shard_projects in await on_shards(summarize, by_shard)
+        for project in shard_projects
+    }
+    for project in projects:
+        project["summary"] = summaries.get(project["id"], project["summary"])
+    return projects
+
+async def load_counter_rows(session: AsyncSession, issue_ids: Iterable[int]) -> Dict[int, CounterRow]:
+    """Current counted columns of the given issues, read before changing them.
+
+    The rows stay locked until the caller commits, so no concurrent write can
+    change them between this read and the caller's UPDATE. Returns nothing
+    when counters are disabled so write paths stay at their single-statement
+    budget.
+    """
+    if not ISSUE_STATS_COUNTERS:
+        return {}
+    statement = select(Issue.id, *COUNTER_COLUMNS).where(Issue.id.in_(list(issue_ids)))
+    if session.bind.dialect.name == "postgresql":
+        statement = statement.with_for_update()
+    else:
+        # SQLite has no row locks, and pysqlite only opens a transaction at
+        # the first write. A write matching no rows takes the database write
+        # lock, like BEGIN IMMEDIATE.
+        counters = IssueCounter.__table__
+        await session.execute(update(counters).where(false()).values(count=counters.c.count))
+    result = await session.execute(statement)
+    return {row[0]: tuple(row[1:]) for row in result.all()}
+
+async def record_issue_changes(
+    session: AsyncSession,
+    before: Iterable[CounterRow] = (),
+    after: Iterable[CounterRow] = ()
+) -> None:
+    """Apply counter deltas for issues going from ``before`` to ``after``.
+
+    Runs in the caller's transaction as one multi-row upsert.
+    """
+    if not ISSUE_STATS_COUNTERS:
+        return
+    deltas = {}
+    for sign, rows in ((-1, before), (1, after)):
+        for row in rows:
+            for key in _counter_keys(row):
+                deltas[key] = deltas.get(key, 0) + sign
+    params = [
+        {"project_id": project_id, "dimension": dimension, "value": value, "count": delta}
+        for (project_id, dimension, value), delta in deltas.items()
+        if delta
+    ]
+    if not params:
+        return
+    dialect = postgresql if session.bind.dialect.name == "postgresql" else sqlite
+    table = IssueCounter.__table__
+    statement = dialect.insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.project_id, table.c.dimension, table.c.value],
+        set_={"count": table.c.count + statement.excluded.count},
+    )
+    await session.execute(statement, params)
+
+async def delete_project_counters(session: AsyncSession, project_id: int) -> None:
+    if ISSUE_STATS_COUNTERS:
+        await session.execute(delete(IssueCounter).where(IssueCounter.project_id == project_id))
+
+async def rebuild_counters(connection, project_id: Optional[int] = None) -> None:
+    """Recompute counter rows from the issue table with INSERT ... SELECT"""
+    table = IssueCounter.__table__
+    condition = true() if project_id is None else Issue.project_id == project_id
+    await connection.execute(delete(table).where(
+        true() if project_id is None else table.c.project_id == project_id
+    ))
+    for dimension, column in (
+        ("status", Issue.status),
+        ("priority", Issue.priority),
+        ("assignee", func.coalesce(cast(Issue.assignee_id, String), "")),
+    ):
+        grouped = (
+            select(Issue.project_id, literal(dimension), column, func.count())
+            .where(condition)
+            .group_by(Issue.project_id, column)
+        )
+        await connection.execute(
+            table.insert().from_select(["project_id", "dimension", "value", "count"], grouped)
+        )
+
+async def ensure_counters(target: AsyncEngine = engine) -> None:
+    """Rebuild the counter table when counters are enabled.
+
+    Counters may have been turned off and on again since they were last
+    built, so existing rows can't be trusted.
+    """
+    if not ISSUE_STATS_COUNTERS:
+        return
+    async with target.begin() as conn:
+        await rebuild_counters(conn)
@@ -1,4 +1,7 @@
+import asyncio
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -7,8 +10,21 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your_secret_key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
 
+# bcrypt runs off the event loop in a bounded pool: "thread" (bcrypt releases
+# the GIL), "process", or "inline" to hash on the calling thread.
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 64))
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing pool has no room for more work"""
+
+_hash_executor = None
+_hash_pending = 0
+_hash_pending_lock = threading.Lock()
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -27,3 +43,59 @@ def decode_access_token(token: str):
         return payload
     except JWTError:
         return None
+
+def _get_hash_executor():
+    global _hash_executor
+    if _hash_executor is None:
+        if PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        else:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+            )
+    return _hash_executor
+
+async def _run_hasher(func, *args):
+    global _hash_pending
+    if PASSWORD_HASH_EXECUTOR == "inline":
+        return func(*args)
+    # Running plus queued jobs; shed instead of letting the backlog grow
+    if _hash_pending >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE:
+        raise PasswordHasherBusy()
+    with _hash_pending_lock:
+        _hash_pending += 1
+    try:
+        future = _get_hash_executor().submit(func, *args)
+    except BaseException:
+        _hash_job_done(None)
+        raise
+    # Counted until the job itself finishes: a cancelled request leaves
+    # bcrypt running, so the caller returning doesn't free a slot
+    future.add_done_callback(_hash_job_done)
+    return await asyncio.wrap_future(future)
+
+def _hash_job_done(future):
+    # Runs on the worker (or pool management) thread
+    global _hash_pending
+    with _hash_pending_lock:
+        _hash_pending -= 1
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_hasher(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await _run_hasher(get_password_hash, password)
+
+def password_hasher_stats():
+    return {
+        "executor": PASSWORD_HASH_EXECUTOR,
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_queue": PASSWORD_HASH_MAX_QUEUE,
+        "pending": _hash_pending,
+    }
+
+def shutdown_password_hasher():
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
@@ -6,17 +6,30 @@ interface KanbanBoardProps {
   issues: any[];
   onEdit: (issue: any) => void;
   onDelete: (issueId: number) => void;
-  moveIssue: (issueId: number, status: string) => void;
+  moveIssue: (issueId: number, status: string, placement?: { after_id?: number; before_id?: number }) => void;
 }
 
+// Column order: fractional rank, then id for issues created before ranking
+const byRank = (a: any, b: any) => {
+  const rankA = a.rank ?? "";
+  const rankB = b.rank ?? "";
+  if (rankA !== rankB) return rankA < rankB ? -1 : 1;
+  return a.id - b.id;
+};
+
 const KanbanBoard: React.FC<KanbanBoardProps> = ({ issues, onEdit, onDelete, moveIssue }) => {
+  const column = (status: string) => issues.filter(issue => issue.status === status).sort(byRank);
+
   const onDrop = (status: string, item: { id: number }) => {
-    moveIssue(item.id, status);
+    // Dropping on a column places the issue at its end
+    const others = column(status).filter(issue => issue.id !== item.id);
+    const last = others[others.length - 1];
+    moveIssue(item.id, status, last ? { after_id: last.id } : {});
   };
 
-  const [, dropToDo] = useDrop(() => ({ accept: "issue", drop: (item: any) => onDrop("To Do", item) }));
-  const [, dropInProgress] = useDrop(() => ({ accept: "issue", drop: (item: any) => onDrop("In Progress", item) }));
-  const [, dropDone] = useDrop(() => ({ accept: "issue", drop: (item: any) => onDrop("Done", item) }));
+  const [, dropToDo] = useDrop(() => ({ accept: "issue", drop: (item: any) => onDrop("To Do", item) }), [issues]);
+  const [, dropInProgress] = useDrop(() => ({ accept: "issue", drop: (item: any) => onDrop("In Progress", item) }), [issues]);
+  const [, dropDone] = useDrop(() => ({ accept: "issue", drop: (item: any) => onDrop("Done", item) }), [issues]);
 
   return (
     <div className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 xl:px-12 py-8">
@@ -27,7 +40,7 @@ const KanbanBoard: React.FC<KanbanBoardProps> = ({ issues, onEdit, onDelete, mov
             To Do
           </h3>
           <div className="space-y-3 lg:space-y-4">
-            {issues.filter(issue => issue.status === "To Do").map(issue => (
+            {column("To Do").map(issue => (
               <IssueCard key={issue.id} issue={issue} onEdit={onEdit} onDelete={onDelete} />
             ))}
           </div>
@@ -38,7 +51,7 @@ const KanbanBoard: React.FC<KanbanBoardProps> = ({ issues, onEdit, onDelete, mov
             In Progress
           </h3>
           <div className="space-y-3 lg:space-y-4">
-            {issues.filter(issue => issue.status === "In Progress").map(issue => (
+            {column("In Progress").map(issue => (
               <IssueCard key={issue.id} issue={issue} onEdit={onEdit} onDelete={onDelete} />
             ))}
           </div>
@@ -49,7 +62,7 @@ const KanbanBoard: React.FC<KanbanBoardProps> = ({ issues, onEdit, onDelete, mov
             Done
           </h3>
           <div className="space-y-3 lg:space-y-4">
-            {issues.filter(issue => issue.status === "Done").map(issue => (
+            {column("Done").map(issue => (
               <IssueCard key={issue.id} issue={issue} onEdit={onEdit} onDelete={onDelete} />
             ))}
           </div>
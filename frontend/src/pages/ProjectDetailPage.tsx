@@ -19,6 +19,7 @@ const ProjectDetailPage: React.FC = () => {
     isLoading,
     error,
     fetchIssues,
+    syncIssues,
     createIssue,
     updateIssue,
     deleteIssue,
@@ -36,6 +37,16 @@ const ProjectDetailPage: React.FC = () => {
     }
   }, [projectId, fetchProject, fetchIssues]);
 
+  // Catch up on changes made elsewhere when the tab is shown again
+  useEffect(() => {
+    if (!projectId) return;
+    const onVisible = () => {
+      if (document.visibilityState === "visible") syncIssues(projectId);
+    };
+    document.addEventListener("visibilitychange", onVisible);
+    return () => document.removeEventListener("visibilitychange", onVisible);
+  }, [projectId, syncIssues]);
+
   const handleEdit = (issue: any) => {
     setEditingIssue(issue);
     setShowModal(true);
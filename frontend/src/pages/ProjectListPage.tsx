@@ -177,6 +177,18 @@ const ProjectListPage: React.FC = () => {
                       </button>
                     </div>
                   </div>
+                  {project.summary && (
+                    <div className="flex flex-wrap gap-2 mb-4 text-xs text-gray-600">
+                      <span className="font-medium text-gray-900">
+                        {project.summary.total} {project.summary.total === 1 ? 'issue' : 'issues'}
+                      </span>
+                      {Object.entries(project.summary.by_status).map(([status, count]) => (
+                        <span key={status} className="px-2 py-0.5 bg-gray-100 rounded">
+                          {status}: {count}
+                        </span>
+                      ))}
+                    </div>
+                  )}
                   <button
                     onClick={() => navigate(`/projects/${project.id}`)}
                     className="w-full bg-blue-600 text-white py-3 px-4 rounded-md hover:bg-blue-700 transition-colors font-medium text-sm lg:text-base"
@@ -3,11 +3,14 @@ import type {
   User, 
   Project, 
   Issue, 
+  IssueBoard,
+  IssueChanges,
   AuthResponse, 
   LoginData, 
   SignupData, 
   ProjectCreateData, 
   IssueCreateData,
+  IssuePlacement,
   ApiError 
 } from '../types';
 
@@ -65,7 +68,7 @@ export const authApi = {
 // Projects API
 export const projectsApi = {
   getProjects: async (): Promise<Project[]> => {
-    const response = await api.get('/projects');
+    const response = await api.get('/projects', { params: { include: 'summary' } });
     return response.data;
   },
 
@@ -91,8 +94,22 @@ export const projectsApi = {
 
 // Issues API
 export const issuesApi = {
-  getIssuesByProject: async (projectId: number): Promise<Issue[]> => {
-    const response = await api.get(`/issues/project/${projectId}`);
+  // Resolves to null when `etag` names the current board (304)
+  getIssuesByProject: async (projectId: number, etag?: string | null): Promise<IssueBoard | null> => {
+    const response = await api.get(`/issues/project/${projectId}`, {
+      headers: etag ? { 'If-None-Match': etag } : undefined,
+      validateStatus: (status) => status === 200 || status === 304,
+    });
+    if (response.status === 304) return null;
+    return {
+      issues: response.data,
+      cursor: Number(response.headers['x-change-seq']),
+      etag: (response.headers['etag'] as string | undefined) ?? null,
+    };
+  },
+
+  getIssueChanges: async (projectId: number, since: number): Promise<IssueChanges> => {
+    const response = await api.get(`/issues/project/${projectId}/changes`, { params: { since } });
     return response.data;
   },
 
@@ -111,8 +128,13 @@ export const issuesApi = {
     return response.data;
   },
 
-  updateIssueStatus: async (id: number, status: string): Promise<void> => {
-    await api.patch(`/issues/${id}/status`, { status });
+  updateIssueStatus: async (
+    id: number,
+    status: string,
+    placement: IssuePlacement = {}
+  ): Promise<{ rank: string | null }> => {
+    const response = await api.patch(`/issues/${id}/status`, { status, ...placement });
+    return response.data;
   },
 
   deleteIssue: async (id: number): Promise<void> => {
@@ -1,31 +1,58 @@
 import { create } from "zustand";
 import { issuesApi } from "../services/api";
-import type { Issue, IssueCreateData } from "../types";
+import type { Issue, IssueChanges, IssueCreateData, IssuePlacement } from "../types";
 
 interface KanbanState {
   issues: Issue[];
   isLoading: boolean;
   error: string | null;
+  // Change feed position of `issues`, the project it belongs to and the
+  // ETag of the board it was loaded from
+  cursor: number;
+  syncedProjectId: number | null;
+  boardEtag: string | null;
   
   // Actions
   fetchIssues: (projectId: number) => Promise<void>;
+  syncIssues: (projectId: number) => Promise<void>;
   createIssue: (data: IssueCreateData) => Promise<Issue>;
   updateIssue: (id: number, data: IssueCreateData) => Promise<void>;
   deleteIssue: (id: number) => Promise<void>;
-  moveIssue: (issueId: number, status: string) => Promise<void>;
+  moveIssue: (issueId: number, status: string, placement?: IssuePlacement) => Promise<void>;
   clearError: () => void;
 }
 
+// Apply a delta: drop deleted issues, then insert or replace changed ones
+const applyChanges = (issues: Issue[], changes: IssueChanges): Issue[] => {
+  const deleted = new Set(changes.deleted);
+  const changed = new Map(changes.issues.map(issue => [issue.id, issue]));
+  const kept = issues.filter(issue => !deleted.has(issue.id) && !changed.has(issue.id));
+  return [...kept, ...changed.values()];
+};
+
 export const useKanbanStore = create<KanbanState>((set, get) => ({
   issues: [],
   isLoading: false,
   error: null,
+  cursor: 0,
+  syncedProjectId: null,
+  boardEtag: null,
 
   fetchIssues: async (projectId: number) => {
     set({ isLoading: true, error: null });
     try {
-      const issues = await issuesApi.getIssuesByProject(projectId);
-      set({ issues, isLoading: false });
+      // The board endpoint is cached on the server and answers 304 when the
+      // board we already hold is current
+      const { syncedProjectId, boardEtag } = get();
+      const board = await issuesApi.getIssuesByProject(
+        projectId, syncedProjectId === projectId ? boardEtag : null
+      );
+      if (board) {
+        set({ issues: board.issues, cursor: board.cursor, boardEtag: board.etag, syncedProjectId: projectId });
+      }
+      set({ isLoading: false });
+      // Catch up from the board's cursor through the change feed
+      await get().syncIssues(projectId);
     } catch (error: any) {
       set({
         error: error.response?.data?.detail || 'Failed to fetch issues',
@@ -34,6 +61,24 @@ export const useKanbanStore = create<KanbanState>((set, get) => ({
     }
   },
 
+  syncIssues: async (projectId: number) => {
+    if (get().syncedProjectId !== projectId) {
+      return get().fetchIssues(projectId);
+    }
+    try {
+      let hasMore = true;
+      while (hasMore) {
+        const changes = await issuesApi.getIssueChanges(projectId, get().cursor);
+        // The user may have switched boards meanwhile
+        if (get().syncedProjectId !== projectId) return;
+        set(state => ({ issues: applyChanges(state.issues, changes), cursor: changes.cursor }));
+        hasMore = changes.has_more;
+      }
+    } catch (error: any) {
+      set({ error: error.response?.data?.detail || 'Failed to sync issues' });
+    }
+  },
+
   createIssue: async (data: IssueCreateData) => {
     set({ isLoading: true, error: null });
     try {
@@ -88,7 +133,7 @@ export const useKanbanStore = create<KanbanState>((set, get) => ({
     }
   },
 
-  moveIssue: async (issueId: number, status: string) => {
+  moveIssue: async (issueId: number, status: string, placement: IssuePlacement = {}) => {
     // Optimistically update the UI
     set(state => ({
       issues: state.issues.map(issue =>
@@ -97,7 +142,12 @@ export const useKanbanStore = create<KanbanState>((set, get) => ({
     }));
     
     try {
-      await issuesApi.updateIssueStatus(issueId, status);
+      const { rank } = await issuesApi.updateIssueStatus(issueId, status, placement);
+      set(state => ({
+        issues: state.issues.map(issue =>
+          issue.id === issueId ? { ...issue, rank } : issue
+        ),
+      }));
     } catch (error: any) {
       // Revert the optimistic update on error
       const { issues } = get();
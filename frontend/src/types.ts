@@ -4,11 +4,18 @@ export interface User {
   email: string;
 }
 
+export interface ProjectSummary {
+  total: number;
+  by_status: Record<string, number>;
+  last_updated?: string | null;
+}
+
 export interface Project {
   id: number;
   name: string;
   description?: string;
   owner_id: number;
+  summary?: ProjectSummary;
 }
 
 export interface Issue {
@@ -19,6 +26,26 @@ export interface Issue {
   priority: string;
   assignee_id?: number;
   project_id: number;
+  rank?: string | null;
+}
+
+// A whole board, with the change feed cursor and ETag it was read at
+export interface IssueBoard {
+  issues: Issue[];
+  cursor: number;
+  etag: string | null;
+}
+
+export interface IssueChanges {
+  cursor: number;
+  issues: Issue[];
+  deleted: number[];
+  has_more: boolean;
+}
+
+export interface IssuePlacement {
+  after_id?: number;
+  before_id?: number;
 }
 
 export interface AuthResponse {